@@ -1,15 +1,40 @@
 import os
 import json
 import socket
-import threading
+import multiprocessing
 import sys
 
 # Add the current directory to the Python path for proper imports
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-# Import configuration module - note we now import flask_app instead of app
-from app.config import flask_app, socketio, ocr_settings, settings_file, status_file, macro_status, log_dir
+# "python app.py --production" serves on gevent instead of the Werkzeug debug server.
+# The mode has to be known before anything else is imported: gevent patches sockets and
+# locks first, and the config picks the Socket.IO async mode from it.
+if "--production" in sys.argv:
+    os.environ["KEMAC_SERVER_MODE"] = "production"
+# "python app.py --hub [HOST:]PORT" also collects the results of agents (python -m app.ocr --agent)
+if "--hub" in sys.argv:
+    hub_arg = sys.argv[sys.argv.index("--hub") + 1:][:1]
+    os.environ["KEMAC_HUB"] = hub_arg[0] if hub_arg and not hub_arg[0].startswith("--") else ""
+if os.environ.get("KEMAC_SERVER_MODE") == "production" and multiprocessing.parent_process() is None:
+    from gevent import monkey
+    # Threads stay real OS threads so the scan loop and OCR run beside the event loop, not on it.
+    # queue stays unpatched with them: gevent's queues only work between greenlets of one loop,
+    # and the log, history and event subscriber threads hand work over through queue.Queue.
+    # subprocess stays unpatched too: gevent's version only works on the main thread's loop,
+    # and the scan threads start Tesseract; requests that run it use run_blocking instead.
+    monkey.patch_all(thread=False, queue=False, subprocess=False)
+
+# Import the web app and configuration modules - note we now import flask_app instead of app
+from app.web import flask_app, socketio
+from app.config import emit_bridge, settings_store, settings_file, status_file, macro_status, log_dir
 from app.ocr.ocr_processor import perform_ocr
+from app.ocr.watchdog import scan_supervisor
+from app.ocr.consumers import subscribe_scan_consumers, subscribe_web_consumers
+from app.hub.hub import hub
+from app.hub.protocol import parse_address, DEFAULT_PORT
+from app.utils.serving import SERVER_MODE, cooperative
+from app.utils.warmup import start_warm_up
 from app.utils.logger import get_logger
 
 # Create logger for this module
@@ -20,31 +45,28 @@ import app.routes.api
 import app.routes.ocr_routes
 import app.routes.webhook_routes
 import app.routes.socket_handlers
+import app.routes.history_routes
+import app.routes.capture_routes
+import app.routes.session_routes
+import app.routes.hub_routes
+import app.routes.profile_routes
 
 # Load settings if they exist
 if os.path.exists(settings_file):
     try:
-        with open(settings_file, 'r') as f:
-            loaded_settings = json.load(f)
-            
-            # Update existing settings with loaded values
-            ocr_settings["enabled"] = loaded_settings.get("enabled", False)
-            ocr_settings["regions"] = loaded_settings.get("regions", [])
-            
-            # Handle webhook settings, ensuring they exist
-            if "webhook" in loaded_settings:
-                ocr_settings["webhook"]["enabled"] = loaded_settings["webhook"].get("enabled", False)
-                ocr_settings["webhook"]["url"] = loaded_settings["webhook"].get("url", "")
-                ocr_settings["webhook"]["biome_notifications"] = loaded_settings["webhook"].get("biome_notifications", True)
-                ocr_settings["webhook"]["user_id"] = loaded_settings["webhook"].get("user_id", "")
-                ocr_settings["webhook"]["keywords"] = loaded_settings["webhook"].get("keywords", [])
-            
-            logger.info("OCR settings loaded successfully")
+        settings_store.load()
+        logger.info("OCR settings loaded successfully")
     except Exception as e:
         logger.error("Could not load OCR settings, using defaults: {}", str(e))
 
-# Load macro status if it exists
-if os.path.exists(status_file):
+# Scan events go to the history, the webhooks and the web clients on their own threads
+# (OCR worker processes import this module too, but never scan)
+if multiprocessing.parent_process() is None:
+    subscribe_scan_consumers()
+    subscribe_web_consumers()
+
+# Load macro status if it exists (OCR worker processes import this module too, but must not scan)
+if os.path.exists(status_file) and multiprocessing.parent_process() is None:
     try:
         with open(status_file, 'r') as f:
             saved_status = f.read().strip()
@@ -52,12 +74,9 @@ if os.path.exists(status_file):
                 globals()["macro_status"] = saved_status
                 logger.info("Loaded saved macro status: {}", macro_status)
                 
-                # If status is running, start the OCR thread
+                # If status is running, start the OCR thread (the supervisor keeps it to one)
                 if macro_status == "running":
-                    globals()["stop_ocr_thread"] = False
-                    globals()["ocr_thread"] = threading.Thread(target=perform_ocr)
-                    globals()["ocr_thread"].daemon = True
-                    globals()["ocr_thread"].start()
+                    scan_supervisor.start(perform_ocr)
                     logger.info("Automatically restarting OCR processing thread")
     except Exception as e:
         logger.error("Could not load saved macro status: {}", str(e))
@@ -77,12 +96,25 @@ def get_local_ip():
 
 if __name__ == "__main__":
     host = "0.0.0.0"  # Listen on all available network interfaces
-    port = 5000
+    port = int(os.environ.get("KEMAC_PORT", 5000))
     local_ip = get_local_ip()
     
-    logger.info("Starting Macro Control Web App...")
+    logger.info("Starting Macro Control Web App ({} mode)...", SERVER_MODE)
     logger.info("Local access: http://127.0.0.1:{}/", port)
     logger.info("Network access: http://{}:{}/", local_ip, port)
     logger.info("(Press CTRL+C to quit)")
     
-    socketio.run(flask_app, host=host, port=port, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    # Heavy modules, Tesseract and the templates load in the background once the server
+    # listens (in debug mode only in the reloader's serving process, not in its watcher)
+    if cooperative() or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_warm_up(flask_app, port)
+        if "KEMAC_HUB" in os.environ:
+            hub.start(parse_address(os.environ["KEMAC_HUB"] or DEFAULT_PORT, host),
+                      os.environ.get("KEMAC_HUB_TOKEN", ""))
+            logger.info("Hub: agents connect to {}:{}", local_ip if hub.token else hub.address[0], hub.address[1])
+    
+    if cooperative():
+        emit_bridge.start()
+        socketio.run(flask_app, host=host, port=port)
+    else:
+        socketio.run(flask_app, host=host, port=port, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
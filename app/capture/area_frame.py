@@ -0,0 +1,43 @@
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+class AreaFrame:
+    """
+    A frame made of RGB arrays for some areas of the screen (a frame log
+    entry, or a capture of only the regions' area).
+
+    Supports the screenshot calls the scan loop makes (`size`, `crop`, `copy`),
+    so it can stand in for an ImageGrab capture. `array(box)` returns the raw view.
+    """
+
+    __slots__ = ("seq", "ts", "size", "areas")
+
+    def __init__(self, seq, ts, size, areas):
+        self.seq = seq
+        self.ts = ts
+        self.size = size
+        self.areas = areas  # box -> height x width x 3 view
+
+    def array(self, box):
+        """View of a captured box, or of the part of a captured area that contains it"""
+        box = tuple(box)
+        view = self.areas.get(box)
+        if view is not None:
+            return view
+        x1, y1, x2, y2 = box
+        for (ax1, ay1, ax2, ay2), area in self.areas.items():
+            if ax1 <= x1 and ay1 <= y1 and x2 <= ax2 and y2 <= ay2:
+                return area[y1 - ay1:y2 - ay1, x1 - ax1:x2 - ax1]
+        raise ValueError(f"Area {box} was not captured in this frame")
+
+    def crop(self, box):
+        return Image.fromarray(np.ascontiguousarray(self.array(box)))
+
+    def copy(self):
+        """Full-screen image with the captured areas on a black background"""
+        canvas = Image.new('RGB', self.size)
+        for (x1, y1, _, _), view in self.areas.items():
+            canvas.paste(Image.fromarray(np.ascontiguousarray(view)), (x1, y1))
+        return canvas
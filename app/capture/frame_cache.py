@@ -0,0 +1,123 @@
+import time
+import uuid
+import itertools
+import threading
+
+# Seconds a frame serves requests when the scan loop is not publishing, before a request captures a new one
+IDLE_MAX_AGE = 1.0
+
+# Same while scanning; only matters if cycles stop publishing (e.g. OCR disabled)
+SCAN_MAX_AGE = 10.0
+
+class CachedFrame:
+    """One published frame and the renditions encoded from it so far"""
+
+    __slots__ = ("version", "session", "screenshot", "ts", "renditions", "lock")
+
+    def __init__(self, version, session, screenshot, ts):
+        self.version = version
+        self.session = session
+        self.screenshot = screenshot
+        self.ts = ts
+        self.renditions = {}  # rendition key -> encoded value
+        self.lock = threading.Lock()
+
+class FrameCache:
+    """
+    Latest frame of the main screen and of every capture session.
+
+    The scan loop publishes each frame once it has been scanned; requests
+    (socket connects, screenshot routes) read the latest frame instead of
+    capturing the screen themselves. Encoded renditions (PNG, highlighted PNG,
+    ...) are built by the first requester of a frame and shared by everyone
+    else; the frame version gives requesters a cheap ETag. Versions restart
+    with the process, so ETags also carry a per-process boot id.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.capture_lock = threading.Lock()
+        self.frames = {}  # session name (None for the main screen) -> CachedFrame
+        self.versions = itertools.count(1)
+        self.boot = uuid.uuid4().hex[:8]  # Keeps a restarted process from matching its predecessor's ETags
+        self.published = 0
+        self.captured = 0
+        self.encoded = 0
+        self.hits = 0
+
+    def publish(self, screenshot, session=None, ts=None):
+        """Make a frame the latest one of its session and return its CachedFrame"""
+        frame = CachedFrame(next(self.versions), session, screenshot, time.time() if ts is None else ts)
+        with self.lock:
+            self.frames[session] = frame
+            self.published += 1
+        return frame
+
+    def drop(self, session):
+        """Forget the frame of a removed session"""
+        with self.lock:
+            self.frames.pop(session, None)
+
+    def latest(self, session=None, max_age=None):
+        """Latest frame of a session, or None if there is none (or it is older than max_age seconds)"""
+        with self.lock:
+            frame = self.frames.get(session)
+        if frame is None or (max_age is not None and time.time() - frame.ts > max_age):
+            return None
+        return frame
+
+    def fresh(self, capture, max_age, session=None):
+        """
+        Latest frame of a session, captured with capture() if it is missing or stale
+
+        Concurrent requesters of a stale frame wait for a single capture.
+        """
+        frame = self.latest(session, max_age)
+        if frame is not None:
+            return frame
+        with self.capture_lock:
+            frame = self.latest(session, max_age)
+            if frame is None:
+                frame = self.publish(capture(), session)
+                with self.lock:
+                    self.captured += 1
+        return frame
+
+    def rendition(self, frame, key, render):
+        """
+        Encoded rendition of a frame, built with render(frame) at most once per frame and key
+
+        Returns:
+            tuple: (etag, value)
+        """
+        value = frame.renditions.get(key)
+        if value is None:
+            with frame.lock:
+                value = frame.renditions.get(key)
+                if value is None:
+                    value = frame.renditions[key] = render(frame)
+                    with self.lock:
+                        self.encoded += 1
+                    return self.etag(frame, key), value
+        with self.lock:
+            self.hits += 1
+        return self.etag(frame, key), value
+
+    def etag(self, frame, key):
+        parts = key if isinstance(key, tuple) else (key,)
+        return "-".join(str(part) for part in (self.boot, frame.version) + parts)
+
+    def status(self):
+        with self.lock:
+            return {
+                "frames": {session or "": {"version": frame.version, "age": time.time() - frame.ts,
+                                           "renditions": len(frame.renditions)}
+                           for session, frame in self.frames.items()},
+                "published": self.published,
+                "captured_on_request": self.captured,
+                "encoded": self.encoded,
+                "shared": self.hits,
+            }
+
+# Shared cache filled by the scan loop and read by the screenshot routes and socket handlers
+frame_cache = FrameCache()
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import threading
+
+from app.config import settings_dir, log_dir
+from app.capture.area_frame import AreaFrame
+from app.utils.lazy_import import lazy_import
+from app.utils.logger import get_logger
+
+np = lazy_import("numpy")
+
+# Create a logger for the frame log
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Directory of the frame log used by the scan loop
+FRAME_LOG_DIR = os.path.join(settings_dir, "frame_log")
+
+FRAMES_FILE = "frames.u8"
+INDEX_FILE = "index.bin"
+META_FILE = "meta.json"
+
+# One index entry per slot; seq is -1 for a slot that was never written
+INDEX_DTYPE = [("seq", "<i8"), ("ts", "<f8")]
+
+class FrameLog:
+    """
+    Ring of raw RGB frames in a preallocated, memory-mapped file.
+
+    The geometry is fixed when the log is created: a screen size and a list of
+    areas (boxes in screen coordinates). Every slot stores each area as an
+    uint8 height x width x 3 array, back to back, so writing a frame is one copy
+    per area from the capture buffer into the mapping and reading one is free:
+    `read` returns NumPy views into the mapping without decoding anything.
+
+    Files in the log directory:
+        meta.json   geometry and capacity
+        frames.u8   capacity x frame_bytes uint8 slots
+        index.bin   capacity x (seq, ts) entries; seq is written last, so a slot
+                    with a valid seq holds a complete frame
+    """
+
+    def __init__(self, directory, meta, mode):
+        self.directory = directory
+        self.meta = meta
+        self.capacity = meta["capacity"]
+        self.screen_size = tuple(meta["screen_size"])
+
+        # (box, offset, shape) for each area inside a slot
+        self.layout = []
+        offset = 0
+        for box in meta["areas"]:
+            x1, y1, x2, y2 = box
+            shape = (y2 - y1, x2 - x1, 3)
+            self.layout.append((tuple(box), offset, shape))
+            offset += shape[0] * shape[1] * 3
+        self.frame_bytes = offset
+
+        self.frames = np.memmap(os.path.join(directory, FRAMES_FILE), dtype=np.uint8, mode=mode,
+                                shape=(self.capacity, self.frame_bytes))
+        self.index = np.memmap(os.path.join(directory, INDEX_FILE), dtype=INDEX_DTYPE, mode=mode,
+                               shape=(self.capacity,))
+        if mode == "w+":
+            self.index["seq"] = -1
+        self.next_seq = int(self.index["seq"].max()) + 1
+
+    @classmethod
+    def create(cls, directory, screen_size, areas, capacity):
+        """Open the log in `directory` for writing, recreating it if its geometry differs"""
+        meta = {"screen_size": list(screen_size), "areas": [list(box) for box in areas], "capacity": capacity}
+        os.makedirs(directory, exist_ok=True)
+        mode = "r+" if read_meta(directory) == meta else "w+"
+        log = cls(directory, meta, mode)
+        if mode == "w+":
+            with open(os.path.join(directory, META_FILE), 'w') as f:
+                json.dump(meta, f)
+        return log
+
+    @classmethod
+    def open(cls, directory):
+        """Open an existing log read-only, or return None if there is none"""
+        meta = read_meta(directory)
+        if meta is None:
+            return None
+        return cls(directory, meta, "r")
+
+    def write(self, frame, ts=None):
+        """
+        Append a frame, overwriting the oldest slot once the ring is full
+
+        Args:
+            frame: the capture, as a PIL image, an AreaFrame or a full-screen height x width x 3(+) uint8 array
+        """
+        slot = self.next_seq % self.capacity
+        row = self.frames[slot]
+        self.index["seq"][slot] = -1  # Invalidate the slot while it is rewritten
+        for box, offset, shape in self.layout:
+            dst = row[offset:offset + shape[0] * shape[1] * 3].reshape(shape)
+            if isinstance(frame, np.ndarray):
+                x1, y1, x2, y2 = box
+                dst[...] = frame[y1:y2, x1:x2, :3]
+            elif isinstance(frame, AreaFrame):
+                dst[...] = frame.array(box)
+            else:
+                dst[...] = np.asarray(frame.crop(box))
+        self.index["ts"][slot] = time.time() if ts is None else ts
+        self.index["seq"][slot] = self.next_seq
+        self.next_seq += 1
+
+    def slots(self):
+        """Written slots, oldest first"""
+        seqs = np.asarray(self.index["seq"])
+        written = np.flatnonzero(seqs >= 0)
+        return written[np.argsort(seqs[written])].tolist()
+
+    def read(self, slot):
+        """Return the frame in a slot as a AreaFrame of views into the mapping"""
+        row = self.frames[slot]
+        areas = {box: row[offset:offset + shape[0] * shape[1] * 3].reshape(shape)
+                 for box, offset, shape in self.layout}
+        return AreaFrame(int(self.index["seq"][slot]), float(self.index["ts"][slot]), self.screen_size, areas)
+
+    def __len__(self):
+        return int(np.count_nonzero(np.asarray(self.index["seq"]) >= 0))
+
+    def flush(self):
+        if self.frames.mode != "r":
+            self.frames.flush()
+            self.index.flush()
+
+def read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class FrameLogTap:
+    """
+    Connects the scan loop to the frame log: records captured frames (tap) or
+    hands recorded frames back in a loop (source).
+    """
+
+    def __init__(self, directory=FRAME_LOG_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.writer = None
+        self.geometry = None
+        self.reader = None
+        self.replay_slots = []
+        self.replay_position = 0
+
+    def record(self, screenshot, plans, options, ts=None):
+        """Append a captured frame; the log is recreated when the region layout changes"""
+        boxes = [plan.box for plan in plans if not plan.too_small]
+        if not boxes:
+            return
+        if options.get("union"):
+            boxes = [(min(b[0] for b in boxes), min(b[1] for b in boxes),
+                      max(b[2] for b in boxes), max(b[3] for b in boxes))]
+        if isinstance(screenshot, np.ndarray):
+            screen_size = (screenshot.shape[1], screenshot.shape[0])
+        else:
+            screen_size = tuple(screenshot.size)
+        geometry = (screen_size, tuple(boxes), int(options.get("capacity", 600)))
+
+        with self.lock:
+            self.reader = None
+            if self.geometry != geometry:
+                if self.writer is not None:
+                    self.writer.flush()
+                self.writer = FrameLog.create(self.directory, geometry[0], geometry[1], max(1, geometry[2]))
+                self.geometry = geometry
+                logger.info("Frame log geometry: {} area(s), {} bytes per frame, {} frames",
+                            len(boxes), self.writer.frame_bytes, self.writer.capacity)
+            self.writer.write(screenshot, ts)
+
+    def next_frame(self):
+        """Return the next recorded frame (oldest first, wrapping around), or None if the log is empty"""
+        with self.lock:
+            if self.writer is not None:
+                self.writer.flush()
+                self.writer = None
+                self.geometry = None
+            if self.reader is None or self.replay_position >= len(self.replay_slots):
+                self.reader = FrameLog.open(self.directory)
+                self.replay_slots = self.reader.slots() if self.reader is not None else []
+                self.replay_position = 0
+            if not self.replay_slots:
+                return None
+            slot = self.replay_slots[self.replay_position]
+            self.replay_position += 1
+            return self.reader.read(slot)
+
+    def status(self):
+        log = self.writer or self.reader or FrameLog.open(self.directory)
+        if log is None:
+            return {"frames": 0, "capacity": 0, "bytes_per_frame": 0}
+        return {"frames": len(log), "capacity": log.capacity, "bytes_per_frame": log.frame_bytes,
+                "areas": len(log.layout), "screen_size": list(log.screen_size)}
+
+# Shared tap used by the scan loop and the routes
+frame_log_tap = FrameLogTap()
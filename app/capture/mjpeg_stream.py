@@ -0,0 +1,178 @@
+import os
+import time
+import threading
+from app.config import log_dir
+from app.capture.area_frame import AreaFrame
+from app.capture.frame_cache import frame_cache
+from app.utils.serving import cooperative
+from app.utils.lazy_import import lazy_import
+from app.utils.logger import get_logger
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Create a logger for the stream encoder
+logger = get_logger(__name__, os.path.join(log_dir, "app.log"))
+
+BOUNDARY = "frame"
+
+# Seconds a viewer waits for a frame before checking again (e.g. while scanning is stopped)
+VIEWER_TIMEOUT = 5.0
+
+def encode_jpeg(screenshot, scale, quality):
+    """Downscale a frame (PIL image or AreaFrame) and encode it as JPEG bytes"""
+    if isinstance(screenshot, AreaFrame):
+        screenshot = screenshot.copy()
+    screenshot = np.asarray(screenshot)
+    if scale < 1.0:
+        height, width = screenshot.shape[:2]
+        screenshot = cv2.resize(screenshot, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                interpolation=cv2.INTER_AREA)
+    ok, jpeg = cv2.imencode(".jpg", cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR),
+                            (cv2.IMWRITE_JPEG_QUALITY, int(quality)))
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return jpeg.tobytes()
+
+class StreamChannel:
+    """
+    One encoder for all viewers of a session at the same stream options.
+
+    While the channel has viewers, its thread wakes up at the configured FPS,
+    encodes the newest frame if it changed (as a frame cache rendition) and
+    publishes it under a new sequence number. Viewers wait for the next
+    sequence number and always send the newest JPEG: a viewer that cannot
+    keep up skips the frames published while it was still writing, and
+    nothing is queued per viewer. When the last viewer leaves the thread
+    exits and calls on_idle(channel).
+    """
+
+    def __init__(self, latest_frame, session, options, on_idle=None):
+        self.latest_frame = latest_frame
+        self.session = session
+        self.on_idle = on_idle
+        self.fps = max(0.1, options["fps"])
+        self.scale = options["scale"]
+        self.quality = options["quality"]
+        self.condition = threading.Condition()
+        self.thread = None
+        self.viewers = 0
+        self.seq = 0
+        self.jpeg = None
+        self.sent = 0
+        self.skipped = 0
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        key = ("jpeg", self.scale, self.quality)
+        last_version = None
+        while True:
+            with self.condition:
+                if not self.viewers:
+                    self.thread = None
+                    break
+            started = time.monotonic()
+            try:
+                frame = self.latest_frame(self.session)
+                if frame is not None and frame.version != last_version:
+                    _, jpeg = frame_cache.rendition(frame, key,
+                                                    lambda f: encode_jpeg(f.screenshot, self.scale, self.quality))
+                    last_version = frame.version
+                    with self.condition:
+                        self.jpeg = jpeg
+                        self.seq += 1
+                        self.condition.notify_all()
+            except Exception as e:
+                logger.error("Error encoding stream frame: {}", str(e))
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        if self.on_idle is not None:
+            self.on_idle(self)
+
+    def attach(self):
+        """Count a new viewer, starting the encoder thread if it is not running"""
+        with self.condition:
+            self.viewers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="mjpeg-encoder", daemon=True)
+                self.thread.start()
+
+    def frames(self):
+        """Generate the multipart chunks for one viewer counted by attach()"""
+        seen = 0
+        try:
+            while True:
+                if not self._wait(seen):
+                    continue
+                with self.condition:
+                    if seen:
+                        self.skipped += self.seq - seen - 1
+                    seen, jpeg = self.seq, self.jpeg
+                    self.sent += 1
+                yield (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                       + jpeg + b"\r\n")
+        finally:
+            with self.condition:
+                self.viewers -= 1
+
+    def _wait(self, seen):
+        """Wait until a frame newer than `seen` is published; False on timeout"""
+        if cooperative():
+            # Viewers are greenlets: poll with the (patched, cooperative) sleep instead of blocking the loop
+            deadline = time.monotonic() + VIEWER_TIMEOUT
+            while self.seq == seen and time.monotonic() < deadline:
+                time.sleep(min(0.05, 0.5 / self.fps))
+            return self.seq != seen
+        with self.condition:
+            return self.condition.wait_for(lambda: self.seq != seen, timeout=VIEWER_TIMEOUT)
+
+    def status(self):
+        with self.condition:
+            return {"session": self.session or "", "fps": self.fps, "scale": self.scale, "quality": self.quality,
+                    "viewers": self.viewers, "encoded": self.seq, "sent": self.sent, "skipped": self.skipped}
+
+class MjpegStream:
+    """
+    Stream channels by session and stream options, shared by every viewer that asks for the same stream.
+
+    A channel is removed once its encoder stopped for lack of viewers, so
+    changing stream options or sessions does not leave channels behind.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = {}  # (session, fps, scale, quality) -> StreamChannel
+
+    def frames(self, latest_frame, session, options):
+        """
+        Generate multipart chunks for one viewer
+
+        Args:
+            latest_frame (callable): latest_frame(session) -> CachedFrame or None
+            session (str): Capture session, None for the main screen
+            options (Mapping): The "stream" settings (fps, scale, quality)
+        """
+        key = (session, options["fps"], options["scale"], options["quality"])
+        with self.lock:
+            channel = self.channels.get(key)
+            if channel is None:
+                channel = self.channels[key] = StreamChannel(latest_frame, session, options, self._prune)
+            channel.attach()
+        yield from channel.frames()
+
+    def _prune(self, channel):
+        """Remove a channel whose encoder stopped, unless a viewer attached since"""
+        with self.lock:
+            with channel.condition:
+                if channel.viewers or channel.thread is not None:
+                    return
+            for key, current in list(self.channels.items()):
+                if current is channel:
+                    del self.channels[key]
+
+    def status(self):
+        with self.lock:
+            channels = list(self.channels.values())
+        return {"channels": [channel.status() for channel in channels]}
+
+# Shared stream channels used by the stream route
+mjpeg_stream = MjpegStream()
@@ -0,0 +1,77 @@
+import os
+import time
+
+from app.config import log_dir
+from app.capture.area_frame import AreaFrame
+from app.capture.x11_capture import X11Capture, X11CaptureError
+from app.ocr.region_plan import get_region_plans
+from app.utils.lazy_import import lazy_import
+from app.utils.logger import get_logger
+
+ImageGrab = lazy_import("PIL.ImageGrab")
+
+# Create a logger for screen capture
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# "imagegrab" works everywhere; "x11" captures through Xlib/MIT-SHM on Linux
+CAPTURE_BACKENDS = ("imagegrab", "x11")
+
+# "regions" captures only the area covering the regions, "screen" the whole screen
+CAPTURE_AREAS = ("regions", "screen")
+
+def regions_area(plans, screen_size):
+    """Smallest box covering every region that gets OCR, or the whole screen if there is none"""
+    boxes = [plan.box for plan in plans if not plan.too_small]
+    if not boxes:
+        return (0, 0) + tuple(screen_size)
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+class ScreenGrabber:
+    """
+    Captures frames for the scan loop with the backend chosen in the settings.
+
+    The X11 backend keeps its display connection and shared memory segment
+    between cycles. If it cannot be used, capture falls back to ImageGrab.
+    Use from a single thread.
+    """
+
+    def __init__(self):
+        self.x11 = None
+        self.x11_error = None
+        self.seq = 0
+        self.backend = None  # Backend used for the last frame
+
+    def _x11(self):
+        if self.x11 is None and self.x11_error is None:
+            try:
+                self.x11 = X11Capture()
+                if not self.x11.uses_shm:
+                    logger.warning("MIT-SHM unavailable ({}), capturing with XGetImage", self.x11.shm_error)
+            except X11CaptureError as e:
+                self.x11_error = str(e)
+                logger.error("X11 capture unavailable, using ImageGrab: {}", str(e))
+        return self.x11
+
+    def grab(self, settings):
+        """Return a frame (a PIL image or an AreaFrame) to run the scan loop on"""
+        options = settings["capture"]
+        x11 = self._x11() if options["backend"] == "x11" else None
+        if x11 is None:
+            self.backend = "imagegrab"
+            return ImageGrab.grab()
+
+        if options["area"] == "screen":
+            area = (0, 0) + x11.screen_size
+        else:
+            area = regions_area(get_region_plans(settings, x11.screen_size), x11.screen_size)
+        self.backend = "x11-shm" if x11.uses_shm else "x11"
+        self.seq += 1
+        return AreaFrame(self.seq, time.time(), x11.screen_size, {area: x11.grab(area)})
+
+    def status(self):
+        return {"backend": self.backend, "x11_error": self.x11_error,
+                "x11_shm_error": self.x11.shm_error if self.x11 is not None else None}
+
+# Grabber used by the scan loop
+screen_grabber = ScreenGrabber()
@@ -0,0 +1,92 @@
+import time
+from multiprocessing import shared_memory
+
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Frames in flight: one being written, one just published, one being read
+SLOTS = 3
+
+# Header fields per slot, stored in front of the pixel data
+SEQ, WIDTH, HEIGHT, TIMESTAMP_US = range(4)
+HEADER_FIELDS = 4
+
+class SharedFrameRing:
+    """
+    Screen frames in a multiprocessing.shared_memory block, for one writer and
+    any number of readers in other processes.
+
+    The block starts with an int64 header (sequence number, size and capture time
+    per slot) followed by SLOTS uint8 height x width x 3 frames. The writer
+    decides which slot to reuse from the acknowledgements it receives; readers
+    only ever take NumPy views of a slot, so nothing is copied after capture.
+    """
+
+    def __init__(self, shm, width, height, owner):
+        self.shm = shm
+        self.width = width
+        self.height = height
+        self.owner = owner
+        self.header = np.ndarray((SLOTS, HEADER_FIELDS), dtype=np.int64, buffer=shm.buf)
+        self.frames = np.ndarray((SLOTS, height, width, 3), dtype=np.uint8, buffer=shm.buf,
+                                 offset=self.header.nbytes)
+
+    @classmethod
+    def create(cls, width, height):
+        """Allocate a ring for frames up to width x height"""
+        size = SLOTS * HEADER_FIELDS * 8 + SLOTS * width * height * 3
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), width, height, owner=True)
+        ring.header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, width, height):
+        """Attach to a ring created by another process"""
+        return cls(shared_memory.SharedMemory(name=name), width, height, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, slot, seq, image):
+        """
+        Copy a captured frame into a slot and publish it under `seq`
+
+        Frames larger than the ring (e.g. after a resolution change) are cropped.
+        """
+        pixels = np.asarray(image)
+        height = min(pixels.shape[0], self.height)
+        width = min(pixels.shape[1], self.width)
+        self.header[slot, SEQ] = 0  # Invalid while being rewritten
+        self.frames[slot, :height, :width] = pixels[:height, :width, :3]
+        self.header[slot, WIDTH] = width
+        self.header[slot, HEIGHT] = height
+        self.header[slot, TIMESTAMP_US] = int(time.time() * 1e6)
+        self.header[slot, SEQ] = seq
+
+    def frame(self, slot, seq):
+        """
+        View of the frame in a slot, or None if the slot no longer holds `seq`
+        """
+        if self.header[slot, SEQ] != seq:
+            return None
+        return self.frames[slot, :self.header[slot, HEIGHT], :self.header[slot, WIDTH]]
+
+    def timestamp(self, slot):
+        return self.header[slot, TIMESTAMP_US] / 1e6
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        self.header = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def free_slot(pending, latest):
+    """Return a slot no reader still holds and that is not the latest frame, or None"""
+    for slot in range(SLOTS):
+        if slot != latest and not pending[slot]:
+            return slot
+    return None
@@ -0,0 +1,156 @@
+import os
+import sys
+import ctypes
+
+from app.config import settings_dir
+from app.capture.frame_log import FrameLog, FRAME_LOG_DIR
+from app.utils.lazy_import import lazy_import
+
+ImageGrab = lazy_import("PIL.ImageGrab")
+
+# Capture sources a session can use
+SOURCE_TYPES = ("monitor", "window", "replay")
+
+class CaptureSourceError(Exception):
+    pass
+
+def list_monitors():
+    """
+    Boxes (x1, y1, x2, y2) of the monitors in virtual desktop coordinates, primary first
+
+    Monitors are enumerated on Windows; elsewhere the whole screen counts as one monitor.
+    """
+    if sys.platform != "win32":
+        return [(0, 0) + ImageGrab.grab().size]
+
+    from ctypes import wintypes
+    monitors = []
+    MonitorEnumProc = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                         ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+
+    def callback(monitor, dc, rect, data):
+        r = rect.contents
+        monitors.append((r.left, r.top, r.right, r.bottom))
+        return 1
+
+    _user32().EnumDisplayMonitors(None, None, MonitorEnumProc(callback), 0)
+    # The primary monitor is the one at the origin of the virtual desktop
+    return sorted(monitors, key=lambda box: box[:2] != (0, 0))
+
+def _user32():
+    user32 = ctypes.windll.user32
+    # Window and monitor coordinates in physical pixels, like ImageGrab's
+    user32.SetProcessDPIAware()
+    return user32
+
+def find_windows(title):
+    """Handles of the visible top-level windows whose title contains `title` (case-insensitive), oldest first"""
+    from ctypes import wintypes
+    user32 = _user32()
+    title = title.lower()
+    found = []
+    EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+    def callback(hwnd, data):
+        if user32.IsWindowVisible(hwnd):
+            length = user32.GetWindowTextLengthW(hwnd)
+            if length:
+                buffer = ctypes.create_unicode_buffer(length + 1)
+                user32.GetWindowTextW(hwnd, buffer, length + 1)
+                if title in buffer.value.lower():
+                    found.append(hwnd)
+        return True
+
+    user32.EnumWindows(EnumWindowsProc(callback), 0)
+    # Enumeration follows the z-order, which changes with focus; handles stay put
+    return sorted(found)
+
+class MonitorSource:
+    """Captures one monitor; region coordinates are relative to its top-left corner"""
+
+    def __init__(self, options):
+        monitors = list_monitors()
+        index = int(options.get("monitor", 0))
+        if not 0 <= index < len(monitors):
+            raise CaptureSourceError(f"Monitor {index} not found ({len(monitors)} monitor(s))")
+        self.box = monitors[index]
+
+    def grab(self):
+        return ImageGrab.grab(bbox=self.box, all_screens=True)
+
+    def close(self):
+        pass
+
+class WindowSource:
+    """
+    Captures the client area of a game window, wherever it is on the desktop;
+    region coordinates are relative to the client area.
+
+    Options: "title" (part of the window title) and "index", which picks among
+    several windows with that title (e.g. one per game client) by age.
+    """
+
+    def __init__(self, options):
+        if sys.platform != "win32":
+            raise CaptureSourceError("Window capture is only supported on Windows")
+        self.title = str(options.get("title", ""))
+        self.index = int(options.get("index", 0))
+        if not self.title:
+            raise CaptureSourceError("Window capture needs a window title")
+        self.user32 = _user32()
+
+    def window_box(self):
+        from ctypes import wintypes
+        windows = find_windows(self.title)
+        if self.index >= len(windows):
+            raise CaptureSourceError(f"Window {self.index} titled '{self.title}' not found ({len(windows)} open)")
+        hwnd = windows[self.index]
+        rect = wintypes.RECT()
+        self.user32.GetClientRect(hwnd, ctypes.byref(rect))
+        origin = wintypes.POINT(0, 0)
+        self.user32.ClientToScreen(hwnd, ctypes.byref(origin))
+        if rect.right <= 0 or rect.bottom <= 0:
+            raise CaptureSourceError(f"Window titled '{self.title}' is minimized")
+        return (origin.x, origin.y, origin.x + rect.right, origin.y + rect.bottom)
+
+    def grab(self):
+        return ImageGrab.grab(bbox=self.window_box(), all_screens=True)
+
+    def close(self):
+        pass
+
+class ReplaySource:
+    """Replays a frame log (by default the one the scan loop records), looping over it"""
+
+    def __init__(self, options):
+        path = options.get("path") or FRAME_LOG_DIR
+        self.directory = path if os.path.isabs(path) else os.path.join(settings_dir, path)
+        self.log = FrameLog.open(self.directory)
+        if self.log is None:
+            raise CaptureSourceError(f"No frame log in {self.directory}")
+        self.slots = []
+        self.position = 0
+
+    def grab(self):
+        if self.position >= len(self.slots):
+            self.slots = self.log.slots()
+            self.position = 0
+            if not self.slots:
+                raise CaptureSourceError(f"Frame log in {self.directory} is empty")
+        slot = self.slots[self.position]
+        self.position += 1
+        return self.log.read(slot)
+
+    def close(self):
+        self.log = None
+
+def make_source(options):
+    """Build the capture source described by a session's "source" options"""
+    kind = options.get("type")
+    if kind == "monitor":
+        return MonitorSource(options)
+    if kind == "window":
+        return WindowSource(options)
+    if kind == "replay":
+        return ReplaySource(options)
+    raise CaptureSourceError(f"Unknown capture source '{kind}'")
@@ -0,0 +1,259 @@
+import ctypes
+import ctypes.util
+
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Xlib constants
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+
+# System V shared memory constants
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+class XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        ("funcs", ctypes.c_void_p * 6),
+    ]
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+_ErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+# Last X error as (error code, request code); Xlib has one error handler per process
+_last_error = [None]
+
+@_ErrorHandler
+def _on_error(display, event):
+    # The default handler exits the process, so errors are recorded instead
+    _last_error[0] = (event.contents.error_code, event.contents.request_code)
+    return 0
+
+class X11CaptureError(Exception):
+    pass
+
+def _load(name):
+    path = ctypes.util.find_library(name)
+    if path is None:
+        raise X11CaptureError(f"lib{name} not found")
+    return ctypes.CDLL(path, use_errno=True)
+
+def _bind(lib, name, restype, *argtypes):
+    function = getattr(lib, name)
+    function.restype = restype
+    function.argtypes = argtypes
+    return function
+
+class X11Capture:
+    """
+    Screen capture through Xlib, with the MIT-SHM extension when available.
+
+    With MIT-SHM one System V shared memory segment, sized for the whole
+    screen, is attached to the X server once; every grab then asks the server
+    to copy just the requested area into it (XShmGetImage). Without MIT-SHM
+    (e.g. a remote display) each grab falls back to XGetImage, which sends the
+    pixels over the X connection. Grabs return RGB arrays.
+
+    Not thread-safe; use one instance per thread.
+    """
+
+    def __init__(self, display_name=None, use_shm=True):
+        self.x11 = _load("X11")
+        self.libc = _load("c")
+        self._bind_functions()
+
+        self._XSetErrorHandler(_on_error)
+
+        self.display = self._XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise X11CaptureError("Cannot open X display")
+        self.root = self._XDefaultRootWindow(self.display)
+        screen = self._XDefaultScreen(self.display)
+        self.screen_size = (self._XDisplayWidth(self.display, screen), self._XDisplayHeight(self.display, screen))
+        self.visual = self._XDefaultVisual(self.display, screen)
+        self.depth = self._XDefaultDepth(self.display, screen)
+
+        self.shm_info = None
+        self.shm_image = None  # XImage over the shared segment, for the size of the last grab
+        self.shm_image_size = None
+        self.shm_error = "disabled"
+        if not use_shm:
+            return
+        try:
+            self.xext = _load("Xext")
+            self._bind_shm_functions()
+            self._attach_shm()
+        except (X11CaptureError, AttributeError) as e:
+            self.shm_error = str(e)
+        else:
+            self.shm_error = None
+
+    @property
+    def uses_shm(self):
+        return self.shm_info is not None
+
+    def _bind_functions(self):
+        x11, c_void_p, c_int, c_ulong = self.x11, ctypes.c_void_p, ctypes.c_int, ctypes.c_ulong
+        self._XSetErrorHandler = _bind(x11, "XSetErrorHandler", c_void_p, _ErrorHandler)
+        self._XOpenDisplay = _bind(x11, "XOpenDisplay", c_void_p, ctypes.c_char_p)
+        self._XCloseDisplay = _bind(x11, "XCloseDisplay", c_int, c_void_p)
+        self._XDefaultRootWindow = _bind(x11, "XDefaultRootWindow", c_ulong, c_void_p)
+        self._XDefaultScreen = _bind(x11, "XDefaultScreen", c_int, c_void_p)
+        self._XDisplayWidth = _bind(x11, "XDisplayWidth", c_int, c_void_p, c_int)
+        self._XDisplayHeight = _bind(x11, "XDisplayHeight", c_int, c_void_p, c_int)
+        self._XDefaultVisual = _bind(x11, "XDefaultVisual", c_void_p, c_void_p, c_int)
+        self._XDefaultDepth = _bind(x11, "XDefaultDepth", c_int, c_void_p, c_int)
+        self._XGetImage = _bind(x11, "XGetImage", ctypes.POINTER(XImage), c_void_p, c_ulong,
+                                c_int, c_int, ctypes.c_uint, ctypes.c_uint, c_ulong, c_int)
+        self._XDestroyImage = _bind(x11, "XDestroyImage", c_int, ctypes.POINTER(XImage))
+        self._XSync = _bind(x11, "XSync", c_int, c_void_p, c_int)
+
+        libc = self.libc
+        self._shmget = _bind(libc, "shmget", c_int, c_int, ctypes.c_size_t, c_int)
+        self._shmat = _bind(libc, "shmat", c_void_p, c_int, c_void_p, c_int)
+        self._shmdt = _bind(libc, "shmdt", c_int, c_void_p)
+        self._shmctl = _bind(libc, "shmctl", c_int, c_int, c_int, c_void_p)
+
+    def _bind_shm_functions(self):
+        xext, c_void_p, c_int, c_uint = self.xext, ctypes.c_void_p, ctypes.c_int, ctypes.c_uint
+        self._XShmQueryExtension = _bind(xext, "XShmQueryExtension", c_int, c_void_p)
+        self._XShmCreateImage = _bind(xext, "XShmCreateImage", ctypes.POINTER(XImage), c_void_p, c_void_p,
+                                      c_uint, c_int, ctypes.c_char_p, ctypes.POINTER(XShmSegmentInfo),
+                                      c_uint, c_uint)
+        self._XShmAttach = _bind(xext, "XShmAttach", c_int, c_void_p, ctypes.POINTER(XShmSegmentInfo))
+        self._XShmDetach = _bind(xext, "XShmDetach", c_int, c_void_p, ctypes.POINTER(XShmSegmentInfo))
+        self._XShmGetImage = _bind(xext, "XShmGetImage", c_int, c_void_p, ctypes.c_ulong,
+                                   ctypes.POINTER(XImage), c_int, c_int, ctypes.c_ulong)
+
+    def _attach_shm(self):
+        if not self._XShmQueryExtension(self.display):
+            raise X11CaptureError("MIT-SHM extension not available")
+
+        width, height = self.screen_size
+        info = XShmSegmentInfo()
+        size = width * height * 4
+        info.shmid = self._shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            raise X11CaptureError(f"shmget failed (errno {ctypes.get_errno()})")
+        info.shmaddr = self._shmat(info.shmid, None, 0)
+        if info.shmaddr in (None, ctypes.c_void_p(-1).value):
+            self._shmctl(info.shmid, IPC_RMID, None)
+            raise X11CaptureError(f"shmat failed (errno {ctypes.get_errno()})")
+        info.readOnly = 0
+
+        _last_error[0] = None
+        attached = self._XShmAttach(self.display, ctypes.byref(info))
+        self._XSync(self.display, 0)
+        # The segment goes away once both sides detach, even if this process dies
+        self._shmctl(info.shmid, IPC_RMID, None)
+        if not attached or _last_error[0] is not None:
+            self._shmdt(info.shmaddr)
+            raise X11CaptureError("XShmAttach failed (remote display?)")
+        self.shm_info = info
+
+    def _shm_image(self, width, height):
+        """XImage of the given size over the shared segment, replaced when the capture size changes"""
+        if self.shm_image_size != (width, height):
+            self._destroy_shm_image()
+            image = self._XShmCreateImage(self.display, self.visual, self.depth, ZPIXMAP, None,
+                                          ctypes.byref(self.shm_info), width, height)
+            if not image:
+                raise X11CaptureError("XShmCreateImage failed")
+            image.contents.data = self.shm_info.shmaddr
+            self.shm_image, self.shm_image_size = image, (width, height)
+        return self.shm_image
+
+    def _destroy_shm_image(self):
+        if self.shm_image is not None:
+            self.shm_image.contents.data = None  # The segment is not the image's to free
+            self._XDestroyImage(self.shm_image)
+            self.shm_image = self.shm_image_size = None
+
+    @staticmethod
+    def _to_rgb(image):
+        ximage = image.contents
+        if ximage.bits_per_pixel != 32:
+            raise X11CaptureError(f"Unsupported pixel format ({ximage.bits_per_pixel} bits per pixel)")
+        buffer = (ctypes.c_ubyte * (ximage.bytes_per_line * ximage.height)).from_address(ximage.data)
+        bgrx = np.ctypeslib.as_array(buffer).reshape(ximage.height, ximage.bytes_per_line // 4, 4)
+        # The only copy: from the X buffer straight into the RGB array
+        return cv2.cvtColor(bgrx[:, :ximage.width], cv2.COLOR_BGRA2RGB)
+
+    def grab(self, box=None):
+        """
+        Capture an area of the screen
+
+        Args:
+            box (tuple): (x1, y1, x2, y2) in screen coordinates; the whole screen by default
+
+        Returns:
+            numpy.ndarray: height x width x 3 RGB array
+        """
+        if box is None:
+            box = (0, 0) + self.screen_size
+        x1, y1, x2, y2 = box
+        width, height = x2 - x1, y2 - y1
+
+        _last_error[0] = None
+        if self.uses_shm:
+            image = self._shm_image(width, height)
+            if not self._XShmGetImage(self.display, self.root, image, x1, y1, ALL_PLANES):
+                raise X11CaptureError("XShmGetImage failed")
+            return self._to_rgb(image)
+
+        image = self._XGetImage(self.display, self.root, x1, y1, width, height, ALL_PLANES, ZPIXMAP)
+        if not image:
+            raise X11CaptureError(f"XGetImage failed (error {_last_error[0]})")
+        try:
+            return self._to_rgb(image)
+        finally:
+            self._XDestroyImage(image)
+
+    def close(self):
+        if self.display is None:
+            return
+        if self.shm_info is not None:
+            self._XShmDetach(self.display, ctypes.byref(self.shm_info))
+            self._destroy_shm_image()
+            self._XSync(self.display, 0)
+            self._shmdt(self.shm_info.shmaddr)
+            self.shm_info = None
+        self._XCloseDisplay(self.display)
+        self.display = None
@@ -1,27 +1,33 @@
 import os
-import pytesseract
-from flask import Flask
-from flask_socketio import SocketIO
 
-# Set the path to Tesseract executable - using default Windows installation path
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+from app.utils.settings_store import SettingsStore
+from app.utils.serving import EmitBridge
+from app.utils.lazy_import import when_imported
+
+def use_default_tesseract(pytesseract):
+    # Set the path to Tesseract executable - using default Windows installation path
+    # (elsewhere tesseract is expected on the PATH)
+    if os.name == "nt":
+        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+# pytesseract is imported on first use (see app/utils/lazy_import.py)
+when_imported("pytesseract", use_default_tesseract)
 
 # Minimum dimensions for OCR regions to be processed
 MIN_OCR_WIDTH = 10
 MIN_OCR_HEIGHT = 10
 
-# Flask app configuration - renaming to flask_app to avoid namespace conflict
-flask_app = Flask(__name__, template_folder='../templates', static_folder='../static')
-flask_app.config['SECRET_KEY'] = 'macro_control_secret_key'
-flask_app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True  # Enable pretty-printed JSON
-flask_app.config['JSONIFY_INDENT'] = 4  # Set JSON indentation to 4 spaces
-socketio = SocketIO(flask_app, cors_allowed_origins="*")
+# Emit from the scan threads (safe in both server modes); the Flask app and SocketIO
+# server live in app/web.py so the headless runner (python -m app.ocr) never imports them
+emit_bridge = EmitBridge()
 
-# Settings file path
-settings_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "settings")
+# Settings file path (KEMAC_SETTINGS_DIR moves it, e.g. to run a hub and agents side by side)
+settings_dir = os.environ.get("KEMAC_SETTINGS_DIR") or \
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "settings")
 os.makedirs(settings_dir, exist_ok=True)
 settings_file = os.path.join(settings_dir, "ocr_settings.json")
 status_file = os.path.join(settings_dir, "macro_status.txt")  # New file to persist macro status
+history_db_file = os.path.join(settings_dir, "history.db")  # SQLite store of OCR text transitions
 
 # Logging configuration
 log_dir = os.path.join(settings_dir, "logs")
@@ -30,7 +36,7 @@ main_log_file = os.path.join(log_dir, "app.log")
 
 # Global variables
 macro_status = "stopped"  # Possible states: "running", "paused", "stopped"
-ocr_settings = {
+DEFAULT_SETTINGS = {
     "enabled": False,
     "regions": [],  # Will contain coordinates for OCR regions: [{"x1": 0, "y1": 0, "x2": 100, "y2": 100, "name": "Region 1"}]
     "webhook": {
@@ -39,8 +45,31 @@ ocr_settings = {
         "biome_notifications": True,  # Enable biome notifications by default
         "user_id": "",  # User ID to ping in Discord
         "keywords": []  # List of keywords with ping settings: [{"text": "forest", "enabled": True, "ping": True}, ...]
+    },
+    "capture": {
+        "backend": "imagegrab",  # "imagegrab" or "x11" (Xlib with MIT-SHM, Linux only)
+        "area": "regions"  # With x11: "regions" captures only the area covering the regions, "screen" everything
+    },
+    "stream": {
+        "fps": 5,  # Frames per second sent to /stream.mjpg viewers (at most one per captured frame)
+        "scale": 0.5,  # Downscale factor of the streamed frames
+        "quality": 70  # JPEG quality
+    },
+    "ocr_workers": 0,  # OCR worker processes fed by a capture process (0 scans in the OCR thread)
+    "sessions": [],  # Capture sessions: [{"name": "Alt", "state": "running", "source": {"type": "window", "title": "Roblox", "index": 1}, "regions": [...]}]
+    "session_workers": 2,  # Scan threads shared by the main screen and the sessions when sessions exist
+    "watchdog": {
+        "call_timeout": 10.0,  # Seconds one Tesseract call may run before it is killed (0 for no limit)
+        "cycle_deadline": 30.0,  # Seconds after which a cycle stops starting OCR calls (0 for no limit)
+        "stall_after": 60.0  # Seconds without progress before the scan loop or a worker is replaced
+    },
+    "frame_log": {
+        "record": False,  # Append every captured frame to the memory-mapped frame log
+        "replay": False,  # Read frames from the frame log instead of capturing the screen
+        "capacity": 600,  # Frames kept in the ring
+        "union": False  # Store the area covering all regions instead of each region
     }
 }
-ocr_results = {}  # Store the latest OCR results for each region
-ocr_thread = None  # Thread for OCR processing
-stop_ocr_thread = False  # Flag to control the OCR thread
\ No newline at end of file
+# Versioned settings: read with settings_store.snapshot(), change with settings_store.update()
+settings_store = SettingsStore(settings_file, DEFAULT_SETTINGS)
+ocr_results = {}  # Store the latest OCR results for each region
\ No newline at end of file
@@ -0,0 +1,279 @@
+import os
+import math
+import time
+import queue
+import sqlite3
+import threading
+
+from app.config import log_dir, history_db_file
+from app.utils.logger import get_logger
+
+# Create a logger for the history store
+logger = get_logger(__name__, os.path.join(log_dir, "history.log"))
+
+DAY_SECONDS = 86400
+
+# Writer thread tuning
+FLUSH_INTERVAL = 1.0  # Seconds between batched commits
+MAX_BATCH = 500       # Maximum transitions committed per transaction
+ALIVE_INTERVAL = 60.0  # Seconds between "alive" marks while no transition arrives
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    region TEXT NOT NULL,
+    ts REAL NOT NULL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_region_ts ON transitions (region, ts);
+CREATE INDEX IF NOT EXISTS idx_transitions_ts ON transitions (ts);
+
+-- Seconds spent on each text per region per UTC day, for closed segments only
+CREATE TABLE IF NOT EXISTS daily_durations (
+    region TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (region, day, text)
+);
+
+-- The currently open segment for each region
+CREATE TABLE IF NOT EXISTS region_state (
+    region TEXT PRIMARY KEY,
+    text TEXT,
+    since REAL NOT NULL
+);
+
+-- Last time the writer was known to run ("alive"), where segments left open by a crash end
+CREATE TABLE IF NOT EXISTS store_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+class HistoryStore:
+    """
+    Append-only store of OCR text transitions backed by SQLite in WAL mode.
+
+    `record` is cheap enough to call for every result (the "history" scan event
+    subscriber calls it): it compares against the last text seen for the region
+    and only queues changes. A writer thread
+    commits queued transitions in batches and keeps the daily duration rollups
+    up to date, so range queries never have to scan months of raw rows.
+
+    A transition with text None marks that scanning stopped; time after it is
+    not attributed to any text. A process that died without saying so leaves
+    segments open: the next process closes them where the writer last marked
+    itself alive (at most ALIVE_INTERVAL before the end).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.queue = queue.Queue()
+        self.last_text = {}  # Last text queued per region (one calling thread only)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_started(self):
+        with self.lock:
+            if not self.initialized:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                conn = self._connect()
+                try:
+                    conn.executescript(SCHEMA)
+                    self._close_open_segments(conn)
+                finally:
+                    conn.close()
+                self.initialized = True
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="history-writer")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def record(self, region, text, ts=None):
+        """Queue a transition if the text for this region changed"""
+        if self.last_text.get(region, ()) == text:
+            return
+        self.last_text[region] = text
+        if self.thread is None:
+            self._ensure_started()
+        self.queue.put((region, time.time() if ts is None else ts, text))
+
+    def mark_stopped(self, ts=None, regions=None):
+        """Close the open segment of every region (or of `regions`), e.g. when the OCR loop exits"""
+        ts = time.time() if ts is None else ts
+        for region, text in list(self.last_text.items()):
+            if text is not None and (regions is None or region in regions):
+                self.record(region, None, ts)
+
+    def _close_open_segments(self, conn):
+        """End the segments a previous process left open when it last marked itself alive"""
+        state = {region: (text, since) for region, text, since in
+                 conn.execute("SELECT region, text, since FROM region_state WHERE text IS NOT NULL")}
+        if not state:
+            return
+        row = conn.execute("SELECT value FROM store_state WHERE key = 'alive'").fetchone()
+        alive = row[0] if row else conn.execute("SELECT MAX(ts) FROM transitions").fetchone()[0]
+        with conn:
+            for region, (_, since) in list(state.items()):
+                self._apply(conn, state, region, max(since, alive or since), None)
+        logger.warning("Closed {} history segment(s) left open by the previous run", len(state))
+
+    # ----- Writer thread -----
+
+    def _run(self):
+        conn = self._connect()
+        state = {region: (text, since) for region, text, since in
+                 conn.execute("SELECT region, text, since FROM region_state")}
+
+        while True:
+            try:
+                batch = [self.queue.get(timeout=ALIVE_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                with conn:
+                    for region, ts, text in batch:
+                        self._apply(conn, state, region, ts, text)
+                    conn.execute("INSERT OR REPLACE INTO store_state (key, value) VALUES ('alive', ?)",
+                                 (time.time(),))
+            except Exception as e:
+                logger.error("Failed to write {} history transition(s): {}", len(batch), str(e))
+                # Reload state so it matches what was actually committed
+                state = {region: (text, since) for region, text, since in
+                         conn.execute("SELECT region, text, since FROM region_state")}
+
+    @staticmethod
+    def _apply(conn, state, region, ts, text):
+        previous = state.get(region)
+        if previous is not None:
+            prev_text, since = previous
+            if prev_text == text:
+                return
+            if prev_text is not None:
+                _add_to_rollup(conn, region, prev_text, since, ts)
+
+        conn.execute("INSERT INTO transitions (region, ts, text) VALUES (?, ?, ?)", (region, ts, text))
+        conn.execute("INSERT OR REPLACE INTO region_state (region, text, since) VALUES (?, ?, ?)",
+                     (region, text, ts))
+        state[region] = (text, ts)
+
+    # ----- Queries -----
+
+    def _read(self):
+        self._ensure_started()
+        return self._connect()
+
+    def regions(self):
+        """Return the current text of every region that has history"""
+        conn = self._read()
+        try:
+            rows = conn.execute("SELECT region, text, since FROM region_state ORDER BY region").fetchall()
+        finally:
+            conn.close()
+        return [{"region": region, "text": text, "since": since} for region, text, since in rows]
+
+    def transitions(self, region=None, start=None, end=None, limit=1000):
+        """Return transitions in [start, end), oldest first"""
+        query = "SELECT region, ts, text FROM transitions WHERE ts >= ? AND ts < ?"
+        params = [start if start is not None else 0, end if end is not None else math.inf]
+        if region:
+            query += " AND region = ?"
+            params.append(region)
+        query += " ORDER BY ts LIMIT ?"
+        params.append(limit)
+
+        conn = self._read()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [{"region": r, "ts": ts, "text": text} for r, ts, text in rows]
+
+    def durations(self, region, start, end, now=None):
+        """
+        Return the seconds spent on each text for a region within [start, end).
+
+        Whole UTC days are read from the rollup table; only the partial days at
+        the edges of the range are computed from raw transitions.
+        """
+        now = time.time() if now is None else now
+        end = min(end, now)
+        totals = {}
+        if end <= start:
+            return totals
+
+        conn = self._read()
+        try:
+            conn.execute("BEGIN")  # One snapshot for rollups, raw rows and state
+            first_day = math.ceil(start / DAY_SECONDS)
+            last_day = math.floor(end / DAY_SECONDS)
+
+            if first_day < last_day:
+                for text, seconds in conn.execute(
+                        "SELECT text, SUM(seconds) FROM daily_durations "
+                        "WHERE region = ? AND day >= ? AND day < ? GROUP BY text",
+                        (region, first_day, last_day)):
+                    totals[text] = totals.get(text, 0.0) + seconds
+
+                # The open segment is not in the rollups yet
+                row = conn.execute("SELECT text, since FROM region_state WHERE region = ?",
+                                   (region,)).fetchone()
+                if row and row[0] is not None:
+                    overlap = min(now, last_day * DAY_SECONDS) - max(row[1], first_day * DAY_SECONDS)
+                    if overlap > 0:
+                        totals[row[0]] = totals.get(row[0], 0.0) + overlap
+
+                edges = [(start, first_day * DAY_SECONDS), (last_day * DAY_SECONDS, end)]
+            else:
+                edges = [(start, end)]
+
+            for edge_start, edge_end in edges:
+                if edge_end > edge_start:
+                    _raw_durations(conn, region, edge_start, edge_end, now, totals)
+        finally:
+            conn.close()
+        return totals
+
+def _add_to_rollup(conn, region, text, start, end):
+    """Add the segment [start, end) to the daily rollups, split at day boundaries"""
+    while start < end:
+        day = int(start // DAY_SECONDS)
+        segment_end = min(end, (day + 1) * DAY_SECONDS)
+        conn.execute(
+            "INSERT INTO daily_durations (region, day, text, seconds) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (region, day, text) DO UPDATE SET seconds = seconds + excluded.seconds",
+            (region, day, text, segment_end - start))
+        start = segment_end
+
+def _raw_durations(conn, region, start, end, now, totals):
+    """Accumulate per-text seconds within [start, end) from raw transitions"""
+    rows = conn.execute(
+        "SELECT ts, text FROM transitions WHERE region = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+        (region, start)).fetchall()
+    rows += conn.execute(
+        "SELECT ts, text FROM transitions WHERE region = ? AND ts > ? AND ts < ? ORDER BY ts",
+        (region, start, end)).fetchall()
+
+    for i, (ts, text) in enumerate(rows):
+        segment_end = rows[i + 1][0] if i + 1 < len(rows) else min(end, now)
+        overlap = min(segment_end, end) - max(ts, start)
+        if text is not None and overlap > 0:
+            totals[text] = totals.get(text, 0.0) + overlap
+
+# Shared store used by the OCR loop and the history routes
+history_store = HistoryStore(history_db_file)
@@ -0,0 +1,237 @@
+import os
+import time
+import uuid
+import base64
+import socket
+import threading
+from collections import deque
+
+from app.config import settings_store, log_dir
+from app.ocr.events import FrameCaptured, RegionTextChanged, ScanStopped
+from app.ocr.sessions import MAIN_SESSION
+from app.ocr.throughput import scan_throughput
+from app.ocr.watchdog import scan_supervisor
+from app.capture.mjpeg_stream import encode_jpeg
+from app.hub.protocol import send_message, MessageReader
+from app.utils.event_bus import event_bus, DROP_OLDEST
+from app.utils.logger import get_logger
+
+# Create a logger for the hub agent
+logger = get_logger(__name__, os.path.join(log_dir, "hub.log"))
+
+# Transitions kept until the hub acknowledges them; beyond this the oldest are lost (the hub counts a gap)
+OUTBOX_SIZE = 10000
+# Seconds acknowledged transitions are kept: the hub acknowledges before its history is written,
+# and a hub restarted within this window gets them again (it skips those its history holds)
+RESEND_WINDOW = 30.0
+BATCH_SIZE = 500  # Transitions per message
+
+CONNECT_TIMEOUT = 5.0
+SOCKET_TIMEOUT = 30.0  # A hub that neither reads nor answers for this long is disconnected
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 10.0  # Reconnection delays double from RECONNECT_MIN up to this
+
+WAKE_INTERVAL = 0.25  # Longest the connection thread sleeps when there is nothing to send
+METRICS_INTERVAL = 5.0
+PREVIEW_INTERVAL = 1.0  # Seconds between preview frames while the hub has viewers
+
+class HubAgent:
+    """
+    Pushes a headless scanner's results to a hub over one persistent connection.
+
+    Text transitions come from the scan events (subscriber "hub") and are
+    numbered in an outbox. The connection thread sends them in batches and
+    drops them RESEND_WINDOW seconds after the hub acknowledged them. After a
+    reconnect the hub's welcome says which ones it already has, so the
+    transitions missed during the outage are sent again, in order. Throughput and watchdog metrics
+    follow every METRICS_INTERVAL seconds, and JPEG previews of the main
+    screen only while the hub asks for them (subscriber "hub-preview", which
+    exists only then).
+    """
+
+    def __init__(self, address, name, token=""):
+        self.address = address
+        self.name = name
+        self.token = token
+        self.boot = uuid.uuid4().hex  # Sequence numbers restart with every agent process
+        self.condition = threading.Condition()
+        self.outbox = deque(maxlen=OUTBOX_SIZE)  # (seq, region, text, ts, notify), oldest first
+        self.seq = 0  # Last assigned sequence number
+        self.acked = 0  # Highest sequence number the hub applied
+        self.acks = deque()  # (monotonic time, acked) of recent acknowledgements, oldest first
+        self.texts = {}  # region -> current text, sent in hello
+        self.sock = None  # Current connection
+        self.connected = False
+        self.closed = False
+        self.preview = False
+        self.frame = None  # Latest main screen frame while previewing
+        self.subscription = None
+        self.thread = None
+        self.connections = 0
+        self.lost = 0
+        self.last_error = None
+
+    def start(self):
+        self.subscription = event_bus.subscribe("hub", (RegionTextChanged, ScanStopped), self._queue_event,
+                                                OUTBOX_SIZE, DROP_OLDEST)
+        self.thread = threading.Thread(target=self._run, name="hub-agent", daemon=True)
+        self.thread.start()
+
+    def _queue_event(self, event):
+        if isinstance(event, ScanStopped):
+            changes = [(region, None, False) for region in event.regions]
+        else:
+            changes = [(event.region, event.text, event.notify)]
+        with self.condition:
+            for region, text, notify in changes:
+                self.seq += 1
+                if len(self.outbox) == self.outbox.maxlen and self.outbox[0][0] > self.acked:
+                    self.lost += 1
+                self.outbox.append((self.seq, region, text, event.ts, notify))
+                self.texts[region] = text
+            self.condition.notify_all()
+
+    def _store_frame(self, event):
+        if event.session is MAIN_SESSION:
+            self.frame = event.screenshot
+
+    def _set_preview(self, on):
+        with self.condition:
+            if on == self.preview:
+                return
+            self.preview = on
+            self.frame = None
+        if on:
+            event_bus.subscribe("hub-preview", (FrameCaptured,), self._store_frame, 1, DROP_OLDEST)
+        else:
+            event_bus.unsubscribe("hub-preview")
+
+    def _acknowledge(self, last_seq):
+        with self.condition:
+            self.acked = max(self.acked, last_seq)
+            now = time.monotonic()
+            self.acks.append((now, self.acked))
+            released = 0
+            while self.acks and self.acks[0][0] < now - RESEND_WINDOW:
+                released = self.acks.popleft()[1]
+            while self.outbox and self.outbox[0][0] <= released:
+                self.outbox.popleft()
+            self.condition.notify_all()
+
+    def _run(self):
+        delay = RECONNECT_MIN
+        while not self.closed:
+            try:
+                sock = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+            except OSError as e:
+                self.last_error = str(e)
+                logger.warning("Could not connect to the hub at {}:{}: {}", self.address[0], self.address[1], str(e))
+            else:
+                try:
+                    self._serve(sock)
+                    delay = RECONNECT_MIN
+                except (OSError, ValueError) as e:
+                    self.last_error = str(e)
+                    logger.warning("Hub connection lost: {}", str(e))
+                finally:
+                    with self.condition:
+                        self.connected = False
+                    self._set_preview(False)
+                    sock.close()
+            retry_at = time.monotonic() + delay
+            with self.condition:
+                while not self.closed and time.monotonic() < retry_at:
+                    self.condition.wait(retry_at - time.monotonic())
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    def _serve(self, sock):
+        """Say hello, then send transitions, metrics and previews until the connection or the agent closes"""
+        sock.settimeout(SOCKET_TIMEOUT)
+        reader = MessageReader(sock)
+        with self.condition:
+            first_seq = self.outbox[0][0] if self.outbox else self.seq + 1
+            results = {region: text for region, text in self.texts.items() if text is not None}
+        send_message(sock, {"type": "hello", "agent": self.name, "boot": self.boot, "token": self.token,
+                            "first_seq": first_seq, "results": results})
+        welcome = reader.read()
+        if welcome is None:
+            raise ConnectionError("The hub did not answer")
+        if welcome.get("type") != "welcome":
+            raise ConnectionError(welcome.get("error", "Unexpected answer from the hub"))
+        self._acknowledge(welcome["last_seq"])
+        sent = welcome["last_seq"]
+        with self.condition:
+            self.sock = sock
+            self.connected = True
+        self.connections += 1
+        self.last_error = None
+        logger.info("Connected to the hub at {}:{} as {}", self.address[0], self.address[1], self.name)
+        threading.Thread(target=self._read, args=(sock, reader), name="hub-agent-reader", daemon=True).start()
+
+        next_metrics = 0.0
+        next_preview = 0.0
+        sent_frame = None
+        while True:
+            with self.condition:
+                batch = [item for item in self.outbox if item[0] > sent][:BATCH_SIZE]
+                if not batch and self.connected and not self.closed:
+                    self.condition.wait(WAKE_INTERVAL)
+                    batch = [item for item in self.outbox if item[0] > sent][:BATCH_SIZE]
+                if not self.connected or self.closed:
+                    return
+                frame = self.frame if self.preview else None
+            if batch:
+                send_message(sock, {"type": "transitions", "items": [list(item) for item in batch]})
+                sent = batch[-1][0]
+            now = time.monotonic()
+            if now >= next_metrics:
+                send_message(sock, {"type": "metrics", "throughput": scan_throughput.snapshot(),
+                                    "watchdog": scan_supervisor.status()})
+                next_metrics = now + METRICS_INTERVAL
+            if frame is not None and frame is not sent_frame and now >= next_preview:
+                stream = settings_store.snapshot()["stream"]
+                jpeg = encode_jpeg(frame, stream["scale"], stream["quality"])
+                send_message(sock, {"type": "preview", "jpeg": base64.b64encode(jpeg).decode("ascii")})
+                sent_frame = frame
+                next_preview = now + PREVIEW_INTERVAL
+
+    def _read(self, sock, reader):
+        """Handle the hub's acknowledgements and preview requests (reader thread of one connection)"""
+        try:
+            while True:
+                message = reader.read()
+                if message is None:
+                    continue
+                if message.get("type") == "ack":
+                    self._acknowledge(message["last_seq"])
+                elif message.get("type") == "preview":
+                    self._set_preview(bool(message.get("on")))
+                elif message.get("type") == "error":
+                    raise ConnectionError(message.get("error"))
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+        with self.condition:
+            if self.sock is sock:
+                if self.connected and not self.closed:
+                    logger.warning("Hub connection lost: {}", self.last_error)
+                self.connected = False
+                self.condition.notify_all()
+
+    def close(self, timeout=5.0):
+        """Wait up to timeout seconds for the hub to acknowledge every transition, then disconnect"""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while (self.acked < self.seq or self.subscription.status()["queued"]) and time.monotonic() < deadline:
+                self.condition.wait(min(WAKE_INTERVAL, max(0.0, deadline - time.monotonic())))
+            self.closed = True
+            self.condition.notify_all()
+        event_bus.unsubscribe("hub")
+        self._set_preview(False)
+        if self.thread is not None:
+            self.thread.join(timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+
+    def status(self):
+        with self.condition:
+            return {"connected": self.connected, "connections": self.connections, "last_seq": self.seq,
+                    "acked": self.acked, "pending": self.seq - self.acked, "lost": self.lost,
+                    "preview": self.preview, "error": self.last_error}
@@ -0,0 +1,282 @@
+import io
+import os
+import hmac
+import time
+import base64
+import socket
+import datetime
+import threading
+
+from app.config import settings_store, ocr_results, log_dir
+from app.ocr.events import FrameCaptured, RegionTextChanged, CycleCompleted
+from app.ocr.ocr_processor import bump_results_version
+from app.history.history_store import history_store
+from app.hub.protocol import send_message, MessageReader
+from app.utils.event_bus import event_bus
+from app.utils.socket_rooms import socket_rooms, preview_room
+from app.utils.lazy_import import lazy_import
+from app.utils.logger import get_logger
+
+Image = lazy_import("PIL.Image")
+
+# Create a logger for the hub
+logger = get_logger(__name__, os.path.join(log_dir, "hub.log"))
+
+HELLO_TIMEOUT = 10.0  # Seconds a new connection has to say hello
+POLL_INTERVAL = 1.0  # Seconds between preview viewer checks of an idle connection
+
+# Where the hub listens when no token is set: without one any client that reaches the port could
+# inject transitions into the history and the webhooks
+UNAUTHENTICATED_HOST = "127.0.0.1"
+
+# Transitions older than this (backfilled after an outage) are recorded but do not send webhooks
+WEBHOOK_MAX_AGE = 120.0
+
+class AgentState:
+    """What the hub knows about one agent, kept across its reconnects"""
+
+    __slots__ = ("name", "boot", "last_seq", "address", "connection", "connected", "connected_at", "last_seen",
+                 "metrics", "texts", "since", "applied", "duplicates", "late", "gaps", "lag", "max_lag", "preview")
+
+    def __init__(self, name):
+        self.name = name
+        self.boot = None
+        self.last_seq = 0  # Highest transition seq applied from the current boot
+        self.address = None
+        self.connection = None  # Socket of the connection serving the agent
+        self.connected = False
+        self.connected_at = None
+        self.last_seen = None
+        self.metrics = {}
+        self.texts = {}  # region -> current text (None once the agent stopped scanning it)
+        self.since = {}  # region -> timestamp of the last applied transition
+        self.applied = 0
+        self.duplicates = 0
+        self.late = 0
+        self.gaps = 0
+        self.lag = 0.0  # Seconds between the agent detecting a transition and the hub applying it
+        self.max_lag = 0.0
+        self.preview = False
+
+    def status(self):
+        now = time.time()
+        return {
+            "connected": self.connected,
+            "address": self.address,
+            "boot": self.boot,
+            "last_seq": self.last_seq,
+            "connected_for": round(now - self.connected_at, 1) if self.connected and self.connected_at else None,
+            "last_seen_ago": round(now - self.last_seen, 1) if self.last_seen else None,
+            "results": {region: text for region, text in self.texts.items() if text is not None},
+            "applied": self.applied,
+            "duplicates": self.duplicates,
+            "late": self.late,
+            "gaps": self.gaps,
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "preview": self.preview,
+            "metrics": self.metrics,
+        }
+
+class Hub:
+    """
+    Collects the results of scanning agents (python -m app.ocr --agent) into this app.
+
+    Every agent keeps one connection to the hub's port. Its transitions are
+    published as RegionTextChanged events named "<agent>/<region>", so the
+    hub's history store and its single webhook dispatcher handle them like the
+    hub's own regions, and its results appear in ocr_results and on the
+    dashboard as the agent's session. A transition is applied once: the hub
+    skips sequence numbers it already applied and, after a restart of the hub,
+    timestamps its history already holds. Backfilled transitions older than
+    WEBHOOK_MAX_AGE are recorded without notifying. The hub asks an agent for
+    previews while someone previews its session.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.agents = {}  # name -> AgentState
+        self.listener = None
+        self.address = None
+        self.token = ""
+
+    def start(self, address, token=""):
+        """Listen for agents on address ((host, port)) in a background thread; only on this machine without a token"""
+        self.token = token
+        if not token and address[0] != UNAUTHENTICATED_HOST:
+            logger.warning("KEMAC_HUB_TOKEN is not set: the hub only accepts agents from this machine. "
+                           "Set the same KEMAC_HUB_TOKEN on the hub and its agents to accept them from the network.")
+            address = (UNAUTHENTICATED_HOST, address[1])
+        listener = socket.create_server(address)
+        self.address = address
+        # Sockets are handed to their threads as file descriptors: in production mode gevent
+        # binds a socket to the event loop of the thread that created it
+        threading.Thread(target=self._accept, args=(listener.detach(),), name="hub-listener", daemon=True).start()
+        logger.info("Hub listening for agents on {}:{}", address[0], address[1])
+
+    def _accept(self, fileno):
+        self.listener = socket.socket(fileno=fileno)
+        while True:
+            try:
+                conn, peer = self.listener.accept()
+            except OSError as e:
+                logger.error("Hub listener stopped: {}", str(e))
+                return
+            threading.Thread(target=self._serve, args=(conn.detach(), f"{peer[0]}:{peer[1]}"),
+                             name=f"hub-agent-{peer[0]}:{peer[1]}", daemon=True).start()
+
+    def _serve(self, fileno, peer):
+        conn = socket.socket(fileno=fileno)
+        state = None
+        try:
+            conn.settimeout(HELLO_TIMEOUT)
+            reader = MessageReader(conn)
+            hello = reader.read()
+            if hello is None or hello.get("type") != "hello":
+                raise ConnectionError("No hello from the agent")
+            error = self._check_hello(hello)
+            if error:
+                send_message(conn, {"type": "error", "error": error})
+                logger.warning("Rejected agent connection from {}: {}", peer, error)
+                return
+            state = self._attach(hello, conn, peer)
+            send_message(conn, {"type": "welcome", "last_seq": state.last_seq})
+
+            conn.settimeout(POLL_INTERVAL)
+            while state.connection is conn:
+                message = reader.read()
+                if message is not None:
+                    state.last_seen = time.time()
+                    self._handle(state, message, conn)
+                self._sync_preview(state, conn)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Agent connection from {} closed: {}", peer, str(e))
+        finally:
+            conn.close()
+            if state is not None:
+                with self.lock:
+                    if state.connection is conn:
+                        state.connection = None
+                        state.connected = False
+                        state.preview = False
+                logger.info("Agent {} disconnected", state.name)
+
+    def _check_hello(self, hello):
+        name = hello.get("agent")
+        if not isinstance(name, str) or not name or "/" in name:
+            return "The agent name must be a non-empty string without '/'"
+        if not hmac.compare_digest(str(hello.get("token", "")), self.token):
+            return "Invalid token"
+        if not isinstance(hello.get("first_seq"), int) or not isinstance(hello.get("results"), dict):
+            return "Malformed hello"
+        return None
+
+    def _attach(self, hello, conn, peer):
+        """Make conn the agent's connection, and pick up where its previous connection (or boot) stopped"""
+        name = hello["agent"]
+        with self.lock:
+            state = self.agents.get(name)
+            known = state is not None
+            if state is None:
+                state = self.agents[name] = AgentState(name)
+                prefix = name + "/"
+                for row in history_store.regions():
+                    if row["region"].startswith(prefix):
+                        state.since[row["region"][len(prefix):]] = row["since"]
+                        state.texts[row["region"][len(prefix):]] = row["text"]
+            if state.connection is not None:
+                logger.warning("Agent {} reconnected from {}, dropping its connection from {}", name, peer, state.address)
+            new_boot = state.boot is not None and state.boot != hello["boot"]
+            last_seen = state.last_seen
+            if state.boot != hello["boot"]:
+                state.boot = hello["boot"]
+                state.last_seq = 0
+            if known and hello["first_seq"] > state.last_seq + 1:
+                state.gaps += 1
+                logger.warning("Agent {} lost transitions {} to {} before sending them", name,
+                               state.last_seq + 1, hello["first_seq"] - 1)
+            state.connection = conn
+            state.connected = True
+            state.connected_at = state.last_seen = time.time()
+            state.address = peer
+        logger.info("Agent {} connected from {} (boot {}, last seq {})", name, peer, state.boot[:8], state.last_seq)
+
+        settings = settings_store.snapshot()
+        if new_boot:
+            # The previous process ended without saying so: its texts ended when the hub last heard from it
+            self._end_texts(state, last_seen, settings)
+        for region, text in hello["results"].items():
+            ocr_results[f"{name}/{region}"] = text
+        return state
+
+    def _end_texts(self, state, ts, settings):
+        for region, text in list(state.texts.items()):
+            if text is not None and ts > state.since.get(region, 0):
+                self._apply(state, region, None, ts, False, settings)
+
+    def _handle(self, state, message, conn):
+        kind = message.get("type")
+        if kind == "transitions":
+            settings = settings_store.snapshot()
+            applied = 0
+            for seq, region, text, ts, notify in message["items"]:
+                if seq <= state.last_seq:
+                    state.duplicates += 1
+                    continue
+                state.last_seq = seq
+                if ts <= state.since.get(region, 0):
+                    state.duplicates += 1
+                    continue
+                self._apply(state, region, text, ts, notify, settings)
+                applied += 1
+            send_message(conn, {"type": "ack", "last_seq": state.last_seq})
+            if applied:
+                self._publish_cycle(state, settings)
+        elif kind == "metrics":
+            state.metrics = {"throughput": message.get("throughput"), "watchdog": message.get("watchdog")}
+        elif kind == "preview":
+            screenshot = Image.open(io.BytesIO(base64.b64decode(message["jpeg"]))).convert("RGB")
+            event_bus.publish(FrameCaptured(state.name, screenshot))
+            self._publish_cycle(state, settings_store.snapshot())
+
+    def _apply(self, state, region, text, ts, notify, settings):
+        """Apply one new transition of an agent's region"""
+        name = f"{state.name}/{region}"
+        previous = state.texts.get(region)
+        state.texts[region] = text
+        state.since[region] = ts
+        if text is None:
+            ocr_results.pop(name, None)
+        else:
+            ocr_results[name] = text
+        state.lag = max(0.0, time.time() - ts)
+        state.max_lag = max(state.max_lag, state.lag)
+        state.applied += 1
+        fresh = state.lag <= WEBHOOK_MAX_AGE
+        if not fresh:
+            state.late += 1
+        event_bus.publish(RegionTextChanged(name, text, previous, bool(notify) and fresh, settings, ts))
+
+    def _publish_cycle(self, state, settings):
+        bump_results_version()
+        if event_bus.subscribed(CycleCompleted):
+            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            event_bus.publish(CycleCompleted(state.name, dict(ocr_results), timestamp, settings))
+
+    def _sync_preview(self, state, conn):
+        """Ask the agent for previews while its session has viewers, and to stop once it has none"""
+        wanted = socket_rooms.has_members(preview_room(state.name))
+        if wanted != state.preview:
+            state.preview = wanted
+            send_message(conn, {"type": "preview", "on": wanted})
+
+    def status(self):
+        with self.lock:
+            agents = list(self.agents.values())
+        return {
+            "listening": None if self.address is None else f"{self.address[0]}:{self.address[1]}",
+            "agents": {state.name: state.status() for state in agents},
+        }
+
+# Shared hub started by app.py --hub and read by the /agents route
+hub = Hub()
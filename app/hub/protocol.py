@@ -0,0 +1,65 @@
+import json
+import socket
+
+# Wire format between scanning agents (python -m app.ocr --agent) and the hub (python app.py --hub):
+# one TCP connection per agent carrying newline-delimited compact JSON objects, each with a "type".
+#
+# Agent -> hub
+#   hello        {"agent", "boot", "token", "first_seq", "results"}  first message of every connection
+#   transitions  {"items": [[seq, region, text, ts, notify], ...]}   text is null when the agent stopped scanning
+#   metrics      {"throughput", "watchdog"}
+#   preview      {"jpeg": base64}                                     main screen, only while the hub asked for it
+# Hub -> agent
+#   welcome      {"last_seq"}   highest transition seq of this boot the hub already applied
+#   ack          {"last_seq"}   after every transitions message
+#   preview      {"on": bool}   whether the hub has viewers for the agent's screen
+#   error        {"error"}      followed by the end of the connection
+
+DEFAULT_PORT = 5100
+
+# Largest message accepted (a preview JPEG in base64 stays far below it)
+MAX_MESSAGE = 8 * 1024 * 1024
+
+def parse_address(value, default_host):
+    """Split "host:port" (or a bare "port") into a (host, port) tuple"""
+    host, _, port = str(value).rpartition(":")
+    return host or default_host, int(port)
+
+def send_message(sock, message):
+    sock.sendall(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+
+class MessageReader:
+    """Reads the messages of one connection, keeping partial lines between calls"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def read(self):
+        """
+        Return the next message
+
+        Returns:
+            dict: None if the socket timed out before a whole message arrived
+
+        Raises:
+            ConnectionError: the peer closed the connection or sent an oversized message
+        """
+        while True:
+            end = self.buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 1]
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError("Message is not a JSON object")
+                return message
+            if len(self.buffer) > MAX_MESSAGE:
+                raise ConnectionError("Message too large")
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout:
+                return None
+            if not chunk:
+                raise ConnectionError("Connection closed by peer")
+            self.buffer += chunk
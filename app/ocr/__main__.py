@@ -0,0 +1,101 @@
+"""
+Headless scanner: the OCR loop and webhooks without the web app.
+
+Usage (from the repository root):
+    python -m app.ocr [--stats-interval 10] [--duration 0] [--agent HOST:PORT [--name NAME]]
+
+Loads settings/ocr_settings.json (edit it with the web app, or by hand) and
+scans until Ctrl+C, whatever the saved macro status. Nothing web-related is
+imported: there is no Flask app, no Socket.IO server, and nothing subscribes to
+the scan events that only feed web clients (highlighted screenshots, frame
+cache, emits). Results still go to the logs, the history store and the webhooks. Throughput
+is printed every --stats-interval seconds.
+
+With --agent, the results go to a hub (python app.py --hub) instead of the
+webhooks: transitions, metrics and, while someone watches, previews of the
+screen. The token is read from KEMAC_HUB_TOKEN.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+
+from app.config import settings_store, settings_file, log_dir
+from app.ocr import ocr_processor
+from app.ocr.throughput import scan_throughput, ScanThroughput
+from app.ocr.watchdog import scan_supervisor
+from app.ocr.consumers import subscribe_scan_consumers
+from app.hub.agent import HubAgent
+from app.hub.protocol import parse_address, DEFAULT_PORT
+from app.utils.logger import get_logger
+
+# Create a logger for the headless runner
+logger = get_logger("app.ocr.headless", os.path.join(log_dir, "app.log"))
+
+def format_stats(before, after, cpu_seconds):
+    rates = ScanThroughput.rates(before, after)
+    elapsed = max(after["uptime"] - before["uptime"], 1e-9)
+    return (f"{rates['cycles_per_second']:.2f} cycles/s, {rates['regions_per_second']:.1f} regions/s, "
+            f"{rates['scan_ms_per_cycle']:.0f} ms/cycle, CPU {100 * cpu_seconds / elapsed:.0f}%")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.ocr", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between throughput reports")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after this many seconds (0 runs until Ctrl+C)")
+    parser.add_argument("--agent", metavar="HOST:PORT", help="Send the results to this hub instead of the webhooks")
+    parser.add_argument("--name", default=socket.gethostname(), help="Name of this agent on the hub (default: host name)")
+    args = parser.parse_args()
+    if not args.name or "/" in args.name:
+        parser.error("--name must be non-empty and must not contain '/'")
+
+    if os.path.exists(settings_file):
+        try:
+            settings_store.load()
+        except Exception as e:
+            logger.error("Could not load OCR settings, using defaults: {}", str(e))
+    settings = settings_store.snapshot()
+    if not settings["enabled"] or not (settings["regions"] or settings["sessions"]):
+        print(f"OCR is disabled or has no regions in {settings_file}; waiting for the settings to change")
+
+    # Scan regardless of the status file, which belongs to the web app's controls
+    agent = None
+    if args.agent:
+        agent = HubAgent(parse_address(args.agent if ":" in args.agent else f"{args.agent}:{DEFAULT_PORT}", "127.0.0.1"),
+                         args.name, os.environ.get("KEMAC_HUB_TOKEN", ""))
+        agent.start()
+        print(f"Sending results to the hub at {agent.address[0]}:{agent.address[1]} as {args.name}")
+    subscribe_scan_consumers(webhooks=agent is None)
+    ocr_processor.forced_status = "running"
+    scan_supervisor.start(ocr_processor.perform_ocr)
+    print(f"Scanning headless ({len(settings['regions'])} region(s), {len(settings['sessions'])} session(s)); Ctrl+C to stop")
+
+    started = time.monotonic()
+    before, cpu_before = scan_throughput.snapshot(), time.process_time()
+    try:
+        while scan_supervisor.running():
+            remaining = args.duration - (time.monotonic() - started) if args.duration else args.stats_interval
+            scan_supervisor.join(max(0.0, min(args.stats_interval, remaining)))
+            after, cpu_after = scan_throughput.snapshot(), time.process_time()
+            stats = format_stats(before, after, cpu_after - cpu_before)
+            if agent is not None:
+                hub_status = agent.status()
+                stats += f", hub {'connected' if hub_status['connected'] else 'disconnected'} ({hub_status['pending']} pending)"
+            print(stats, flush=True)
+            before, cpu_before = after, cpu_after
+            if args.duration and time.monotonic() - started >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scan_supervisor.stop()
+        scan_supervisor.join(timeout=10)
+        if agent is not None:
+            agent.close()
+    total = scan_throughput.snapshot()
+    print(f"Stopped after {total['cycles']} cycles and {total['regions']} regions")
+
+if __name__ == "__main__":
+    # OCR worker processes re-import this module as __mp_main__ and must not scan
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import threading
+
+# Weight of the newest observation in the moving averages
+EWMA_ALPHA = 0.3
+
+# Assumed outcome of an attempt that has never run, so every attempt gets explored
+PRIOR_SCORE = 50.0
+PRIOR_SECONDS = 0.1
+
+class AttemptStats:
+    """Moving averages of the score and latency of one (method, config) attempt"""
+
+    __slots__ = ("score", "seconds", "runs")
+
+    def __init__(self):
+        self.score = PRIOR_SCORE
+        self.seconds = PRIOR_SECONDS
+        self.runs = 0
+
+    def update(self, score, seconds):
+        if self.runs == 0:
+            self.score, self.seconds = score, seconds
+        else:
+            self.score += EWMA_ALPHA * (score - self.score)
+            self.seconds += EWMA_ALPHA * (seconds - self.seconds)
+        self.runs += 1
+
+    def value_per_second(self):
+        return self.score / max(self.seconds, 1e-3)
+
+class RegionCascadeStats:
+    """Per-region attempt statistics and budget counters"""
+
+    def __init__(self, lock):
+        self.lock = lock  # Shared with the registry so summaries see consistent counters
+        self.attempts = {}  # (method, config) -> AttemptStats
+        self.cycles = 0
+        self.budget_exhausted = 0
+        self.target_hit = 0
+        self.tesseract_calls = 0
+
+    def order(self, methods, configs):
+        """
+        Return (method, config) pairs ordered by expected score per second.
+
+        Ties (e.g. attempts that never ran) keep the profile's order.
+        """
+        pairs = [(method, config) for method in methods for config in configs]
+        missing = [pair for pair in pairs if pair not in self.attempts]
+        if missing:
+            with self.lock:
+                for pair in missing:
+                    self.attempts[pair] = AttemptStats()
+        return sorted(pairs, key=lambda pair: -self.attempts[pair].value_per_second())
+
+    def record(self, method, config, score, seconds):
+        self.attempts[(method, config)].update(score, seconds)
+        self.tesseract_calls += 1
+
+class CascadeStatsRegistry:
+    """Cascade statistics for every region, readable from other threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.regions = {}
+
+    def get(self, region_name):
+        stats = self.regions.get(region_name)
+        if stats is None:
+            with self.lock:
+                stats = self.regions.setdefault(region_name, RegionCascadeStats(self.lock))
+        return stats
+
+    def finish_cycle(self, stats, exhausted, hit):
+        with self.lock:
+            stats.cycles += 1
+            stats.budget_exhausted += exhausted
+            stats.target_hit += hit
+
+    def summary(self):
+        """Return a JSON-friendly copy of the counters for every region"""
+        with self.lock:
+            items = list(self.regions.items())
+            return {
+                name: {
+                    "cycles": stats.cycles,
+                    "budget_exhausted": stats.budget_exhausted,
+                    "budget_exhausted_ratio": stats.budget_exhausted / stats.cycles if stats.cycles else 0.0,
+                    "target_hit": stats.target_hit,
+                    "tesseract_calls": stats.tesseract_calls,
+                    "attempts": [
+                        {"method": method + 1, "config": config, "runs": attempt.runs,
+                         "avg_score": round(attempt.score, 2), "avg_ms": round(attempt.seconds * 1000, 1)}
+                        for (method, config), attempt in list(stats.attempts.items()) if attempt.runs
+                    ],
+                }
+                for name, stats in items
+            }
+
+# Shared registry used by the scan loop and the stats route
+cascade_stats = CascadeStatsRegistry()
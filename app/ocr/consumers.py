@@ -0,0 +1,86 @@
+import os
+import time
+
+from app.config import emit_bridge, log_dir
+from app.ocr.events import FrameCaptured, RegionTextChanged, CycleCompleted, ScanStopped
+from app.ocr.ocr_processor import highlighted_rendition
+from app.ocr.throughput import scan_throughput
+from app.ocr.watchdog import scan_supervisor
+from app.capture.frame_cache import frame_cache
+from app.history.history_store import history_store
+from app.webhook.webhook_handler import send_webhook
+from app.utils.event_bus import event_bus, DROP_OLDEST, DROP_NEWEST
+from app.utils.socket_rooms import socket_rooms, preview_room, PERF_ROOM
+from app.utils.logger import get_logger
+
+# Create a logger for the scan event consumers
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Queue bounds per subscriber. History and webhooks keep a backlog (a dropped
+# event is a lost transition or notification); a full history queue drops new
+# transitions, so the recorded history stays a gapless prefix. The web consumers
+# only need the newest cycle, so older ones are dropped as soon as a newer one is queued.
+HISTORY_QUEUE = 10000
+WEBHOOK_QUEUE = 100
+SOCKETIO_QUEUE = 2
+SCREENSHOT_QUEUE = 4
+
+# Seconds between perf_update emits
+PERF_INTERVAL = 1.0
+last_perf_emit = 0.0  # Monotonic time of the last perf_update (socketio subscriber thread only)
+
+def record_history(event):
+    """Record text transitions, and the end of scanning, in the history store"""
+    if isinstance(event, ScanStopped):
+        history_store.mark_stopped(event.ts, event.regions)
+    else:
+        history_store.record(event.region, event.text, event.ts)
+
+def notify_webhook(event):
+    """Send the webhook for a new text of a notifying region"""
+    webhook = event.settings["webhook"]
+    if not event.notify or not event.text or event.text == "(No text detected)" or not webhook["enabled"] or not webhook["url"]:
+        return
+    if send_webhook(event.region, event.text, event.settings):
+        logger.info("Webhook notification sent for region: {}", event.region)
+
+def emit_results(event):
+    """Send a finished cycle's results to each results room (filtered to its regions), and the perf stats when due"""
+    global last_perf_emit
+    for room, regions in socket_rooms.results_views():
+        results = socket_rooms.filter_results(event.results, regions)
+        if results or regions is None:
+            emit_bridge.emit('ocr_update', {'results': results, 'timestamp': event.timestamp, 'session': event.session},
+                             to=room)
+    
+    if socket_rooms.has_members(PERF_ROOM) and time.monotonic() - last_perf_emit >= PERF_INTERVAL:
+        last_perf_emit = time.monotonic()
+        emit_bridge.emit('perf_update', {'throughput': scan_throughput.snapshot(), 'watchdog': scan_supervisor.status(),
+                                         'events': event_bus.status()}, to=PERF_ROOM)
+
+def publish_screenshots(event):
+    """Put captured frames in the frame cache, and emit the highlighted newest frame after each cycle to its viewers"""
+    if isinstance(event, FrameCaptured):
+        frame_cache.publish(event.screenshot, event.session, event.ts)
+        return
+    
+    # Nobody previews this session: nothing to draw or encode
+    room = preview_room(event.session)
+    if not socket_rooms.has_members(room):
+        return
+    frame = frame_cache.latest(event.session)
+    if frame is None:
+        return
+    _, highlighted_screenshot = highlighted_rendition(frame, event.settings)
+    emit_bridge.emit('screenshot_update', {'screenshot': highlighted_screenshot, 'session': event.session}, to=room)
+
+def subscribe_scan_consumers(webhooks=True):
+    """Consumers every scanner needs, with or without the web app (agents leave the webhooks to their hub)"""
+    event_bus.subscribe("history", (RegionTextChanged, ScanStopped), record_history, HISTORY_QUEUE, DROP_NEWEST)
+    if webhooks:
+        event_bus.subscribe("webhooks", (RegionTextChanged,), notify_webhook, WEBHOOK_QUEUE, DROP_OLDEST)
+
+def subscribe_web_consumers():
+    """Consumers that feed the web clients (after app/web.py attached the Socket.IO server)"""
+    event_bus.subscribe("socketio", (CycleCompleted,), emit_results, SOCKETIO_QUEUE, DROP_OLDEST)
+    event_bus.subscribe("screenshots", (FrameCaptured, CycleCompleted), publish_screenshots, SCREENSHOT_QUEUE, DROP_OLDEST)
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import queue
+import bisect
+import threading
+
+from app.config import settings_dir, log_dir
+from app.utils.logger import get_logger
+
+# Create a logger for the corpus recorder
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Directory that holds recorded corpora, one subdirectory per recording
+CORPUS_DIR = os.path.join(settings_dir, "corpus")
+
+# Cycles waiting to be written; cycles beyond this are dropped rather than slowing down OCR
+RECORDER_QUEUE_SIZE = 32
+
+INDEX_FILE = "index.jsonl"
+LABELS_FILE = "labels.json"
+
+# A corpus directory contains:
+#   index.jsonl  one line per recorded region crop:
+#                {"cycle", "ts", "region", "file", "width", "height", "profile", "live"}
+#                where "live" is the text the app published for the region that cycle
+#   frames/      the crops as PNG files, named <cycle>_<region index>.png
+#   labels.json  ground truth as change points per region: {"Biome": [[ts, "text"], ...]};
+#                a text applies from its timestamp until the next change point ("" for no text).
+#                The recorder writes a draft from the live results to be corrected by hand.
+
+class CorpusRecorder:
+    """
+    Saves the region crops of OCR cycles into a corpus directory for replay.
+
+    `record_cycle` only queues references to the cycle's screenshot; cropping,
+    PNG encoding and the index are handled by a writer thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=RECORDER_QUEUE_SIZE)
+        self.thread = None
+        self.directory = None
+        self.last_directory = None
+        self.min_interval = 0.0
+        self.last_recorded = 0.0
+        self.cycles = 0
+        self.dropped = 0
+        self.labels = {}  # Draft labels built from the live results
+
+    @property
+    def active(self):
+        return self.directory is not None
+
+    def start(self, directory=None, min_interval=1.0):
+        """Start recording into a new corpus directory (a timestamped one under CORPUS_DIR by default)"""
+        with self.lock:
+            if self.active:
+                return self.directory
+            if directory is None:
+                directory = os.path.join(CORPUS_DIR, time.strftime("%Y%m%d-%H%M%S"))
+            os.makedirs(os.path.join(directory, "frames"), exist_ok=True)
+            self.min_interval = min_interval
+            self.last_recorded = 0.0
+            self.cycles = 0
+            self.dropped = 0
+            self.labels = {}
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="corpus-recorder")
+                self.thread.daemon = True
+                self.thread.start()
+            self.directory = directory
+        logger.info("Recording OCR corpus to {}", directory)
+        return directory
+
+    def stop(self):
+        """Stop recording, wait for queued cycles and write the draft labels"""
+        with self.lock:
+            directory = self.directory
+            self.directory = None
+        if directory is None:
+            return None
+        self.queue.join()
+        with open(os.path.join(directory, LABELS_FILE), 'w') as f:
+            json.dump(self.labels, f, indent=4)
+        self.last_directory = directory
+        logger.info("Stopped recording OCR corpus ({} cycles, {} dropped)", self.cycles, self.dropped)
+        return directory
+
+    def status(self):
+        return {"recording": self.active, "directory": self.directory or self.last_directory,
+                "cycles": self.cycles, "dropped": self.dropped}
+
+    def record_cycle(self, screenshot, plans, results, ts=None):
+        """Queue one OCR cycle for recording (called by the OCR loop)"""
+        directory = self.directory
+        if directory is None:
+            return
+        ts = time.time() if ts is None else ts
+        if ts - self.last_recorded < self.min_interval:
+            return
+        self.last_recorded = ts
+        live = {plan.name: results.get(plan.name, "") for plan in plans}
+        try:
+            self.queue.put_nowait((directory, ts, screenshot, plans, live))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            directory, ts, screenshot, plans, live = self.queue.get()
+            try:
+                self._write_cycle(directory, ts, screenshot, plans, live)
+            except Exception as e:
+                logger.error("Failed to record OCR cycle: {}", str(e))
+            finally:
+                self.queue.task_done()
+
+    def _write_cycle(self, directory, ts, screenshot, plans, live):
+        cycle = self.cycles
+        lines = []
+        for index, plan in enumerate(plans):
+            if plan.too_small:
+                continue
+            filename = f"{cycle:06d}_{index}.png"
+            screenshot.crop(plan.box).save(os.path.join(directory, "frames", filename))
+            text = live[plan.name]
+            if text == "(No text detected)":
+                text = ""
+            lines.append(json.dumps({"cycle": cycle, "ts": ts, "region": plan.name, "file": filename,
+                                     "width": plan.width, "height": plan.height,
+                                     "profile": plan.profile, "live": text}))
+            changes = self.labels.setdefault(plan.name, [])
+            if not changes or changes[-1][1] != text:
+                changes.append([ts, text])
+        with open(os.path.join(directory, INDEX_FILE), 'a') as f:
+            f.write("\n".join(lines) + "\n")
+        self.cycles += 1
+
+def load_corpus(directory):
+    """
+    Read a corpus index
+
+    Returns:
+        list: (ts, entries) per cycle in recording order; each entry is an index
+              line with "path" set to the absolute path of its crop
+    """
+    cycles = {}
+    with open(os.path.join(directory, INDEX_FILE), 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry["path"] = os.path.join(directory, "frames", entry["file"])
+            cycles.setdefault(entry["cycle"], (entry["ts"], []))[1].append(entry)
+    return [cycles[cycle] for cycle in sorted(cycles)]
+
+def load_labels(path):
+    """
+    Read a labels file
+
+    Returns:
+        function: label(region, ts) -> expected text, or None if the region is not labelled at ts
+    """
+    with open(path, 'r') as f:
+        raw = json.load(f)
+    changes = {region: sorted((float(ts), text) for ts, text in points) for region, points in raw.items()}
+    times = {region: [ts for ts, _ in points] for region, points in changes.items()}
+
+    def label(region, ts):
+        points = changes.get(region)
+        if not points:
+            return None
+        i = bisect.bisect_right(times[region], ts) - 1
+        return points[i][1] if i >= 0 else None
+
+    return label
+
+# Shared recorder used by the scan loop and the routes
+corpus_recorder = CorpusRecorder()
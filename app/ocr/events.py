@@ -0,0 +1,49 @@
+import time
+
+# Events the scan loop publishes on app.utils.event_bus. They are read by
+# subscriber threads while the loop goes on, so they only carry immutable data
+# (settings snapshots, copies of the results) and frames nobody modifies.
+
+class FrameCaptured:
+    """A frame of the main screen (session None) or of a capture session, before OCR"""
+
+    __slots__ = ("session", "screenshot", "ts")
+
+    def __init__(self, session, screenshot, ts=None):
+        self.session = session
+        self.screenshot = screenshot
+        self.ts = time.time() if ts is None else ts
+
+class RegionTextChanged:
+    """The published text of a region changed (after consensus); text is "(No text detected)" for blank regions"""
+
+    __slots__ = ("region", "text", "previous", "notify", "settings", "ts")
+
+    def __init__(self, region, text, previous, notify, settings, ts=None):
+        self.region = region
+        self.text = text
+        self.previous = previous
+        self.notify = notify  # The region's profile sends webhooks
+        self.settings = settings
+        self.ts = time.time() if ts is None else ts
+
+class CycleCompleted:
+    """A scan cycle of the main screen or of a session finished; results is a copy of every region's result"""
+
+    __slots__ = ("session", "results", "timestamp", "settings", "ts")
+
+    def __init__(self, session, results, timestamp, settings, ts=None):
+        self.session = session
+        self.results = results
+        self.timestamp = timestamp
+        self.settings = settings
+        self.ts = time.time() if ts is None else ts
+
+class ScanStopped:
+    """The scan loop exited; time after it is not attributed to the texts of its regions"""
+
+    __slots__ = ("regions", "ts")
+
+    def __init__(self, regions, ts=None):
+        self.regions = regions  # Regions the loop published texts for
+        self.ts = time.time() if ts is None else ts
@@ -0,0 +1,105 @@
+import threading
+
+from app.utils.lazy_import import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+# White space between tiles so Tesseract never joins words across regions
+MOSAIC_PADDING = 24
+
+# Sparse text mode finds text anywhere in the mosaic without assuming a layout
+MOSAIC_PSM = 11
+
+class MosaicTile:
+    """Position of one region's image inside a mosaic"""
+
+    __slots__ = ("key", "x", "y", "width", "height")
+
+    def __init__(self, key, x, y, width, height):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def contains(self, px, py):
+        return self.x <= px < self.x + self.width and self.y <= py < self.y + self.height
+
+def build_mosaic(images, padding=MOSAIC_PADDING):
+    """
+    Stack images vertically on a white canvas with padding around each tile.
+
+    Args:
+        images (list): (key, PIL.Image) pairs; images are converted to grayscale
+
+    Returns:
+        tuple: (mosaic image, list of MosaicTile in the same order)
+    """
+    width = max(img.width for _, img in images) + 2 * padding
+    height = sum(img.height for _, img in images) + padding * (len(images) + 1)
+    mosaic = Image.new('L', (width, height), 255)
+
+    tiles = []
+    y = padding
+    for key, img in images:
+        mosaic.paste(img.convert('L'), (padding, y))
+        tiles.append(MosaicTile(key, padding, y, img.width, img.height))
+        y += img.height + padding
+    return mosaic, tiles
+
+def split_mosaic_data(data, tiles):
+    """
+    Assign words from image_to_data output back to their tiles by bounding box.
+
+    A word belongs to the tile containing its center; words outside every tile
+    are dropped. Returns {tile key: {"text": [...], "conf": [...]}} with words in
+    Tesseract's reading order.
+    """
+    results = {tile.key: {"text": [], "conf": []} for tile in tiles}
+    for j, word in enumerate(data['text']):
+        if not word or not word.strip():
+            continue
+        cx = data['left'][j] + data['width'][j] / 2
+        cy = data['top'][j] + data['height'][j] / 2
+        for tile in tiles:
+            if tile.contains(cx, cy):
+                results[tile.key]["text"].append(word)
+                results[tile.key]["conf"].append(data['conf'][j])
+                break
+    return results
+
+def mosaic_group_key(plan):
+    """Regions can share a mosaic when they use the same first variant and whitelist"""
+    return plan.methods[0], plan.profile["whitelist"]
+
+def mosaic_config(whitelist):
+    """Tesseract config for a mosaic call"""
+    suffix = f" -c tessedit_char_whitelist={whitelist}" if whitelist else ""
+    return f"--psm {MOSAIC_PSM} --oem 1{suffix}"
+
+class MosaicStats:
+    """Counters for mosaic batching"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0      # Tesseract calls made on mosaics
+        self.regions = 0    # Regions sent through a mosaic
+        self.accepted = 0   # Regions whose mosaic result was good enough to skip the cascade
+
+    def record(self, regions, accepted):
+        with self.lock:
+            self.calls += 1
+            self.regions += regions
+            self.accepted += accepted
+
+    def summary(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "regions": self.regions,
+                "accepted": self.accepted,
+                "accepted_ratio": self.accepted / self.regions if self.regions else 0.0,
+            }
+
+# Shared counters used by the scan loop and the stats route
+mosaic_stats = MosaicStats()
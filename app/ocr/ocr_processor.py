@@ -3,36 +3,71 @@ import io
 import time
 import datetime
 import base64
-import numpy as np
-from PIL import ImageGrab, Image, ImageEnhance, ImageFilter, ImageDraw, ImageOps
-import pytesseract
-import cv2
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import re
 
-from app.config import socketio, ocr_settings, ocr_results, stop_ocr_thread, MIN_OCR_WIDTH, MIN_OCR_HEIGHT, log_dir, status_file, settings_dir
-from app.webhook.webhook_handler import send_webhook
+from app.config import settings_store, ocr_results, MIN_OCR_WIDTH, MIN_OCR_HEIGHT, log_dir, status_file
+from app.ocr.region_plan import get_region_plans
+from app.ocr.cascade import cascade_stats
+from app.ocr.mosaic import build_mosaic, split_mosaic_data, mosaic_group_key, mosaic_config, mosaic_stats
+from app.ocr.temporal import temporal_voters
+from app.ocr.text_detect import find_text_box, worth_cropping, text_detect_stats
+from app.ocr.corpus import corpus_recorder
+from app.ocr.throughput import scan_throughput
+from app.ocr.watchdog import scan_supervisor, cycle_expired, call_timeout
+from app.ocr.profiler import cycle_profiler
+from app.ocr.events import FrameCaptured, RegionTextChanged, CycleCompleted, ScanStopped
+from app.capture.frame_log import frame_log_tap
+from app.capture.frame_cache import frame_cache, IDLE_MAX_AGE, SCAN_MAX_AGE
+from app.capture.area_frame import AreaFrame
+from app.ocr.ocr_workers import WorkerPool
+from app.capture.screen_capture import screen_grabber
+from app.capture.sources import make_source
+from app.ocr.sessions import session_manager, MAIN_SESSION
+from app.utils.event_bus import event_bus
+from app.utils.lazy_import import lazy_import
 from app.utils.logger import get_logger
 
+# Heavy dependencies load on first use, not when the web server starts
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+ImageGrab = lazy_import("PIL.ImageGrab")
+ImageEnhance = lazy_import("PIL.ImageEnhance")
+ImageFilter = lazy_import("PIL.ImageFilter")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageOps = lazy_import("PIL.ImageOps")
+
 # Create a logger for the OCR module
 logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
 
-def preprocess_image_for_ocr(img):
-    """Apply advanced preprocessing to improve OCR accuracy"""
-    # Try multiple preprocessing techniques and combine them
-    methods = []
-    
-    # First convert to numpy array for OpenCV processing if needed
-    np_img = np.array(img)
-    
-    # Method 1: High contrast with adaptive thresholding
+# Last text published per region, so RegionTextChanged only fires on changes (cleared when scanning stops)
+published_text = {}
+
+# Version of ocr_results, bumped when a region's text changes and after every cycle. Highlighted
+# renditions draw ocr_results, so it is part of their cache key and ETag.
+results_version = 0
+_results_version_lock = threading.Lock()
+
+def bump_results_version():
+    """Mark ocr_results as changed, so highlighted renditions drawn before are not reused"""
+    global results_version
+    with _results_version_lock:
+        results_version += 1
+
+def _method_high_contrast(img):
+    """Method 1: High contrast with adaptive thresholding"""
     img1 = img.copy()
     enhancer = ImageEnhance.Contrast(img1)
     img1 = enhancer.enhance(3.0)  # Increased contrast
     img1 = img1.convert('L')  # Convert to grayscale
-    img1 = img1.point(lambda x: 0 if x < 140 else 255, '1')  # Binary threshold
-    methods.append(img1)
-    
-    # Method 2: Sharpening with different threshold and noise reduction
+    return img1.point(lambda x: 0 if x < 140 else 255, '1')  # Binary threshold
+
+def _method_sharpen(img):
+    """Method 2: Sharpening with different threshold and noise reduction"""
     img2 = img.copy()
     img2 = img2.convert('L')  # Convert to grayscale first
     enhancer = ImageEnhance.Sharpness(img2)
@@ -41,10 +76,10 @@ def preprocess_image_for_ocr(img):
     img2 = enhancer.enhance(2.5)  # Also increase contrast
     img2 = img2.filter(ImageFilter.SHARPEN)
     img2 = img2.filter(ImageFilter.MedianFilter(3))  # Remove noise
-    img2 = img2.point(lambda x: 0 if x < 150 else 255, '1')
-    methods.append(img2)
-    
-    # Method 3: Edge enhancement with bilateral filtering (via OpenCV)
+    return img2.point(lambda x: 0 if x < 150 else 255, '1')
+
+def _method_bilateral(img):
+    """Method 3: Edge enhancement with bilateral filtering (via OpenCV)"""
     cv_img = np.array(img.convert('RGB'))
     # Convert BGR to RGB if needed
     if len(cv_img.shape) == 3 and cv_img.shape[2] == 3:
@@ -54,19 +89,19 @@ def preprocess_image_for_ocr(img):
     # Apply adaptive thresholding
     cv_img = cv2.adaptiveThreshold(cv_img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                   cv2.THRESH_BINARY, 11, 2)
-    img3 = Image.fromarray(cv_img)
-    methods.append(img3)
-    
-    # Method 4: Inverted color scheme for light text on dark background
+    return Image.fromarray(cv_img)
+
+def _method_inverted(img):
+    """Method 4: Inverted color scheme for light text on dark background"""
     img4 = img.copy()
     img4 = img4.convert('L')
     enhancer = ImageEnhance.Contrast(img4)
     img4 = enhancer.enhance(2.5)
     img4 = ImageOps.invert(img4)  # Invert colors
-    img4 = img4.point(lambda x: 0 if x < 140 else 255, '1')
-    methods.append(img4)
-    
-    # Method 5: Denoising with morphological operations (via OpenCV)
+    return img4.point(lambda x: 0 if x < 140 else 255, '1')
+
+def _method_otsu(img):
+    """Method 5: Denoising with morphological operations (via OpenCV)"""
     cv_img2 = np.array(img.convert('RGB'))
     if len(cv_img2.shape) == 3 and cv_img2.shape[2] == 3:
         cv_img2 = cv2.cvtColor(cv_img2, cv2.COLOR_RGB2GRAY)
@@ -77,10 +112,10 @@ def preprocess_image_for_ocr(img):
     # Apply morphological operations to clean up
     kernel = np.ones((2, 2), np.uint8)
     cv_img2 = cv2.morphologyEx(cv_img2, cv2.MORPH_OPEN, kernel)
-    img5 = Image.fromarray(cv_img2)
-    methods.append(img5)
-    
-    # Method 6: Color filtering for text enhancement
+    return Image.fromarray(cv_img2)
+
+def _method_color_filter(img):
+    """Method 6: Color filtering for text enhancement"""
     img6 = img.copy()
     # Enhance specific color channels if the image is RGB
     if img6.mode == 'RGB':
@@ -91,13 +126,40 @@ def preprocess_image_for_ocr(img):
         img6 = Image.merge('RGB', (r, g, b))
     img6 = img6.convert('L')
     img6 = img6.filter(ImageFilter.EDGE_ENHANCE_MORE)
-    img6 = img6.point(lambda x: 0 if x < 155 else 255, '1')
-    methods.append(img6)
+    return img6.point(lambda x: 0 if x < 155 else 255, '1')
+
+# Same order as app.ocr.profiles.VARIANTS
+PREPROCESS_METHODS = (
+    _method_high_contrast,
+    _method_sharpen,
+    _method_bilateral,
+    _method_inverted,
+    _method_otsu,
+    _method_color_filter,
+)
+
+def preprocess_image_for_ocr(img, methods=None):
+    """
+    Apply advanced preprocessing to improve OCR accuracy
     
-    return methods
+    Args:
+        img (PIL.Image): The (already upscaled) region image
+        methods (tuple): Indices into PREPROCESS_METHODS to apply; all methods if None
+        
+    Returns:
+        list: One processed image per requested method, in the same order
+    """
+    if methods is None:
+        methods = range(len(PREPROCESS_METHODS))
+    return [PREPROCESS_METHODS[idx](img) for idx in methods]
+
+# Status forced by the headless runner (python -m app.ocr), which has no controls; None follows the status file
+forced_status = None
 
 def get_current_status():
     """Read the current macro status from the status file"""
+    if forced_status is not None:
+        return forced_status
     if os.path.exists(status_file):
         try:
             with open(status_file, 'r') as f:
@@ -173,228 +235,625 @@ def is_valid_text(text, min_confidence=40):
     # Return True if confidence exceeds threshold
     return confidence_score >= min_confidence
 
-def perform_ocr():
-    """Thread function to perform OCR at regular intervals"""
-    global stop_ocr_thread
+def score_ocr_data(data, min_tesseract_conf=30):
+    """
+    Turn Tesseract image_to_data output into (text, confidence_score)
+    
+    Returns:
+        tuple: ("", 0) if no valid text was found
+    """
+    # Get words with their confidences
+    text_candidates = []
+    total_conf = 0
+    valid_words = 0
+    
+    for j in range(len(data['text'])):
+        conf = int(float(data['conf'][j]))
+        word = data['text'][j].strip()
+        
+        # Only include words with decent confidence
+        if conf > min_tesseract_conf and word and len(word) > 1:
+            text_candidates.append(word)
+            total_conf += conf
+            valid_words += 1
+    
+    if valid_words == 0:
+        return "", 0
+    
+    text = " ".join(text_candidates)
+    avg_conf = total_conf / valid_words
+    
+    # Skip if text doesn't pass our validity check
+    if not text or not is_valid_text(text):
+        return "", 0
+    
+    # Calculate a more sophisticated confidence score
+    return text, avg_conf * len(text) / 10
+
+def tesseract_data(image, config):
+    """
+    pytesseract.image_to_data as a dict, bounded by the watchdog's call timeout
+    
+    A Tesseract process that runs past the timeout is killed and the call
+    raises RuntimeError, which the callers handle like any failed attempt.
+    """
+    try:
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT,
+                                         timeout=call_timeout())
+    except RuntimeError as e:
+        if "timeout" in str(e).lower():
+            scan_supervisor.record_timeout()
+        raise
+
+def run_ocr_cascade(plan, region_img):
+    """
+    Run the plan's preprocessing methods and Tesseract configs on an upscaled region image
+    
+    Attempts are ordered by their expected score per second (learned per region)
+    and the cascade stops as soon as the region's time budget is spent or a
+    result reaches the profile's target confidence. Consensus regions also stop
+    after their per-frame attempt limit; the voter makes up for it across frames.
+    
+    Returns:
+        tuple: (best_text, best_method, best_config, best_confidence); best_text is "" if nothing valid was found
+    """
+    started = time.perf_counter()
+    deadline = started + plan.time_budget if plan.time_budget > 0 else None
+    stats = cascade_stats.get(plan.name)
+    processed_imgs = {}  # Preprocessed images, computed on first use per method
+    
+    # Find the best OCR result
+    best_text = ""
+    best_config = ""
+    best_method = 0
+    best_confidence = 0
+    exhausted = False
+    hit = False
     
+    for attempt, (method, config) in enumerate(stats.order(plan.methods, plan.configs)):
+        # Stop once the time budget is spent, or the whole cycle is out of time
+        if (deadline is not None and time.perf_counter() >= deadline) or cycle_expired():
+            exhausted = True
+            break
+        
+        # Stop once the per-frame attempt limit is reached
+        if plan.frame_attempts and attempt >= plan.frame_attempts:
+            break
+        
+        attempt_started = time.perf_counter()
+        score = 0
+        try:
+            processed_img = processed_imgs.get(method)
+            if processed_img is None:
+                processed_img = processed_imgs[method] = PREPROCESS_METHODS[method](region_img)
+            
+            # Use image_to_data to get confidence scores
+            data = tesseract_data(processed_img, config)
+            text, score = score_ocr_data(data)
+            
+            # Check if this text is better than what we have
+            if text and score > best_confidence:
+                best_text = text
+                best_config = config
+                best_method = method + 1
+                best_confidence = score
+        except Exception as e:
+            logger.error("Error with OCR config {} on method {}: {}", config, method + 1, str(e))
+        finally:
+            stats.record(method, config, score, time.perf_counter() - attempt_started)
+        
+        # Early exit if we found a high confidence result
+        if best_confidence >= plan.target_confidence and len(best_text) > 3:
+            hit = True
+            break
+    
+    cascade_stats.finish_cycle(stats, exhausted, hit)
+    
+    # Save debug images only for regions that ask for them
+    if plan.save_debug:
+        for method, processed_img in processed_imgs.items():
+            processed_img.save(plan.method_debug_paths[plan.methods.index(method)])
+    
+    return best_text, best_method, best_config, best_confidence
+
+def run_mosaic_batches(prepared):
+    """
+    OCR compatible regions together, one Tesseract call per group of regions
+    
+    Args:
+        prepared (list): (plan, upscaled region image) pairs whose profile allows mosaics
+        
+    Returns:
+        dict: region name -> cascade-style result for regions whose mosaic result reached
+              their target confidence; other regions still need run_ocr_cascade
+    """
+    groups = {}
+    for plan, region_img in prepared:
+        groups.setdefault(mosaic_group_key(plan), []).append((plan, region_img))
+    
+    accepted = {}
+    for (method, whitelist), members in groups.items():
+        # A single region gains nothing from a mosaic
+        if len(members) < 2 or cycle_expired():
+            continue
+        
+        config = mosaic_config(whitelist)
+        try:
+            mosaic, tiles = build_mosaic([(plan.name, PREPROCESS_METHODS[method](region_img))
+                                          for plan, region_img in members])
+            data = tesseract_data(mosaic, config)
+        except Exception as e:
+            logger.error("Error with mosaic OCR for {} region(s): {}", len(members), str(e))
+            continue
+        
+        words = split_mosaic_data(data, tiles)
+        group_accepted = 0
+        for plan, _ in members:
+            text, score = score_ocr_data(words[plan.name])
+            if text and score >= plan.target_confidence and len(text) > 3:
+                accepted[plan.name] = (text, method + 1, config, score)
+                group_accepted += 1
+        mosaic_stats.record(len(members), group_accepted)
+    
+    return accepted
+
+def prepare_region(plan, screenshot):
+    """
+    Crop and upscale a region for OCR
+    
+    Returns:
+        PIL.Image: The upscaled region image, or None if the region was resolved without OCR
+    """
+    # Skip extremely small regions
+    if plan.too_small:
+        record_too_small(plan)
+        return None
+    
+    # Crop the screenshot to the region
+    region_img = screenshot.crop(plan.box)
+    
+    # Only save debug images for regions that ask for them (to reduce disk I/O)
+    if plan.save_debug:
+        os.makedirs(os.path.dirname(plan.original_debug_path), exist_ok=True)
+        region_img.save(plan.original_debug_path)
+    
+    upscaled = upscale_region(plan, region_img)
+    if upscaled is None:
+        record_blank_region(plan)
+    return upscaled
+
+def upscale_region(plan, region_img):
+    """
+    Upscale a cropped region for OCR
+    
+    Returns:
+        PIL.Image: The upscaled image, or None if the region is too plain to contain text
+    """
+    # Check if the image has enough contrast/detail to contain text
+    img_array = np.array(region_img.convert('L'))
+    std_dev = np.std(img_array)
+    if std_dev < 10:  # Very low variance suggests a plain/empty region
+        logger.debug("Region '{}' has very low variance (std_dev={:.2f}), likely no text.", plan.name, std_dev)
+        return None
+    
+    # Look for text-like strokes and keep only the part of the region that has them
+    resize = plan.resize
+    if plan.profile["text_detect"]:
+        box = find_text_box(img_array)
+        if box is None:
+            logger.debug("Region '{}' has no text-like strokes, skipping OCR.", plan.name)
+            text_detect_stats.record(plan.name, img_array.size, 0)
+            return None
+        if worth_cropping(box, region_img.width, region_img.height):
+            scale_x = plan.resize[0] / plan.width
+            scale_y = plan.resize[1] / plan.height
+            region_img = region_img.crop(box)
+            resize = (max(1, int(region_img.width * scale_x)), max(1, int(region_img.height * scale_y)))
+        text_detect_stats.record(plan.name, img_array.size, region_img.width * region_img.height)
+    
+    # Use LANCZOS resampling for better quality
+    return region_img.resize(resize, Image.LANCZOS)
+
+def record_too_small(plan):
+    """Store the result of a region too small for OCR"""
+    logger.warning("Region '{}' is too small ({}x{}), minimum size is {}x{}. Skipping.", 
+                 plan.name, plan.width, plan.height, MIN_OCR_WIDTH, MIN_OCR_HEIGHT)
+    ocr_results[plan.name] = f"Region too small for OCR ({plan.width}x{plan.height})"
+
+def record_blank_region(plan):
+    """Store the result of a region without any text"""
+    if apply_consensus(plan, "", 0) is not None:
+        publish_text(plan, "(No text detected)", settings_store.snapshot())
+
+def publish_text(plan, text, settings):
+    """Store a region's result, and publish RegionTextChanged (for history and webhooks) when it changed"""
+    if ocr_results.get(plan.name) != text:
+        ocr_results[plan.name] = text
+        bump_results_version()
+    previous = published_text.get(plan.name)
+    if text != previous:
+        published_text[plan.name] = text
+        event_bus.publish(RegionTextChanged(plan.name, text, previous, plan.notify, settings))
+
+def apply_consensus(plan, text, confidence):
+    """
+    Pass a frame's result through the region's temporal voter
+    
+    Returns:
+        str: The text to publish, or None to keep the region's current result
+    """
+    if plan.temporal is None:
+        return text
+    return temporal_voters.get(plan).add(text, confidence)
+
+def finish_region(plan, result, settings):
+    """Log, store and dispatch a region's OCR result"""
+    region_name = plan.name
+    best_text, best_method, best_config, best_confidence = result
+    
+    # Only log detailed info for verbose regions to reduce console output
+    if plan.verbose or best_text:
+        logger.info("OCR Result for {} ({}x{}):", region_name, plan.width, plan.height)
+        logger.info("Best method: {}, Config: {}", best_method, best_config)
+        logger.info("Confidence: {:.1f}", best_confidence)
+        logger.info("Text: {}", best_text or "(No text detected)")
+        logger.info("-" * 40)
+    
+    # Consensus regions only publish a text once enough frames agree on it
+    best_text = apply_consensus(plan, best_text, best_confidence)
+    if best_text is None:
+        return
+    if plan.temporal is not None:
+        logger.info("Consensus for {}: {}", region_name, best_text or "(No text detected)")
+    
+    # If no valid text was detected, report it
+    if not best_text:
+        best_text = "(No text detected)"
+    
+    # Save result; the history and webhook subscribers pick up changes
+    publish_text(plan, best_text.strip(), settings)
+
+def record_region_error(region_name, error):
+    """Log a region processing error and store it as the region's result"""
+    error_msg = f"Error processing region {region_name}: {str(error)}"
+    logger.error(error_msg)
+    # Store the error in results
+    ocr_results[region_name] = f"Error: {str(error)}"
+
+def scan_frame(plans, screenshot, settings):
+    """OCR every region of a captured frame and store, record and dispatch the results"""
+    # A loop the watchdog replaced while it was wedged (e.g. in the capture) leaves the frame to its successor
+    if not scan_supervisor.is_current():
+        return
+    started = time.perf_counter()
+    # Crop and upscale every region that needs OCR
+    prepared = []
+    for plan in plans:
+        try:
+            region_img = prepare_region(plan, screenshot)
+            if region_img is not None:
+                prepared.append((plan, region_img))
+        except Exception as e:
+            record_region_error(plan.name, e)
+    
+    # Batch compatible regions into shared Tesseract calls first
+    mosaic_results = run_mosaic_batches([(plan, region_img) for plan, region_img in prepared
+                                         if plan.profile["mosaic"]])
+    
+    # Run the per-region cascade for everything else
+    for index, (plan, region_img) in enumerate(prepared):
+        # Past the cycle deadline the remaining regions keep their previous results
+        if cycle_expired():
+            logger.warning("Cycle deadline exceeded, skipped {} region(s)", len(prepared) - index)
+            break
+        if not scan_supervisor.is_current():
+            logger.warning("Replaced scan loop dropped the results of {} region(s)", len(prepared) - index)
+            break
+        try:
+            result = mosaic_results.get(plan.name)
+            if result is None:
+                result = run_ocr_cascade(plan, region_img)
+            finish_region(plan, result, settings)
+        except Exception as e:
+            record_region_error(plan.name, e)
+    
+    scan_throughput.record(len(plans), time.perf_counter() - started)
+
+def capture_main_screen(settings):
+    """
+    Capture the main screen, or replay the frame log instead, and record the frame when asked
+    
+    Returns:
+        tuple: (screenshot, region plans), or None if there is nothing to replay
+    """
+    frame_log = settings["frame_log"]
+    if frame_log["replay"]:
+        # Replay recorded frames instead of capturing the screen
+        screenshot = frame_log_tap.next_frame()
+        if screenshot is None:
+            logger.warning("Frame log replay is enabled but the frame log is empty")
+            return None
+    else:
+        # Take a screenshot (only the regions' area with the X11 backend)
+        screenshot = screen_grabber.grab(settings)
+    event_bus.publish(FrameCaptured(MAIN_SESSION, screenshot))
+    
+    # Region plans are rebuilt only when the settings or screen size change
+    plans = get_region_plans(settings, screenshot.size)
+    
+    # Append the frame to the frame log when recording
+    if frame_log["record"] and not frame_log["replay"]:
+        frame_log_tap.record(screenshot, plans, frame_log)
+    return screenshot, plans
+
+def publish_cycle(settings, session=MAIN_SESSION):
+    """Publish CycleCompleted for the web clients (results and highlighted screenshot)"""
+    # Log timestamp
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    logger.info("OCR scan {}completed at {}", f"of session {session} " if session else "", timestamp)
+    logger.info("=" * 60)
+    
+    # Errors and other results stored without publish_text also reach the highlighted renditions
+    bump_results_version()
+    
+    # Without web clients (headless runs) nobody subscribes, and the results are not copied
+    if event_bus.subscribed(CycleCompleted):
+        event_bus.publish(CycleCompleted(session, dict(ocr_results), timestamp, settings))
+
+def perform_ocr():
+    """Thread function to perform OCR at regular intervals (run by scan_supervisor)"""
     logger.info("OCR thread started - waiting for processing tasks")
     
-    while get_current_status() == "running" and not stop_ocr_thread:
+    while get_current_status() == "running" and scan_supervisor.keep_running():
+        scan_supervisor.beat()
+        
+        # Use one consistent settings snapshot for the whole cycle
+        settings = settings_store.snapshot()
+        
+        # Capture sessions (other monitors, windows or replays) share a pool of scan threads
+        if settings["sessions"]:
+            try:
+                run_sessions(settings["session_workers"])
+            except Exception as e:
+                logger.error("Session scheduler error: {}", str(e))
+                time.sleep(1)
+            continue
+        
         # Check if OCR is enabled and regions are defined
-        if not ocr_settings["enabled"]:
+        if not settings["enabled"]:
             # OCR is disabled but thread is running, just wait a very short time instead of full second
             time.sleep(0.1)
             continue
             
-        if not ocr_settings["regions"]:
+        if not settings["regions"]:
             # No regions defined, just wait a very short time
             time.sleep(0.1)
             continue
             
+        # Hand the work to a capture process and OCR worker processes when configured
+        if settings["ocr_workers"]:
+            try:
+                run_worker_pool(settings["ocr_workers"])
+            except Exception as e:
+                logger.error("OCR worker pool error: {}", str(e))
+                time.sleep(1)
+            continue
+            
         try:
-            # Take a screenshot
-            screenshot = ImageGrab.grab()
+            # Capture and OCR run under the watchdog's cycle deadline (and cProfile when asked)
+            with scan_supervisor.cycle(MAIN_SESSION, settings["watchdog"]), cycle_profiler.cycle(MAIN_SESSION):
+                captured = capture_main_screen(settings)
+                if captured is not None:
+                    screenshot, plans = captured
+                    scan_frame(plans, screenshot, settings)
+            if captured is None:
+                time.sleep(1)
+                continue
+            
+            # A loop the watchdog replaced while it was wedged leaves the results to its successor
+            if not scan_supervisor.is_current():
+                break
+            
+            # Save the cycle's crops when a corpus recording is running
+            corpus_recorder.record_cycle(screenshot, plans, ocr_results)
+            
+            publish_cycle(settings)
+            
+        except Exception as e:
+            logger.error("OCR processing error: {}", str(e))
+    
+    # A loop replaced by the watchdog leaves the history to its successor
+    if not scan_supervisor.is_current():
+        logger.warning("Abandoned OCR thread exited")
+        return
+    
+    # Time after the loop exits is not attributed to any detected text
+    event_bus.publish(ScanStopped(list(published_text)))
+    published_text.clear()
+    logger.info("OCR thread stopped")
+
+def run_session_cycle(session, settings):
+    """Capture and scan one frame of a session (MAIN_SESSION for the main screen)"""
+    started = time.perf_counter()
+    screenshot = None
+    error = None
+    try:
+        with scan_supervisor.cycle(session, settings["watchdog"]), cycle_profiler.cycle(session):
+            if session is MAIN_SESSION:
+                captured = capture_main_screen(settings)
+                if captured is None:
+                    raise ValueError("Frame log replay is enabled but the frame log is empty")
+                screenshot, plans = captured
+            else:
+                screenshot = session_manager.source(settings, session, make_source).grab()
+                event_bus.publish(FrameCaptured(session, screenshot))
+                plans = get_region_plans(settings, screenshot.size, session)
+            scan_frame(plans, screenshot, settings)
+    except Exception as e:
+        error = str(e)
+        logger.error("Error scanning session {}: {}", session or "(main screen)", error)
+    finally:
+        session_manager.finish_cycle(session, time.perf_counter() - started, error)
+    
+    if screenshot is not None and scan_supervisor.is_current():
+        publish_cycle(settings, session)
+
+def run_sessions(count):
+    """
+    Scan the main screen and every running capture session on `count` shared threads
+    
+    Each session scans one frame at a time; the scheduler hands free threads to
+    the session that used the least scanning time so far. Tesseract runs in its
+    own processes, so the threads overlap OCR of different sessions. Returns when
+    scanning stops, the last session is removed or the thread count changes.
+    """
+    count = max(1, count)
+    # The pool threads belong to this scan loop: once it is replaced they stop publishing results
+    executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="ocr-session",
+                                  initializer=scan_supervisor.adopt, initargs=(scan_supervisor.thread_generation(),))
+    running = {}  # session name -> future of its current cycle
+    logger.info("Scanning capture sessions on {} thread(s)", count)
+    try:
+        while get_current_status() == "running" and scan_supervisor.keep_running():
+            scan_supervisor.beat()
+            settings = settings_store.snapshot()
+            if not settings["sessions"] or settings["session_workers"] != count:
+                break
+            
+            for session, future in list(running.items()):
+                if future.done():
+                    del running[session]
+            
+            session_manager.retain(settings)
+            runnable = session_manager.runnable(settings)
+            session_manager.scheduler.retain(runnable)
             
-            # Get screen dimensions
-            screen_width, screen_height = screenshot.size
+            # Fill the free threads, fairest session first
+            while len(running) < count:
+                candidates = [name for name in runnable if name not in running]
+                if not candidates:
+                    break
+                session = session_manager.scheduler.pick(candidates)
+                running[session] = executor.submit(run_session_cycle, session, settings)
             
-            # Process each region
-            for i, region in enumerate(ocr_settings["regions"]):
+            if running:
+                wait(list(running.values()), timeout=0.5, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(0.1)
+    finally:
+        executor.shutdown(wait=True)
+
+def run_worker_pool(count):
+    """
+    Scan with a capture process and `count` OCR worker processes
+    
+    Frames go through shared memory; this thread only applies the workers'
+    results (consensus, history, webhooks, updates) and draws the highlighted
+    screenshot. Returns when scanning stops or the OCR settings change in a way
+    that needs a different pool.
+    """
+    screen_size = ImageGrab.grab().size
+    pool = WorkerPool(count, screen_size, settings_store.snapshot()["capture"]["backend"])
+    pool.start()
+    
+    version = None
+    plans_by_name = {}
+    held_frame = None  # (slot, seq) of the newest frame, kept for the highlighted screenshot
+    published_seq = 0
+    try:
+        while get_current_status() == "running" and scan_supervisor.keep_running():
+            scan_supervisor.beat()
+            settings = settings_store.snapshot()
+            if settings["ocr_workers"] != count or not settings["enabled"] or not settings["regions"]:
+                break
+            
+            # Send new region plans to the workers when the settings change
+            if settings.version != version:
+                version = settings.version
+                plans = get_region_plans(settings, screen_size)
+                plans_by_name = {plan.name: plan for plan in plans}
+                for plan in plans:
+                    if plan.too_small:
+                        record_too_small(plan)
+                pool.assign([plan for plan in plans if not plan.too_small], dict(settings["watchdog"]))
+            
+            # Replace workers stuck on one frame beyond what the call timeouts allow
+            for worker_id in pool.stalled(settings["watchdog"]["stall_after"]):
+                logger.error("OCR worker {} is stuck, replacing it", worker_id + 1)
+                pool.replace(worker_id)
+                scan_supervisor.record_worker_replaced()
+            
+            # Hold only the newest frame
+            for notice in pool.frame_notices():
+                if held_frame is not None:
+                    pool.ack(*held_frame)
+                held_frame = notice
+            
+            try:
+                _, seq, outcome = pool.results.get(timeout=0.5)
+            except queue.Empty:
+                if not pool.alive():
+                    logger.error("An OCR process exited unexpectedly, restarting the pool")
+                    break
+                continue
+            
+            # A loop the watchdog replaced while it was wedged leaves the results to its successor
+            if not scan_supervisor.is_current():
+                break
+            
+            for region_name, (kind, value) in outcome.items():
+                plan = plans_by_name.get(region_name)
+                if plan is None:
+                    continue  # Result for a region that was removed or renamed
                 try:
-                    # Get region name
-                    region_name = region.get("name", f"Region {i+1}")
-                    
-                    # Ensure coordinates are within screen boundaries
-                    x1 = max(0, min(region["x1"], screen_width - 1))
-                    y1 = max(0, min(region["y1"], screen_height - 1))
-                    x2 = max(x1 + 1, min(region["x2"], screen_width))
-                    y2 = max(y1 + 1, min(region["y2"], screenshot.height))
-                    
-                    # Calculate dimensions
-                    width = x2 - x1
-                    height = y2 - y1
-                    
-                    # Skip extremely small regions
-                    if width < MIN_OCR_WIDTH or height < MIN_OCR_HEIGHT:
-                        logger.warning("Region '{}' is too small ({}x{}), minimum size is {}x{}. Skipping.", 
-                                     region_name, width, height, MIN_OCR_WIDTH, MIN_OCR_HEIGHT)
-                        ocr_results[region_name] = f"Region too small for OCR ({width}x{height})"
-                        continue
-                    
-                    # Crop the screenshot to the region
-                    region_img = screenshot.crop((x1, y1, x2, y2))
-                    
-                    # Only save debug images if the region name contains "biome" (to reduce disk I/O)
-                    save_debug = "biome" in region_name.lower()
-                    if save_debug:
-                        debug_dir = os.path.join(settings_dir, "debug")
-                        os.makedirs(debug_dir, exist_ok=True)
-                        original_debug = os.path.join(debug_dir, f"{region_name}_original.png")
-                        region_img.save(original_debug)
-                    
-                    # Check if the image has enough contrast/detail to contain text
-                    img_array = np.array(region_img.convert('L'))
-                    std_dev = np.std(img_array)
-                    if std_dev < 10:  # Very low variance suggests a plain/empty region
-                        logger.debug("Region '{}' has very low variance (std_dev={:.2f}), likely no text.", region_name, std_dev)
-                        ocr_results[region_name] = "(No text detected)"
-                        continue
-                    
-                    # Scale factor optimization - use smaller scale factors for better performance
-                    if width < 100 or height < 30:
-                        scale_factor = 3  # Reduced from 4 for better performance
-                    else:
-                        scale_factor = 1.5  # Reduced from 2 for better performance
-                    
-                    # Use LANCZOS resampling for better quality
-                    region_img = region_img.resize((int(width * scale_factor), int(height * scale_factor)), Image.LANCZOS)
-                    
-                    # Apply preprocessing methods - use fewer methods for better performance
-                    if "biome" in region_name.lower():
-                        # Use all methods for important regions
-                        processed_imgs = preprocess_image_for_ocr(region_img)
+                    if kind == "blank":
+                        record_blank_region(plan)
+                    elif kind == "error":
+                        record_region_error(region_name, value)
                     else:
-                        # Use fewer methods for less important regions
-                        processed_imgs = [preprocess_image_for_ocr(region_img)[0], 
-                                          preprocess_image_for_ocr(region_img)[3]]
-                    
-                    # Save debug images only for biome regions
-                    if save_debug:
-                        for idx, processed_img in enumerate(processed_imgs):
-                            debug_file = os.path.join(debug_dir, f"{region_name}_method{idx+1}.png")
-                            processed_img.save(debug_file)
-                    
-                    # Use fewer OCR configurations for better performance
-                    ocr_configs = [
-                        '--psm 7 --oem 1',  # Single line of text with LSTM engine (most common)
-                        '--psm 6 --oem 1',  # Assume a single uniform block of text with LSTM engine
-                    ]
-                    
-                    # For biome regions, use more configurations for better accuracy
-                    if "biome" in region_name.lower():
-                        ocr_configs.extend([
-                            '--psm 8 --oem 1',  # Single word with LSTM engine
-                            '--psm 3 --oem 1 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,-:;(){}[]<>!@#$%^&*+=/\\|"\'?_ '
-                        ])
-                    
-                    # Find the best OCR result
-                    best_text = ""
-                    best_config = ""
-                    best_method = 0
-                    best_confidence = 0
-                    min_tesseract_conf = 30
-                    
-                    for idx, processed_img in enumerate(processed_imgs):
-                        for config in ocr_configs:
-                            try:
-                                # Use image_to_data to get confidence scores
-                                data = pytesseract.image_to_data(processed_img, config=config, output_type=pytesseract.Output.DICT)
-                                
-                                # Get words with their confidences
-                                text_candidates = []
-                                total_conf = 0
-                                valid_words = 0
-                                
-                                for j in range(len(data['text'])):
-                                    conf = int(data['conf'][j])
-                                    word = data['text'][j].strip()
-                                    
-                                    # Only include words with decent confidence
-                                    if conf > min_tesseract_conf and word and len(word) > 1:
-                                        text_candidates.append(word)
-                                        total_conf += conf
-                                        valid_words += 1
-                                
-                                if valid_words > 0:
-                                    text = " ".join(text_candidates)
-                                    avg_conf = total_conf / valid_words if valid_words > 0 else 0
-                                    
-                                    # Skip empty results
-                                    if not text:
-                                        continue
-                                    
-                                    # Skip if text doesn't pass our validity check
-                                    if not is_valid_text(text):
-                                        continue
-                                    
-                                    # Calculate a more sophisticated confidence score
-                                    confidence_score = avg_conf * len(text) / 10
-                                    
-                                    # Check if this text is better than what we have
-                                    if confidence_score > best_confidence:
-                                        best_text = text
-                                        best_config = config
-                                        best_method = idx + 1
-                                        best_confidence = confidence_score
-                                        
-                                        # Early exit if we found a high confidence result
-                                        if confidence_score > 80 and len(text) > 3:
-                                            break
-                            except Exception as e:
-                                logger.error("Error with OCR config {} on method {}: {}", config, idx+1, str(e))
-                                continue
-                        
-                        # Early exit if we found a good result after trying the first method
-                        if best_confidence > 80 and len(best_text) > 3:
-                            break
-                    
-                    # If no valid text was detected, report it
-                    if not best_text:
-                        best_text = "(No text detected)"
-                    
-                    # Only log detailed info for biome regions to reduce console output
-                    if "biome" in region_name.lower() or best_text != "(No text detected)":
-                        logger.info("OCR Result for {} ({}x{}):", region_name, width, height)
-                        logger.info("Best method: {}, Config: {}", best_method, best_config)
-                        logger.info("Confidence: {:.1f}", best_confidence)
-                        logger.info("Text: {}", best_text)
-                        logger.info("-" * 40)
-                    
-                    # Save result
-                    ocr_results[region_name] = best_text.strip()
-                    
-                    # Send webhook for biome regions
-                    if "biome" in region_name.lower() and best_text != "(No text detected)" and ocr_settings["webhook"]["enabled"] and ocr_settings["webhook"]["url"]:
-                        webhook_sent = send_webhook(region_name, best_text.strip())
-                        if webhook_sent:
-                            logger.info("Webhook notification sent for biome region: {}", region_name)
-                    
+                        finish_region(plan, value, settings)
                 except Exception as e:
-                    error_msg = f"Error processing region {region_name}: {str(e)}"
-                    logger.error(error_msg)
-                    # Store the error in results
-                    ocr_results[region_name] = f"Error: {str(e)}"
+                    record_region_error(region_name, e)
+            
+            scan_throughput.record(len(outcome))
             
             # Log timestamp
             timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            logger.info("OCR scan completed at {}", timestamp)
-            logger.info("=" * 60)
-            
-            # Emit OCR results via WebSockets
-            socketio.emit('ocr_update', {'results': ocr_results, 'timestamp': timestamp})
+            logger.info("OCR results for frame {} applied at {}", seq, timestamp)
             
-            # Generate and emit highlighted screenshot
-            try:
-                highlighted_screenshot = generate_highlighted_screenshot(screenshot)
-                socketio.emit('screenshot_update', {'screenshot': highlighted_screenshot})
-            except Exception as e:
-                logger.error("Error generating highlighted screenshot: {}", str(e))
+            # Publish the newest frame once, copied out of the ring (only when someone subscribes)
+            if held_frame is not None and held_frame[1] > published_seq and event_bus.subscribed(FrameCaptured):
+                try:
+                    frame = pool.ring.frame(*held_frame)
+                    if frame is not None:
+                        screenshot = Image.fromarray(frame)
+                        frame = None  # Views must be gone before the ring is closed
+                        event_bus.publish(FrameCaptured(MAIN_SESSION, screenshot))
+                except Exception as e:
+                    logger.error("Error copying the captured frame: {}", str(e))
+                published_seq = held_frame[1]
+                pool.ack(*held_frame)
+                held_frame = None
             
-        except Exception as e:
-            logger.error("OCR processing error: {}", str(e))
+            # Publish the results for the web clients
+            bump_results_version()
+            if event_bus.subscribed(CycleCompleted):
+                event_bus.publish(CycleCompleted(MAIN_SESSION, dict(ocr_results), timestamp, settings))
+    finally:
+        pool.stop()
 
-def generate_highlighted_screenshot(screenshot):
-    """Generate a screenshot with OCR regions highlighted"""
+def generate_highlighted_screenshot(screenshot, settings=None, session=MAIN_SESSION):
+    """Generate a screenshot with the OCR regions of the main screen or of a session highlighted"""
+    if settings is None:
+        settings = settings_store.snapshot()
+    
     highlight_img = screenshot.copy()
     draw = ImageDraw.Draw(highlight_img, "RGBA")
     
     # Draw rectangles for each region with labels
-    for i, region in enumerate(ocr_settings["regions"]):
-        region_name = region.get("name", f"Region {i+1}")
-        x1 = max(0, min(region["x1"], screenshot.width - 1))
-        y1 = max(0, min(region["y1"], screenshot.height - 1))
-        x2 = max(x1 + 1, min(region["x2"], screenshot.width))
-        y2 = max(y1 + 1, min(region["y2"], screenshot.height))
+    for plan in get_region_plans(settings, screenshot.size, session):
+        region_name = plan.label
+        x1, y1, x2, y2 = plan.box
         
         # Draw rectangle with semi-transparent fill
         draw.rectangle([x1, y1, x2, y2], 
@@ -409,8 +868,8 @@ def generate_highlighted_screenshot(screenshot):
         draw.text((x1+2, y1-18), region_name, fill=(255, 255, 255))
         
         # Draw OCR result if available
-        if region_name in ocr_results:
-            result_text = ocr_results[region_name]
+        if plan.name in ocr_results:
+            result_text = ocr_results[plan.name]
             if not result_text.startswith("Error") and not result_text.startswith("Region too small"):
                 # Truncate if too long
                 if len(result_text) > 30:
@@ -422,10 +881,46 @@ def generate_highlighted_screenshot(screenshot):
                               fill=(0, 0, 128, 200))
                 draw.text((x1+2, y2+4), result_text, fill=(255, 255, 255))
     
-    # Convert the image to bytes
+    return encode_png(highlight_img)
+
+def encode_png(image):
+    """Encode an image as base64 PNG for displaying in browser"""
     img_byte_arr = io.BytesIO()
-    highlight_img.save(img_byte_arr, format='PNG')
-    img_byte_arr = img_byte_arr.getvalue()
+    image.save(img_byte_arr, format='PNG')
+    return base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')
+
+def latest_frame(session=MAIN_SESSION):
+    """
+    Latest frame of the main screen or of a session, for requests
+    
+    Requests never capture while the scan loop publishes frames; otherwise one
+    request per IDLE_MAX_AGE captures the main screen and the others share it.
     
-    # Convert to base64 for displaying in browser
-    return base64.b64encode(img_byte_arr).decode('utf-8')
\ No newline at end of file
+    Returns:
+        CachedFrame: None for a session that has not scanned yet
+    """
+    if session is not MAIN_SESSION:
+        return frame_cache.latest(session)
+    max_age = SCAN_MAX_AGE if get_current_status() == "running" else IDLE_MAX_AGE
+    return frame_cache.fresh(ImageGrab.grab, max_age)
+
+def highlighted_rendition(frame, settings=None):
+    """(etag, base64 PNG) of a cached frame with its regions highlighted, encoded once per frame, settings and results version"""
+    if settings is None:
+        settings = settings_store.snapshot()
+    return frame_cache.rendition(frame, ("highlighted", settings.version, results_version),
+                                 lambda f: generate_highlighted_screenshot(f.screenshot, settings, f.session))
+
+def screenshot_rendition(frame):
+    """(etag, base64 PNG) of a cached frame as captured, encoded once per frame"""
+    return frame_cache.rendition(frame, "png", _encode_full_screenshot)
+
+def _encode_full_screenshot(frame):
+    screenshot = frame.screenshot
+    if isinstance(screenshot, AreaFrame):
+        if frame.session is MAIN_SESSION and (0, 0) + tuple(screenshot.size) not in screenshot.areas:
+            # Only the regions' area was captured; selecting regions needs the whole screen
+            screenshot = ImageGrab.grab()
+        else:
+            screenshot = screenshot.copy()
+    return encode_png(screenshot)
\ No newline at end of file
@@ -0,0 +1,267 @@
+import os
+import time
+import queue
+import multiprocessing
+
+from app.config import log_dir
+from app.capture.shared_frames import SharedFrameRing, SLOTS, SEQ, free_slot
+from app.ocr.mosaic import mosaic_group_key
+from app.utils.logger import get_logger
+
+# Create a logger for the OCR worker processes
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Seconds to wait for processes to exit before terminating them
+STOP_TIMEOUT = 5.0
+
+# Spawned processes behave the same on Windows and Linux and do not inherit the web server's threads
+_context = multiprocessing.get_context("spawn")
+
+def capture_main(ring_name, width, height, consumers, control, stop_event, backend):
+    """
+    Capture process: grab the screen into free ring slots and announce each frame
+
+    A slot is reused only after every consumer acknowledged the frame in it, and
+    never while it holds the newest frame.
+    """
+    from PIL import ImageGrab
+    from app.capture.x11_capture import X11Capture, X11CaptureError
+
+    grab = ImageGrab.grab
+    if backend == "x11":
+        try:
+            grab = X11Capture().grab
+        except X11CaptureError as e:
+            logger.error("X11 capture unavailable, using ImageGrab: {}", str(e))
+
+    ring = SharedFrameRing.attach(ring_name, width, height)
+    pending = [set() for _ in range(SLOTS)]  # Consumers still reading each slot
+    latest = None
+    seq = 0
+    try:
+        while not stop_event.is_set():
+            # Apply acknowledgements, waiting for one when every slot is still held
+            try:
+                message = control.get(timeout=0.1) if free_slot(pending, latest) is None else control.get_nowait()
+                while True:
+                    _, consumer, slot, acked_seq = message
+                    if ring.header[slot, SEQ] == acked_seq:
+                        pending[slot].discard(consumer)
+                    message = control.get_nowait()
+            except queue.Empty:
+                pass
+
+            slot = free_slot(pending, latest)
+            if slot is None:
+                continue
+
+            seq += 1
+            ring.write(slot, seq, grab())
+            pending[slot] = set(range(len(consumers)))
+            latest = slot
+            for consumer in consumers:
+                consumer.put(("frame", slot, seq))
+    finally:
+        # Announcements nobody reads any more must not keep this process alive
+        for consumer in consumers:
+            consumer.cancel_join_thread()
+        ring.close()
+
+def process_regions(ocr_processor, plans, frame, release):
+    """
+    Run the region logic of perform_ocr on a shared frame
+
+    Region crops are views of the frame; `release` is called as soon as the
+    upscaled images exist, so the capture process can reuse the slot while OCR runs.
+
+    Returns:
+        dict: region name -> ("ocr", result), ("blank", None) or ("error", message)
+    """
+    from PIL import Image
+
+    outcome = {}
+    prepared = []
+    try:
+        for plan in plans:
+            x1, y1, x2, y2 = plan.box
+            try:
+                region_img = Image.fromarray(frame[y1:y2, x1:x2])
+                if plan.save_debug:
+                    os.makedirs(os.path.dirname(plan.original_debug_path), exist_ok=True)
+                    region_img.save(plan.original_debug_path)
+                upscaled = ocr_processor.upscale_region(plan, region_img)
+                if upscaled is None:
+                    outcome[plan.name] = ("blank", None)
+                else:
+                    prepared.append((plan, upscaled))
+            except Exception as e:
+                outcome[plan.name] = ("error", str(e))
+    finally:
+        release()
+
+    mosaic_results = ocr_processor.run_mosaic_batches([(plan, img) for plan, img in prepared
+                                                       if plan.profile["mosaic"]])
+    for plan, region_img in prepared:
+        try:
+            result = mosaic_results.get(plan.name)
+            if result is None:
+                result = ocr_processor.run_ocr_cascade(plan, region_img)
+            outcome[plan.name] = ("ocr", result)
+        except Exception as e:
+            outcome[plan.name] = ("error", str(e))
+    return outcome
+
+def worker_main(worker_id, ring_name, width, height, tasks, control, results, busy):
+    """
+    OCR worker process: OCR the assigned regions of the newest announced frame
+
+    Frames announced while the worker was busy are acknowledged without being read.
+    While a frame is processed, busy[3 * worker_id:3 * worker_id + 3] holds
+    (started, slot, seq) so the scan loop can spot and replace a stuck worker.
+    """
+    from app.ocr import ocr_processor
+    from app.ocr.watchdog import cycle_deadline
+
+    ring = SharedFrameRing.attach(ring_name, width, height)
+    plans = ()
+    limits = None
+    try:
+        while True:
+            batch = [tasks.get()]
+            try:
+                while True:
+                    batch.append(tasks.get_nowait())
+            except queue.Empty:
+                pass
+
+            frames = []
+            for message in batch:
+                if message[0] == "stop":
+                    return
+                if message[0] == "plans":
+                    plans, limits = message[1:]
+                else:
+                    frames.append(message[1:])
+
+            # Only the newest frame is worth reading; older ones are released right away
+            for slot, seq in frames[:-1]:
+                control.put(("ack", worker_id, slot, seq))
+            if not frames:
+                continue
+
+            slot, seq = frames[-1]
+            frame = ring.frame(slot, seq)
+            release = lambda: control.put(("ack", worker_id, slot, seq))
+            if frame is None:
+                release()
+                continue
+            busy[3 * worker_id:3 * worker_id + 3] = [time.time(), slot, seq]
+            with cycle_deadline(limits):
+                outcome = process_regions(ocr_processor, plans, frame, release)
+            busy[3 * worker_id] = 0.0
+            frame = None  # Views must be gone before the ring is closed
+            results.put((worker_id, seq, outcome))
+    finally:
+        results.cancel_join_thread()
+        control.cancel_join_thread()
+        ring.close()
+
+class WorkerPool:
+    """
+    A capture process and OCR worker processes sharing frames through a SharedFrameRing.
+
+    The scan loop is an extra consumer of the frames (for the highlighted
+    screenshot), so it acknowledges frames like the workers do.
+    """
+
+    def __init__(self, count, screen_size, backend="imagegrab"):
+        width, height = screen_size
+        self.count = count
+        self.ring = SharedFrameRing.create(width, height)
+        self.control = _context.Queue()   # Acknowledgements to the capture process
+        self.results = _context.Queue()   # Region results to the scan loop
+        self.frames = _context.Queue()    # Frame announcements to the scan loop
+        self.tasks = [_context.Queue() for _ in range(count)]  # Plans and frame announcements per worker
+        self.busy = _context.Array('d', 3 * count, lock=False)  # (started, slot, seq) per worker, started 0 when idle
+        self.stop_event = _context.Event()
+        self.consumer_id = count  # Consumer id of the scan loop
+        self.size = (width, height)
+        self.plans = [None] * count  # Last plans message sent to each worker, resent to replacements
+
+        self.capture = _context.Process(target=capture_main, name="ocr-capture", daemon=True,
+                                        args=(self.ring.name, width, height, self.tasks + [self.frames],
+                                              self.control, self.stop_event, backend))
+        self.workers = [self._worker(i) for i in range(count)]
+
+    def _worker(self, worker_id):
+        width, height = self.size
+        return _context.Process(target=worker_main, name=f"ocr-worker-{worker_id + 1}", daemon=True,
+                                args=(worker_id, self.ring.name, width, height, self.tasks[worker_id],
+                                      self.control, self.results, self.busy))
+
+    def start(self):
+        for process in self.workers + [self.capture]:
+            process.start()
+        logger.info("Started capture process and {} OCR worker process(es)", self.count)
+
+    def alive(self):
+        return self.capture.is_alive() and all(worker.is_alive() for worker in self.workers)
+
+    def assign(self, plans, limits):
+        """Split the plans across workers, keeping regions that can share a mosaic together; limits are the watchdog settings"""
+        groups = {}
+        for plan in plans:
+            key = mosaic_group_key(plan) if plan.profile["mosaic"] else ("region", plan.name)
+            groups.setdefault(key, []).append(plan)
+
+        assigned = [[] for _ in range(self.count)]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(assigned, key=len).extend(group)
+        for worker_id, worker_plans in enumerate(assigned):
+            self.plans[worker_id] = ("plans", tuple(worker_plans), limits)
+            self.tasks[worker_id].put(self.plans[worker_id])
+
+    def stalled(self, after):
+        """Ids of the workers busy with the same frame for more than `after` seconds (none when `after` is 0)"""
+        if after <= 0:
+            return []
+        now = time.time()
+        return [worker_id for worker_id in range(self.count)
+                if self.busy[3 * worker_id] and now - self.busy[3 * worker_id] > after]
+
+    def replace(self, worker_id):
+        """Kill a stuck worker and start a new one on its task queue, releasing the frame it held"""
+        self.workers[worker_id].kill()
+        self.workers[worker_id].join(STOP_TIMEOUT)
+        _, slot, seq = self.busy[3 * worker_id:3 * worker_id + 3]
+        self.busy[3 * worker_id] = 0.0
+        self.control.put(("ack", worker_id, int(slot), int(seq)))
+        self.workers[worker_id] = self._worker(worker_id)
+        self.workers[worker_id].start()
+        if self.plans[worker_id] is not None:
+            self.tasks[worker_id].put(self.plans[worker_id])
+
+    def frame_notices(self):
+        """(slot, seq) of the frames announced to the scan loop since the last call"""
+        notices = []
+        try:
+            while True:
+                notices.append(self.frames.get_nowait()[1:])
+        except queue.Empty:
+            pass
+        return notices
+
+    def ack(self, slot, seq):
+        self.control.put(("ack", self.consumer_id, slot, seq))
+
+    def stop(self):
+        self.stop_event.set()
+        for tasks in self.tasks:
+            tasks.put(("stop",))
+        for process in self.workers + [self.capture]:
+            process.join(STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning("Process {} did not stop, terminating it", process.name)
+                process.terminate()
+        self.ring.close()
+        logger.info("Stopped capture process and OCR worker processes")
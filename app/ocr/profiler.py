@@ -0,0 +1,230 @@
+import io
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+from collections import Counter
+
+from app.config import settings_dir, log_dir
+from app.utils.logger import get_logger
+
+# Create a logger for the profilers
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Directory of the per-cycle cProfile dumps
+PROFILE_DIR = os.path.join(settings_dir, "profiles")
+MAX_CYCLE_DUMPS = 100  # Older dumps are deleted
+
+# Threads sampled by default: the scan loop (ocr-scan-<n>) and the session scan threads (ocr-session_<n>).
+# Event subscribers (webhooks, history, emits) run on events-<name> threads, logging on its own thread.
+SCAN_THREADS = ("ocr-scan", "ocr-session")
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 600.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def thread_group(name):
+    """Thread name without its number, so the stacks of replaced or pooled threads add up"""
+    return re.sub(r"[-_]\d+$", "", name)
+
+class SamplingProfiler:
+    """
+    Statistical profiler of the scan threads, for flame graphs.
+
+    While it runs, a thread wakes every `interval` seconds, reads the current
+    frame of every sampled thread with sys._current_frames() and counts the
+    stack. Nothing is hooked into the profiled threads, so they run at full
+    speed; when it is not running it costs nothing. Waiting counts like
+    running: a thread blocked on a Tesseract process shows up under the
+    pytesseract call, a thread writing logs under the logging calls.
+
+    collapsed() returns one "thread;outer;...;inner count" line per stack,
+    the input of flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stacks = Counter()
+        self.labels = {}  # code object -> frame label
+        self.threads = SCAN_THREADS
+        self.interval = DEFAULT_INTERVAL
+        self.started = None
+        self.until = None
+        self.finished = None
+        self.samples = 0
+        self.sampling_seconds = 0.0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds, interval=DEFAULT_INTERVAL, threads=SCAN_THREADS):
+        """Sample the threads whose names start with one of `threads` for `seconds`; False if already running"""
+        with self.lock:
+            if self.running:
+                return False
+            self.stop_event.clear()
+            self.stacks = Counter()
+            self.threads = tuple(threads)
+            self.interval = interval
+            self.started = time.time()
+            self.until = time.monotonic() + min(seconds, MAX_SECONDS)
+            self.finished = None
+            self.samples = 0
+            self.sampling_seconds = 0.0
+            self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self.thread.start()
+        logger.info("Sampling profiler started for {} s on threads {}", seconds, ", ".join(self.threads))
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        while not self.stop_event.is_set() and time.monotonic() < self.until:
+            started = time.perf_counter()
+            sampled = {thread.ident: thread_group(thread.name) for thread in threading.enumerate()
+                       if thread.name.startswith(self.threads)}
+            frames = sys._current_frames()
+            stacks = [(name, frames[ident]) for ident, name in sampled.items() if ident in frames]
+            with self.lock:
+                for name, frame in stacks:
+                    self.stacks[self._collapse(name, frame)] += 1
+                self.samples += 1
+                self.sampling_seconds += time.perf_counter() - started
+            del frames, stacks
+            self.stop_event.wait(self.interval)
+        self.finished = time.time()
+        logger.info("Sampling profiler stopped after {} samples", self.samples)
+
+    def _collapse(self, name, frame):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self.labels.get(code)
+            if label is None:
+                path = code.co_filename
+                path = os.path.relpath(path, ROOT) if path.startswith(ROOT) else os.path.basename(path)
+                label = self.labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+            labels.append(label)
+            frame = frame.f_back
+        labels.append(name)
+        return ";".join(reversed(labels))
+
+    def collapsed(self):
+        """Stacks of the current or last run in collapsed format, most frequent first"""
+        with self.lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self):
+        with self.lock:
+            return {
+                "running": self.running,
+                "threads": list(self.threads),
+                "interval_ms": round(self.interval * 1000, 2),
+                "started": self.started,
+                "finished": self.finished,
+                "samples": self.samples,
+                "stacks": len(self.stacks),
+                "sample_us": round(self.sampling_seconds * 1e6 / self.samples, 1) if self.samples else 0.0,
+            }
+
+# Returned by CycleProfiler.cycle when no cycle is to be profiled
+_NOT_PROFILED = contextlib.nullcontext()
+
+class CycleProfiler:
+    """
+    cProfile dumps of single scan cycles.
+
+    arm(n) profiles the next n cycles of the scan loop (main screen and
+    sessions, not the OCR worker processes), one at a time, and writes each
+    as <time>-<n>-<session>.prof in PROFILE_DIR (read it with pstats,
+    snakeviz or similar). Disarmed, cycle() is one attribute check per cycle.
+    """
+
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.active = False  # A cycle is being profiled (cProfile can only profile one at a time)
+        self.count = 0
+
+    def arm(self, cycles):
+        with self.lock:
+            self.remaining = max(0, int(cycles))
+        logger.info("Profiling the next {} scan cycle(s)", cycles)
+
+    def cycle(self, session):
+        """Context manager around one cycle of session (None for the main screen)"""
+        if not self.remaining:
+            return _NOT_PROFILED
+        with self.lock:
+            if not self.remaining or self.active:
+                return _NOT_PROFILED
+            self.remaining -= 1
+            self.active = True
+            self.count += 1
+            number = self.count
+        return self._profile(session, number)
+
+    @contextlib.contextmanager
+    def _profile(self, session, number):
+        profile = cProfile.Profile()
+        started = time.time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            label = re.sub(r"[^\w.-]", "_", session or "main")
+            self._save(profile, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{number}-{label}.prof")
+
+    def _save(self, profile, name):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(os.path.join(self.directory, name))
+            self._prune()
+        except OSError as e:
+            logger.error("Could not write the cycle profile {}: {}", name, str(e))
+        finally:
+            with self.lock:
+                self.active = False
+
+    def _prune(self):
+        for name in self.dumps()[MAX_CYCLE_DUMPS:]:
+            os.remove(os.path.join(self.directory, name))
+
+    def dumps(self):
+        """Names of the dumps, newest first"""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".prof")]
+        except OSError:
+            return []
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
+
+    def path(self, name):
+        """Path of a dump, or None if there is no such dump"""
+        return os.path.join(self.directory, name) if name in self.dumps() else None
+
+    @staticmethod
+    def report(path, sort="cumulative", limit=40):
+        """The top functions of a dump as pstats text"""
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def status(self):
+        return {"remaining": self.remaining, "profiled": self.count, "dumps": self.dumps()}
+
+# Shared profilers controlled by the /admin/profile routes and used by the scan loop
+sampling_profiler = SamplingProfiler()
+cycle_profiler = CycleProfiler()
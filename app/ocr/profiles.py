@@ -0,0 +1,167 @@
+import copy
+
+# Preprocessing variants, in the same order as PREPROCESS_METHODS in ocr_processor
+VARIANTS = (
+    "high_contrast",
+    "sharpen",
+    "bilateral",
+    "inverted",
+    "otsu",
+    "color_filter",
+)
+
+# Page segmentation modes that make sense for single regions
+ALLOWED_PSMS = (3, 4, 6, 7, 8, 10, 11, 13)
+
+# Characters that cannot be passed safely in a Tesseract whitelist on the command line
+_WHITELIST_FORBIDDEN = set(" \t\r\n'\"")
+
+# Whitelist of the biome handling before profiles: printable ASCII, less the space,
+# quotes and backslash that cannot be passed on the Tesseract command line
+BIOME_WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,-:;(){}[]<>!@#$%^&*+=/|?_"
+
+# Built-in profiles. A region's profile names a preset and may override any field.
+#   variants:       preprocessing variants to try, in order
+#   psm:            Tesseract page segmentation modes to try, in order
+#   whitelist:      characters Tesseract may output ("" for no restriction)
+#   scale:          upscale factor before OCR (0 picks 3x for small regions, 1.5x otherwise)
+#   time_budget_ms: wall-clock budget for the region's OCR cascade per cycle (0 for no limit)
+#   target_confidence: stop trying further attempts once a result scores this high
+#   mosaic:         batch with compatible regions into one Tesseract call, falling back to
+#                   the per-region cascade when the batched result misses the target
+#   text_detect:    skip regions without text-like strokes and crop to the text before upscaling
+#   notify:         send webhook notifications for this region
+#   debug:          save debug images and log every result
+#   consensus:      vote over several frames instead of sweeping every attempt in one frame;
+#                   only the consensus result updates the region's text and webhook
+#   frame_attempts: Tesseract attempts per frame when consensus is on (0 for no limit)
+#   consensus_window:   number of recent frames that vote
+#   consensus_quorum:   votes a text needs in the window to be committed
+#   consensus_confidence: total confidence that also commits a text before it reaches the quorum
+PROFILE_PRESETS = {
+    "fast": {
+        "variants": ["high_contrast", "inverted"],
+        "psm": [7, 6],
+        "whitelist": "",
+        "scale": 0,
+        "time_budget_ms": 250,
+        "target_confidence": 80,
+        "mosaic": True,
+        "text_detect": True,
+        "notify": False,
+        "debug": False,
+        "consensus": False,
+        "frame_attempts": 0,
+        "consensus_window": 5,
+        "consensus_quorum": 3,
+        "consensus_confidence": 300,
+    },
+    "accurate": {
+        "variants": list(VARIANTS),
+        "psm": [7, 6, 8],
+        "whitelist": "",
+        "scale": 0,
+        "time_budget_ms": 1500,
+        "target_confidence": 80,
+        "mosaic": False,
+        "text_detect": True,
+        "notify": False,
+        "debug": False,
+        "consensus": False,
+        "frame_attempts": 0,
+        "consensus_window": 5,
+        "consensus_quorum": 3,
+        "consensus_confidence": 300,
+    },
+    "biome": {
+        "variants": list(VARIANTS),
+        "psm": [7, 6, 8, 3],
+        "whitelist": BIOME_WHITELIST,
+        "scale": 0,
+        "time_budget_ms": 3000,
+        "target_confidence": 80,
+        "mosaic": False,
+        "text_detect": False,
+        "notify": True,
+        "debug": True,
+        "consensus": True,
+        "frame_attempts": 2,
+        "consensus_window": 5,
+        "consensus_quorum": 3,
+        "consensus_confidence": 300,
+    },
+}
+
+def default_preset(region_name):
+    """Preset for regions saved before profiles existed (based on the old name heuristic)"""
+    return "biome" if "biome" in region_name.lower() else "fast"
+
+def resolve_profile(region, region_name):
+    """
+    Return the effective profile for a region entry: its preset with overrides applied.
+
+    Invalid override values are ignored in favor of the preset's value.
+    """
+    profile = region.get("profile")
+    if not isinstance(profile, dict):
+        profile = {}
+    preset_name = profile.get("preset")
+    if preset_name not in PROFILE_PRESETS:
+        preset_name = default_preset(region_name)
+    resolved = copy.deepcopy(PROFILE_PRESETS[preset_name])
+    resolved["preset"] = preset_name
+
+    variants = profile.get("variants")
+    if not isinstance(variants, (list, tuple)):
+        variants = ()
+    variants = [v for v in variants if v in VARIANTS]
+    if variants:
+        resolved["variants"] = variants
+
+    psms = profile.get("psm")
+    if not isinstance(psms, (list, tuple)):
+        psms = ()
+    psms = [int(p) for p in psms if str(p).isdigit() and int(p) in ALLOWED_PSMS]
+    if psms:
+        resolved["psm"] = psms
+
+    whitelist = profile.get("whitelist")
+    if isinstance(whitelist, str):
+        resolved["whitelist"] = "".join(c for c in whitelist if c not in _WHITELIST_FORBIDDEN)
+
+    for key in ("scale", "time_budget_ms", "target_confidence", "consensus_confidence"):
+        try:
+            value = float(profile[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if value >= 0:
+            resolved[key] = value
+
+    for key in ("frame_attempts", "consensus_window", "consensus_quorum"):
+        try:
+            value = int(profile[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if value >= 0:
+            resolved[key] = value
+
+    for key in ("mosaic", "text_detect", "notify", "debug", "consensus"):
+        if isinstance(profile.get(key), bool):
+            resolved[key] = profile[key]
+
+    return resolved
+
+def profile_error(profile):
+    """Return why a profile sent by a client cannot be saved, or None if it can"""
+    if not isinstance(profile, dict):
+        return "The profile must be an object"
+    for key in ("variants", "psm"):
+        if key in profile and not isinstance(profile[key], (list, tuple)):
+            return f"The profile's {key} must be a list"
+    return None
+
+def build_ocr_configs(profile):
+    """Build the Tesseract config strings for a resolved profile"""
+    whitelist = profile["whitelist"]
+    suffix = f" -c tessedit_char_whitelist={whitelist}" if whitelist else ""
+    return tuple(f"--psm {psm} --oem 1{suffix}" for psm in profile["psm"])
@@ -0,0 +1,81 @@
+import os
+
+from app.config import MIN_OCR_WIDTH, MIN_OCR_HEIGHT, settings_dir
+from app.ocr.profiles import VARIANTS, resolve_profile, build_ocr_configs
+from app.ocr.sessions import session_regions
+
+# Directory for per-region debug images
+DEBUG_DIR = os.path.join(settings_dir, "debug")
+
+class RegionPlan:
+    """
+    Everything perform_ocr needs to process one region, computed once.
+
+    Plans are built from a settings snapshot and a screen size, so clamping,
+    scale selection and the method/config cascade are not redone every cycle.
+    """
+
+    __slots__ = (
+        "name", "label", "session", "profile", "box", "width", "height", "too_small", "resize",
+        "methods", "configs", "time_budget", "target_confidence", "save_debug", "verbose", "notify",
+        "temporal", "frame_attempts",
+        "original_debug_path", "method_debug_paths",
+    )
+
+    def __init__(self, index, region, screen_width, screen_height, session=None):
+        # Regions of a capture session share one results namespace: "<session>/<region>"
+        self.label = region.get("name", f"Region {index + 1}")
+        self.session = session or None
+        self.name = f"{session}/{self.label}" if session else self.label
+
+        # Ensure coordinates are within screen boundaries
+        x1 = max(0, min(region["x1"], screen_width - 1))
+        y1 = max(0, min(region["y1"], screen_height - 1))
+        x2 = max(x1 + 1, min(region["x2"], screen_width))
+        y2 = max(y1 + 1, min(region["y2"], screen_height))
+        self.box = (x1, y1, x2, y2)
+        self.width = x2 - x1
+        self.height = y2 - y1
+        self.too_small = self.width < MIN_OCR_WIDTH or self.height < MIN_OCR_HEIGHT
+
+        # The region's OCR profile decides how much work it gets
+        self.profile = resolve_profile(region, self.name)
+
+        # Scale factor optimization - use smaller scale factors for better performance
+        scale_factor = self.profile["scale"]
+        if not scale_factor:
+            scale_factor = 3 if self.width < 100 or self.height < 30 else 1.5
+        self.resize = (max(1, int(self.width * scale_factor)), max(1, int(self.height * scale_factor)))
+
+        self.methods = tuple(VARIANTS.index(variant) for variant in self.profile["variants"])
+        self.configs = build_ocr_configs(self.profile)
+        self.time_budget = self.profile["time_budget_ms"] / 1000.0
+        self.target_confidence = self.profile["target_confidence"]
+        self.save_debug = self.profile["debug"]
+        self.verbose = self.profile["debug"]
+        self.notify = self.profile["notify"]
+
+        # Consensus regions spend a few attempts per frame and vote across frames
+        if self.profile["consensus"]:
+            window = max(1, self.profile["consensus_window"])
+            self.temporal = (window, max(1, min(self.profile["consensus_quorum"], window)),
+                             self.profile["consensus_confidence"])
+            self.frame_attempts = self.profile["frame_attempts"]
+        else:
+            self.temporal = None
+            self.frame_attempts = 0
+
+        self.original_debug_path = os.path.join(DEBUG_DIR, f"{self.name}_original.png")
+        self.method_debug_paths = tuple(os.path.join(DEBUG_DIR, f"{self.name}_method{idx + 1}.png")
+                                        for idx in self.methods)
+
+def compile_region_plans(settings, screen_size, session=None):
+    """Build the RegionPlan for every region of the main screen or of a capture session"""
+    screen_width, screen_height = screen_size
+    return tuple(RegionPlan(i, region, screen_width, screen_height, session)
+                 for i, region in enumerate(session_regions(settings, session)))
+
+def get_region_plans(settings, screen_size, session=None):
+    """Return the region plans for a settings snapshot, built once per version, screen size and session"""
+    return settings.derived(("region_plans", screen_size, session),
+                            lambda snapshot: compile_region_plans(snapshot, screen_size, session))
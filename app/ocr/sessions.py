@@ -0,0 +1,180 @@
+import threading
+import time
+
+# The main screen: the top-level regions, captured with the "capture" settings
+MAIN_SESSION = None
+
+SESSION_STATES = ("running", "paused", "stopped")
+
+# Seconds a session waits before retrying after its capture source failed
+RETRY_DELAY = 2.0
+
+def find_session(settings, name):
+    """Return the configured session called `name`, or None"""
+    for session in settings["sessions"]:
+        if session["name"] == name:
+            return session
+    return None
+
+def session_regions(settings, name):
+    """Regions of a session; the top-level regions for the main screen"""
+    if name is MAIN_SESSION:
+        return settings["regions"]
+    session = find_session(settings, name)
+    return session["regions"] if session is not None else ()
+
+def validate_session(data, source_types):
+    """
+    Check a session definition from the API and return it as a plain dict
+
+    Raises:
+        ValueError: If the name, state, source or regions are invalid
+    """
+    name = str(data.get("name", "")).strip()
+    if not name or "/" in name:
+        raise ValueError("Session name must not be empty or contain '/'")
+    state = data.get("state", "stopped")
+    if state not in SESSION_STATES:
+        raise ValueError(f"state must be one of {SESSION_STATES}")
+    source = data.get("source")
+    if not isinstance(source, dict) or source.get("type") not in source_types:
+        raise ValueError(f"source.type must be one of {source_types}")
+    regions = data.get("regions", [])
+    if not isinstance(regions, list) or not all(isinstance(region, dict) and
+                                                all(key in region for key in ("x1", "y1", "x2", "y2"))
+                                                for region in regions):
+        raise ValueError("regions must be a list of {x1, y1, x2, y2, name} objects")
+    return {"name": name, "state": state, "source": dict(source), "regions": regions}
+
+class SessionScheduler:
+    """
+    Fair share of the scan threads between sessions.
+
+    Every session is charged the seconds its cycles take; the runnable session
+    that used the least time goes next, so a slow client (many regions, long
+    cascades) gets fewer cycles instead of delaying everyone else. A session
+    that starts (or resumes) joins at the lowest charge among the others, so it
+    cannot claim a backlog of idle time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.used = {}  # session name -> seconds of scanning charged
+
+    def pick(self, names):
+        """Return the name (out of the non-empty `names`) that should scan next"""
+        with self.lock:
+            known = [self.used[name] for name in names if name in self.used]
+            floor = min(known) if known else 0.0
+            for name in names:
+                if name not in self.used:
+                    self.used[name] = floor
+            return min(names, key=lambda name: self.used[name])
+
+    def charge(self, name, seconds):
+        with self.lock:
+            if name in self.used:
+                self.used[name] += seconds
+
+    def retain(self, names):
+        """Forget sessions that are not runnable any more (stopped, paused or failing)"""
+        with self.lock:
+            for name in list(self.used):
+                if name not in names:
+                    del self.used[name]
+
+    def shares(self):
+        """Fraction of the scanning time each session got"""
+        with self.lock:
+            total = sum(self.used.values())
+            return {name: used / total if total else 0.0 for name, used in self.used.items()}
+
+class SessionRuntime:
+    """Capture source and counters of one session"""
+
+    def __init__(self):
+        self.source = None
+        self.source_options = None  # Options the source was built from
+        self.cycles = 0
+        self.last_cycle_ms = None
+        self.last_scan = None
+        self.error = None
+        self.retry_at = 0.0
+
+class SessionManager:
+    """
+    Runtime state of the capture sessions, shared by the scan loop and the routes.
+
+    A session's capture source is built on first use and rebuilt when its
+    options change; a session never runs two cycles at once, so sources need
+    not be thread-safe.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.runtimes = {}  # session name (MAIN_SESSION for the main screen) -> SessionRuntime
+        self.scheduler = SessionScheduler()
+
+    def runtime(self, name):
+        with self.lock:
+            runtime = self.runtimes.get(name)
+            if runtime is None:
+                runtime = self.runtimes[name] = SessionRuntime()
+            return runtime
+
+    def source(self, settings, name, make_source):
+        """Return the capture source of a session, building it with make_source(options) when needed"""
+        runtime = self.runtime(name)
+        options = find_session(settings, name)["source"]
+        if runtime.source is None or runtime.source_options != options:
+            if runtime.source is not None:
+                runtime.source.close()
+            runtime.source = None
+            runtime.source = make_source(options)
+            runtime.source_options = options
+        return runtime.source
+
+    def runnable(self, settings, now=None):
+        """Names of the sessions that should be scanning, the main screen first"""
+        now = time.time() if now is None else now
+        names = []
+        if settings["enabled"] and settings["regions"]:
+            names.append(MAIN_SESSION)
+        for session in settings["sessions"]:
+            if session["state"] == "running" and session["regions"]:
+                names.append(session["name"])
+        return [name for name in names if self.runtime(name).retry_at <= now]
+
+    def finish_cycle(self, name, seconds, error=None):
+        runtime = self.runtime(name)
+        runtime.cycles += 1
+        runtime.last_cycle_ms = seconds * 1000
+        runtime.last_scan = time.time()
+        runtime.error = error
+        if error is not None:
+            runtime.retry_at = time.time() + RETRY_DELAY
+        self.scheduler.charge(name, seconds)
+
+    def retain(self, settings):
+        """Drop the runtime of sessions that were removed from the settings"""
+        names = {session["name"] for session in settings["sessions"]}
+        names.add(MAIN_SESSION)
+        with self.lock:
+            for name in list(self.runtimes):
+                if name not in names:
+                    runtime = self.runtimes.pop(name)
+                    if runtime.source is not None:
+                        runtime.source.close()
+
+    def status(self, name):
+        runtime = self.runtime(name)
+        return {
+            "cycles": runtime.cycles,
+            "last_cycle_ms": runtime.last_cycle_ms,
+            "last_scan": runtime.last_scan,
+            "error": runtime.error,
+            "share": self.scheduler.shares().get(name, 0.0),
+        }
+
+# Shared session state used by the scan loop and the session routes
+session_manager = SessionManager()
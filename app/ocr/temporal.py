@@ -0,0 +1,87 @@
+import threading
+from collections import deque
+
+class TemporalVoter:
+    """
+    Sliding-window vote over a region's per-frame OCR results.
+
+    Each frame adds one candidate (its text and confidence; "" for no text). A
+    candidate is committed once it has `quorum` votes or `confidence_sum` total
+    confidence in the window, and - for hysteresis - only if it has at least
+    `margin` more votes than the currently committed text. A single noisy frame
+    therefore never changes the committed value.
+    """
+
+    __slots__ = ("window", "quorum", "confidence_sum", "margin", "frames", "committed", "commits", "frame_count")
+
+    def __init__(self, window=5, quorum=3, confidence_sum=300.0, margin=2):
+        self.window = window
+        self.quorum = quorum
+        self.confidence_sum = confidence_sum
+        self.margin = margin
+        self.frames = deque(maxlen=window)  # (key, text, confidence)
+        self.committed = None  # Normalized key of the committed text
+        self.commits = 0
+        self.frame_count = 0
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.lower().split())
+
+    def add(self, text, confidence):
+        """
+        Add one frame's result.
+
+        Returns:
+            str: The newly committed text (possibly "" for no text), or None if the committed value did not change
+        """
+        key = self.normalize(text)
+        self.frames.append((key, text, confidence))
+        self.frame_count += 1
+
+        votes = {}
+        confidence_totals = {}
+        latest_text = {}
+        for frame_key, frame_text, frame_confidence in self.frames:
+            votes[frame_key] = votes.get(frame_key, 0) + 1
+            confidence_totals[frame_key] = confidence_totals.get(frame_key, 0.0) + frame_confidence
+            latest_text[frame_key] = frame_text
+
+        # Most supported candidate; confidence breaks ties
+        candidate = max(votes, key=lambda k: (votes[k], confidence_totals[k]))
+        if candidate == self.committed:
+            return None
+        if votes[candidate] < self.quorum and confidence_totals[candidate] < self.confidence_sum:
+            return None
+        if self.committed is not None and votes[candidate] - votes.get(self.committed, 0) < self.margin:
+            return None
+
+        self.committed = candidate
+        self.commits += 1
+        return latest_text[candidate]
+
+class TemporalVoterRegistry:
+    """One voter per region, recreated when the region's consensus settings change"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.voters = {}  # region name -> (params, voter)
+
+    def get(self, plan):
+        params = plan.temporal
+        entry = self.voters.get(plan.name)
+        if entry is None or entry[0] != params:
+            with self.lock:
+                entry = (params, TemporalVoter(*params))
+                self.voters[plan.name] = entry
+        return entry[1]
+
+    def summary(self):
+        with self.lock:
+            return {
+                name: {"frames": voter.frame_count, "commits": voter.commits}
+                for name, (_, voter) in self.voters.items()
+            }
+
+# Shared voters used by the scan loop and the stats route
+temporal_voters = TemporalVoterRegistry()
@@ -0,0 +1,142 @@
+import threading
+import functools
+
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Height the crop is downscaled to before looking for text
+DETECT_HEIGHT = 48
+
+# Otsu threshold of the gradient below which edges are too soft to be text (blur, gradients, haze)
+MIN_EDGE_CONTRAST = 24
+
+# Fraction of edge pixels outside which a crop is treated as flat or as noise/texture;
+# a line of text is mostly background, so its edges stay sparse
+MIN_EDGE_DENSITY = 0.01
+MAX_EDGE_DENSITY = 0.35
+
+# Connected components that can be characters (sizes in downscaled pixels)
+MIN_COMPONENT_HEIGHT = 3
+MAX_COMPONENT_HEIGHT_RATIO = 0.95  # Of the crop height; taller blobs are borders or background
+MIN_COMPONENT_AREA = 6
+MIN_FILL_RATIO = 0.08  # Component pixels over its bounding box; lower means a thin line or frame
+MAX_FILL_RATIO = 0.95  # Higher means a solid block rather than strokes
+
+# Fewer character-like components than this means no text, unless the only one looks like a word
+MIN_COMPONENTS = 2
+
+# A lone component is a short word whose letters merged into one edge blob (small labels):
+# wider than tall, densely filled and a good part of the crop height. Lines, bars, outlines,
+# icons and single glyphs fail at least one of these.
+WORD_MIN_ASPECT = 1.2
+WORD_MAX_ASPECT = 8.0
+WORD_MIN_FILL = 0.45
+WORD_MIN_HEIGHT_RATIO = 0.35
+
+# Padding around the detected text, in original pixels
+TEXT_BOX_PADDING = 4
+
+# Only crop when the text box saves at least this fraction of the pixels
+MIN_CROP_SAVING = 0.1
+
+@functools.lru_cache(maxsize=None)
+def _gradient_kernel():
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+def find_text_box(gray):
+    """
+    Decide whether a grayscale crop contains text and where
+
+    Works on a copy downscaled to DETECT_HEIGHT: the morphological gradient is
+    binarized with Otsu. Soft edges, or too few or too many edge pixels, mean
+    no text. Otherwise the connected components of the edges that look like character
+    strokes are counted; a single one counts only if it is shaped like a short word,
+    whose letters the gradient merged. Light and dark text are handled alike.
+
+    Args:
+        gray (numpy.ndarray): 2-D uint8 image
+
+    Returns:
+        tuple: (x1, y1, x2, y2) bounding box of the text in `gray` coordinates, or None if there is no text
+    """
+    height, width = gray.shape
+    scale = min(1.0, DETECT_HEIGHT / height)
+    if scale < 1.0:
+        small = cv2.resize(gray, (max(1, int(width * scale)), DETECT_HEIGHT), interpolation=cv2.INTER_AREA)
+    else:
+        small = gray
+
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, _gradient_kernel())
+    contrast, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    if contrast < MIN_EDGE_CONTRAST:
+        return None
+    density = np.count_nonzero(edges) / edges.size
+    if not MIN_EDGE_DENSITY <= density <= MAX_EDGE_DENSITY:
+        return None
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(edges, connectivity=8)
+    stats = stats[1:]  # Skip the background component
+    comp_w = stats[:, cv2.CC_STAT_WIDTH]
+    comp_h = stats[:, cv2.CC_STAT_HEIGHT]
+    fill = stats[:, cv2.CC_STAT_AREA] / np.maximum(comp_w * comp_h, 1)
+    candidates = ((comp_h >= MIN_COMPONENT_HEIGHT)
+                  & (comp_h <= MAX_COMPONENT_HEIGHT_RATIO * small.shape[0])
+                  & (stats[:, cv2.CC_STAT_AREA] >= MIN_COMPONENT_AREA)
+                  & (fill >= MIN_FILL_RATIO) & (fill <= MAX_FILL_RATIO))
+    chars = stats[candidates]
+    if len(chars) == 1:
+        aspect = comp_w[candidates][0] / comp_h[candidates][0]
+        if not (WORD_MIN_ASPECT <= aspect <= WORD_MAX_ASPECT
+                and fill[candidates][0] >= WORD_MIN_FILL
+                and comp_h[candidates][0] >= WORD_MIN_HEIGHT_RATIO * small.shape[0]):
+            return None
+    elif len(chars) < MIN_COMPONENTS:
+        return None
+
+    x1 = chars[:, cv2.CC_STAT_LEFT].min()
+    y1 = chars[:, cv2.CC_STAT_TOP].min()
+    x2 = (chars[:, cv2.CC_STAT_LEFT] + chars[:, cv2.CC_STAT_WIDTH]).max()
+    y2 = (chars[:, cv2.CC_STAT_TOP] + chars[:, cv2.CC_STAT_HEIGHT]).max()
+
+    # Back to original coordinates, with padding
+    return (max(0, int(x1 / scale) - TEXT_BOX_PADDING),
+            max(0, int(y1 / scale) - TEXT_BOX_PADDING),
+            min(width, int(np.ceil(x2 / scale)) + TEXT_BOX_PADDING),
+            min(height, int(np.ceil(y2 / scale)) + TEXT_BOX_PADDING))
+
+def worth_cropping(box, width, height):
+    """True if cropping to the text box removes enough pixels to matter"""
+    x1, y1, x2, y2 = box
+    return (x2 - x1) * (y2 - y1) <= (1 - MIN_CROP_SAVING) * width * height
+
+class TextDetectStats:
+    """Per-region counters of the text detector"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.regions = {}  # name -> [checked, rejected, pixels in, pixels kept]
+
+    def record(self, region_name, pixels, kept):
+        with self.lock:
+            counters = self.regions.setdefault(region_name, [0, 0, 0, 0])
+            counters[0] += 1
+            counters[1] += kept == 0
+            counters[2] += pixels
+            counters[3] += kept
+
+    def summary(self):
+        with self.lock:
+            return {
+                name: {
+                    "checked": checked,
+                    "rejected": rejected,
+                    "rejection_ratio": rejected / checked if checked else 0.0,
+                    "pixels_kept_ratio": kept / pixels if pixels else 0.0,
+                }
+                for name, (checked, rejected, pixels, kept) in self.regions.items()
+            }
+
+# Shared counters used by the scan loop and the stats route
+text_detect_stats = TextDetectStats()
@@ -0,0 +1,48 @@
+import time
+import threading
+
+class ScanThroughput:
+    """
+    Counters of finished scan cycles, for throughput reports.
+
+    Every scan path (main screen, capture sessions, OCR worker processes)
+    records its cycles here; the headless runner prints rates computed from
+    two snapshots, and /ocr_stats shows the totals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.cycles = 0
+        self.regions = 0
+        self.scan_seconds = 0.0
+
+    def record(self, regions, seconds=0.0):
+        """Count one cycle over `regions` regions that took `seconds` to scan (0 when the time is spent elsewhere)"""
+        with self.lock:
+            self.cycles += 1
+            self.regions += regions
+            self.scan_seconds += seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "uptime": time.monotonic() - self.started,
+                "cycles": self.cycles,
+                "regions": self.regions,
+                "scan_seconds": self.scan_seconds,
+            }
+
+    @staticmethod
+    def rates(before, after):
+        """Per-second rates between two snapshots"""
+        elapsed = max(after["uptime"] - before["uptime"], 1e-9)
+        cycles = after["cycles"] - before["cycles"]
+        return {
+            "cycles_per_second": cycles / elapsed,
+            "regions_per_second": (after["regions"] - before["regions"]) / elapsed,
+            "scan_ms_per_cycle": (after["scan_seconds"] - before["scan_seconds"]) * 1000 / cycles if cycles else 0.0,
+        }
+
+# Shared counters updated by the scan loop and read by the headless runner and /ocr_stats
+scan_throughput = ScanThroughput()
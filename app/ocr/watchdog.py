@@ -0,0 +1,268 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from app.config import settings_store, log_dir
+from app.utils.logger import get_logger
+
+# Create a logger for the watchdog
+logger = get_logger(__name__, os.path.join(log_dir, "ocr.log"))
+
+# Seconds between watchdog checks
+CHECK_INTERVAL = 1.0
+
+# Cycle durations kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+# Smallest timeout handed to Tesseract; pytesseract treats 0 as "no timeout"
+MIN_CALL_TIMEOUT = 0.1
+
+_local = threading.local()
+
+@contextmanager
+def cycle_deadline(limits):
+    """
+    Run one scan cycle of the current thread under the "watchdog" settings limits (None for no limits)
+
+    Tesseract calls made inside get call_timeout(); the OCR cascade and the
+    region loop stop starting new work once cycle_expired().
+    """
+    limits = limits or {"cycle_deadline": 0, "call_timeout": 0}
+    _local.deadline = time.monotonic() + limits["cycle_deadline"] if limits["cycle_deadline"] > 0 else None
+    _local.call_timeout = limits["call_timeout"]
+    try:
+        yield
+    finally:
+        _local.deadline = None
+        _local.call_timeout = None
+
+def cycle_expired():
+    """True when the current thread's cycle is past its deadline"""
+    deadline = getattr(_local, "deadline", None)
+    return deadline is not None and time.monotonic() >= deadline
+
+def call_timeout():
+    """Timeout for one Tesseract call: the call timeout, cut to what is left of the cycle (0 means none)"""
+    timeout = getattr(_local, "call_timeout", None) or 0
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None:
+        left = deadline - time.monotonic()
+        timeout = min(timeout, left) if timeout else left
+    return max(MIN_CALL_TIMEOUT, timeout) if timeout else 0
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+class ScanSupervisor:
+    """
+    Owner of the one scan loop thread, and the watchdog that keeps it moving.
+
+    start() runs the scan loop unless one is already running, whoever asks
+    (app.py restoring the saved status, /control, the headless runner). The
+    loop beats on every iteration and brackets each cycle with cycle(); the
+    watchdog thread checks both every CHECK_INTERVAL:
+
+    - a loop whose heartbeat is older than "stall_after" seconds is wedged
+      (e.g. a capture that never returns): it is abandoned and a new loop
+      takes over; the old thread drops its results once it checks
+      is_current() and exits at its next keep_running() check
+    - a cycle running longer than that on another thread (a session cycle)
+      is reported as a stall
+    - a loop that died from an exception is restarted
+
+    Tesseract calls are bounded by call_timeout() and the cycles by their
+    deadline, so stalls should only come from code outside those bounds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.target = None
+        self.thread = None
+        self.watcher = None
+        self.generation = 0
+        self.stopping = False
+        self.crashed = False
+        self.last_beat = None
+        self.inflight = {}  # (session, thread ident) -> started, of the cycles running
+        self.flagged = set()  # (session, started) of cycles already reported as stalled
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.cycles = 0
+        self.deadline_exceeded = 0
+        self.tesseract_timeouts = 0
+        self.stalls = 0
+        self.last_stall = None
+        self.restarts = 0
+        self.worker_replacements = 0
+
+    def start(self, target):
+        """Run target (the scan loop) on the scan thread unless it is already running; True if started"""
+        with self.lock:
+            self.stopping = False
+            if self.thread is not None and self.thread.is_alive():
+                return False
+            self.target = target
+            self._spawn()
+            if self.watcher is None:
+                self.watcher = threading.Thread(target=self._watch, name="ocr-watchdog", daemon=True)
+                self.watcher.start()
+        return True
+
+    def _spawn(self):
+        self.generation += 1
+        self.crashed = False
+        self.last_beat = time.monotonic()
+        self.thread = threading.Thread(target=self._run, args=(self.target, self.generation),
+                                       name=f"ocr-scan-{self.generation}", daemon=True)
+        self.thread.start()
+
+    def _run(self, target, generation):
+        _local.generation = generation
+        try:
+            target()
+        except Exception as e:
+            logger.error("Scan loop crashed: {}", str(e))
+            with self.lock:
+                if generation == self.generation:
+                    self.crashed = True
+
+    def stop(self):
+        """Ask the scan loop to exit"""
+        with self.lock:
+            self.stopping = True
+
+    def join(self, timeout=None):
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def running(self):
+        thread = self.thread
+        return thread is not None and thread.is_alive()
+
+    def thread_generation(self):
+        """Generation of the scan loop the calling thread belongs to (None outside scan loops)"""
+        return getattr(_local, "generation", None)
+
+    def adopt(self, generation):
+        """Make the calling thread (a session scan thread) part of the scan loop of generation"""
+        _local.generation = generation
+
+    def is_current(self):
+        """False in a scan loop that the watchdog replaced, and in its session scan threads"""
+        return getattr(_local, "generation", None) == self.generation
+
+    def keep_running(self):
+        """False once the calling scan loop was stopped or replaced"""
+        return not self.stopping and self.is_current()
+
+    def beat(self):
+        """Heartbeat of the scan loop, once per iteration"""
+        self.last_beat = time.monotonic()
+
+    @contextmanager
+    def cycle(self, session, limits):
+        """Bracket one scan cycle of a session: heartbeat, latency and the cycle deadline"""
+        started = time.monotonic()
+        exceeded = False
+        key = (session, threading.get_ident())
+        with self.lock:
+            self.inflight[key] = started
+        try:
+            with cycle_deadline(limits):
+                yield
+                exceeded = cycle_expired()
+        finally:
+            seconds = time.monotonic() - started
+            current = self.is_current()
+            with self.lock:
+                if self.inflight.get(key) == started:
+                    del self.inflight[key]
+                self.flagged.discard((session, started))
+                # Cycles of a replaced loop are not part of the stats
+                if current:
+                    self.latencies.append(seconds)
+                    self.cycles += 1
+                    if exceeded:
+                        self.deadline_exceeded += 1
+
+    def record_timeout(self):
+        with self.lock:
+            self.tesseract_timeouts += 1
+
+    def record_worker_replaced(self):
+        with self.lock:
+            self.worker_replacements += 1
+
+    def _watch(self):
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            try:
+                self.check(settings_store.snapshot()["watchdog"]["stall_after"])
+            except Exception as e:
+                logger.error("Watchdog check failed: {}", str(e))
+
+    def check(self, stall_after):
+        """One watchdog pass (see the class docstring); stall_after 0 only restarts crashed loops"""
+        now = time.monotonic()
+        with self.lock:
+            if self.stopping or self.thread is None:
+                return
+            if self.crashed:
+                logger.error("Restarting the scan loop after a crash")
+                self.restarts += 1
+                self._spawn()
+                return
+            if not self.thread.is_alive() or stall_after <= 0:
+                return  # Exited normally (scanning stopped), or stall detection is off
+
+            loop_ident = self.thread.ident
+            for (session, ident), started in list(self.inflight.items()):
+                if now - started > stall_after and (session, started) not in self.flagged and ident != loop_ident:
+                    self.flagged.add((session, started))
+                    self._stall(f"cycle of {session or 'the main screen'}", now - started)
+
+            if now - self.last_beat > stall_after:
+                self._stall("scan loop", now - self.last_beat)
+                logger.error("Replacing the wedged scan loop thread {}", self.thread.name)
+                self.inflight = {key: started for key, started in self.inflight.items() if key[1] != loop_ident}
+                self.restarts += 1
+                self._spawn()
+
+    def _stall(self, what, seconds):
+        self.stalls += 1
+        self.last_stall = {"what": what, "seconds": round(seconds, 1), "ts": time.time()}
+        logger.error("Watchdog: {} has not progressed for {:.0f}s", what, seconds)
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            latencies = sorted(self.latencies)
+            oldest = max((now - started for started in self.inflight.values()), default=0.0)
+            return {
+                "running": self.thread is not None and self.thread.is_alive(),
+                "generation": self.generation,
+                "heartbeat_age": None if self.last_beat is None else round(now - self.last_beat, 3),
+                "oldest_cycle_age": round(oldest, 3),
+                "cycles": self.cycles,
+                "cycle_p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "cycle_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+                "cycle_max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+                "deadline_exceeded": self.deadline_exceeded,
+                "tesseract_timeouts": self.tesseract_timeouts,
+                "stalls": self.stalls,
+                "last_stall": self.last_stall,
+                "restarts": self.restarts,
+                "worker_replacements": self.worker_replacements,
+            }
+
+    def healthy(self, stall_after):
+        """False while the running loop or one of its cycles is past stall_after"""
+        status = self.status()
+        if not status["running"] or stall_after <= 0:
+            return True
+        return status["heartbeat_age"] <= stall_after and status["oldest_cycle_age"] <= stall_after
+
+# Shared supervisor of the scan loop, started by app.py, /control and the headless runner
+scan_supervisor = ScanSupervisor()
@@ -1,12 +1,10 @@
-import io
-import base64
-import threading
-from PIL import ImageGrab
 from flask import render_template, request, jsonify
 
-from app.config import flask_app, socketio, ocr_settings, macro_status, status_file
-from app.config import ocr_thread, stop_ocr_thread
-from app.ocr.ocr_processor import perform_ocr
+from app.web import flask_app, socketio
+from app.config import settings_store, macro_status, status_file
+from app.ocr.ocr_processor import perform_ocr, latest_frame, screenshot_rendition
+from app.ocr.watchdog import scan_supervisor
+from app.utils.serving import run_blocking
 
 # Function to save macro status to file
 def save_macro_status(status):
@@ -23,9 +21,16 @@ def home():
 def status():
     return jsonify({"status": macro_status})
 
+@flask_app.route("/health")
+def health():
+    """Scan loop heartbeat and stall metrics; 503 while the loop or one of its cycles is stalled"""
+    stall_after = settings_store.snapshot()["watchdog"]["stall_after"]
+    healthy = scan_supervisor.healthy(stall_after)
+    return jsonify({"healthy": healthy, "stall_after": stall_after, **scan_supervisor.status()}), 200 if healthy else 503
+
 @flask_app.route("/control", methods=["POST"])
 def control_macro():
-    global macro_status, ocr_thread, stop_ocr_thread
+    global macro_status
     action = request.form.get("action")
     
     if action == "start":
@@ -35,18 +40,12 @@ def control_macro():
         # Save status to file
         save_macro_status(macro_status)
         
-        # Always start OCR processing thread when macro is started
-        stop_ocr_thread = False
-        
-        # Check if thread already exists and is alive
-        if ocr_thread is None or not ocr_thread.is_alive():
-            ocr_thread = threading.Thread(target=perform_ocr)
-            ocr_thread.daemon = True
-            ocr_thread.start()
-            
-            if ocr_settings["enabled"]:
-                if ocr_settings["regions"]:
-                    print(f"OCR processing started with {len(ocr_settings['regions'])} region(s)")
+        # Always start OCR processing thread when macro is started (unless it is already running)
+        if scan_supervisor.start(perform_ocr):
+            settings = settings_store.snapshot()
+            if settings["enabled"]:
+                if settings["regions"]:
+                    print(f"OCR processing started with {len(settings['regions'])} region(s)")
                 else:
                     print("OCR is enabled but no regions are defined. Define regions in OCR Settings tab.")
                     # Send an notification to the client
@@ -78,7 +77,7 @@ def control_macro():
     elif action == "stop":
         # Stop the macro and OCR thread
         macro_status = "stopped"
-        stop_ocr_thread = True
+        scan_supervisor.stop()
         print("OCR processing stopped")
         
         # Save status to file
@@ -91,17 +90,20 @@ def control_macro():
     
     return jsonify({"status": macro_status, "message": "Invalid action"})
 
+def screenshot_response(etag, screenshot):
+    """JSON response with a cached screenshot, or 304 if the client already has this version"""
+    if etag in request.if_none_match:
+        response = flask_app.response_class(status=304)
+    else:
+        response = jsonify({"screenshot": screenshot})
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"  # Revalidate every time; frames change often
+    return response
+
 @flask_app.route("/screenshot", methods=["GET"])
 def take_screenshot():
-    # Take a screenshot of the entire screen
-    screenshot = ImageGrab.grab()
-    
-    # Convert the image to bytes
-    img_byte_arr = io.BytesIO()
-    screenshot.save(img_byte_arr, format='PNG')
-    img_byte_arr = img_byte_arr.getvalue()
-    
-    # Convert to base64 for displaying in browser
-    img_base64 = base64.b64encode(img_byte_arr).decode('utf-8')
-    
-    return jsonify({"screenshot": img_base64})
\ No newline at end of file
+    # Serve the latest frame of the screen (or of ?session=); one capture and encode is shared by all clients
+    frame = run_blocking(latest_frame, request.args.get("session") or None)
+    if frame is None:
+        return jsonify({"message": "No frame captured yet"}), 404
+    return screenshot_response(*run_blocking(screenshot_rendition, frame))
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+from flask import Response, request, jsonify
+
+from app.web import flask_app
+from app.config import settings_store, log_dir
+from app.capture.frame_log import frame_log_tap
+from app.capture.screen_capture import screen_grabber, CAPTURE_BACKENDS, CAPTURE_AREAS
+from app.capture.mjpeg_stream import mjpeg_stream, BOUNDARY
+from app.ocr.ocr_processor import latest_frame
+from app.utils.logger import get_logger
+
+# Create a logger for this module
+logger = get_logger(__name__, os.path.join(log_dir, "routes.log"))
+
+@flask_app.route("/frame_log", methods=["GET", "POST"])
+def manage_frame_log():
+    """API endpoint to read or change the frame log options (record, replay, capacity, union)"""
+    if request.method == "POST":
+        data = request.json or {}
+        
+        def apply(settings):
+            options = settings["frame_log"]
+            for key in ("record", "replay", "union"):
+                if key in data:
+                    options[key] = bool(data[key])
+            if "capacity" in data:
+                options["capacity"] = max(1, int(data["capacity"]))
+        
+        try:
+            settings_store.update(apply)
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid capacity"}), 400
+        logger.info("Frame log options updated: {}", data)
+    
+    options = settings_store.snapshot().to_dict()["frame_log"]
+    return jsonify({"options": options, "log": frame_log_tap.status()})
+
+@flask_app.route("/capture_settings", methods=["GET", "POST"])
+def manage_capture_settings():
+    """API endpoint to read or change the screen capture backend and area"""
+    if request.method == "POST":
+        data = request.json or {}
+        if data.get("backend", CAPTURE_BACKENDS[0]) not in CAPTURE_BACKENDS or \
+                data.get("area", CAPTURE_AREAS[0]) not in CAPTURE_AREAS:
+            return jsonify({"message": f"backend must be one of {CAPTURE_BACKENDS}, area one of {CAPTURE_AREAS}"}), 400
+        
+        def apply(settings):
+            for key in ("backend", "area"):
+                if key in data:
+                    settings["capture"][key] = data[key]
+        
+        settings_store.update(apply)
+        logger.info("Capture settings updated: {}", data)
+    
+    return jsonify({"options": settings_store.snapshot().to_dict()["capture"], "status": screen_grabber.status()})
+
+@flask_app.route("/stream.mjpg", methods=["GET"])
+def stream_mjpeg():
+    """MJPEG stream of the latest frames of the screen (or of ?session=) for lightweight viewers"""
+    session = request.args.get("session") or None
+    options = settings_store.snapshot()["stream"]
+    response = Response(mjpeg_stream.frames(latest_frame, session, options),
+                        mimetype=f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@flask_app.route("/stream_settings", methods=["GET", "POST"])
+def manage_stream_settings():
+    """API endpoint to read or change the MJPEG stream options (fps, scale, quality); applies to new viewers"""
+    if request.method == "POST":
+        data = request.json or {}
+        
+        def apply(settings):
+            options = settings["stream"]
+            if "fps" in data:
+                options["fps"] = min(30.0, max(0.1, float(data["fps"])))
+            if "scale" in data:
+                options["scale"] = min(1.0, max(0.05, float(data["scale"])))
+            if "quality" in data:
+                options["quality"] = min(100, max(10, int(data["quality"])))
+        
+        try:
+            settings_store.update(apply)
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid stream options"}), 400
+        logger.info("Stream options updated: {}", data)
+    
+    return jsonify({"options": settings_store.snapshot().to_dict()["stream"], "status": mjpeg_stream.status()})
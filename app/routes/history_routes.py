@@ -0,0 +1,64 @@
+import os
+import time
+import datetime
+from flask import request, jsonify
+
+from app.web import flask_app
+from app.config import log_dir
+from app.history.history_store import history_store
+from app.utils.logger import get_logger
+
+# Create a logger for this module
+logger = get_logger(__name__, os.path.join(log_dir, "routes.log"))
+
+def parse_time(value, default):
+    """Parse a unix timestamp or ISO 8601 string from a query parameter"""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+def parse_range():
+    """Read start/end (or hours back from end) from the query string; defaults to the last 24 h"""
+    end = parse_time(request.args.get("end"), time.time())
+    hours = float(request.args.get("hours", 24))
+    start = parse_time(request.args.get("start"), end - hours * 3600)
+    return start, end
+
+@flask_app.route("/history", methods=["GET"])
+def get_history():
+    """API endpoint to list text transitions in a time range"""
+    try:
+        start, end = parse_range()
+        limit = min(int(request.args.get("limit", 1000)), 10000)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400
+
+    region = request.args.get("region")
+    transitions = history_store.transitions(region, start, end, limit)
+    return jsonify({"start": start, "end": end, "region": region, "transitions": transitions})
+
+@flask_app.route("/history/durations", methods=["GET"])
+def get_history_durations():
+    """API endpoint to get seconds spent on each text per region in a time range"""
+    try:
+        start, end = parse_range()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400
+
+    region = request.args.get("region")
+    if region:
+        regions = [region]
+    else:
+        regions = [state["region"] for state in history_store.regions()]
+
+    durations = {name: history_store.durations(name, start, end) for name in regions}
+    logger.debug("History durations requested for {} region(s)", len(regions))
+    return jsonify({"start": start, "end": end, "durations": durations})
+
+@flask_app.route("/history/regions", methods=["GET"])
+def get_history_regions():
+    """API endpoint to get the current text of every region with history"""
+    return jsonify({"regions": history_store.regions()})
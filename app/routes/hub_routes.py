@@ -0,0 +1,9 @@
+from flask import jsonify
+
+from app.web import flask_app
+from app.hub.hub import hub
+
+@flask_app.route("/agents", methods=["GET"])
+def get_agents():
+    """API endpoint to list the agents of the hub (python app.py --hub) with their results, lag and metrics"""
+    return jsonify(hub.status())
@@ -1,99 +1,164 @@
 import os
-import json
-import pytesseract
-from PIL import Image, ImageDraw, ImageGrab
-import io
-import base64
+import math
+import shutil
 from flask import request, jsonify
 
-from app.config import flask_app, socketio, ocr_settings, ocr_results, settings_file, log_dir
+from app.web import flask_app, socketio
+from app.config import settings_store, ocr_results, log_dir
+from app.ocr.cascade import cascade_stats
+from app.ocr.mosaic import mosaic_stats
+from app.ocr.temporal import temporal_voters
+from app.ocr.text_detect import text_detect_stats
+from app.ocr.corpus import corpus_recorder
+from app.ocr.throughput import scan_throughput
+from app.ocr.watchdog import scan_supervisor
+from app.ocr.ocr_processor import latest_frame, highlighted_rendition
+from app.capture.frame_cache import frame_cache
+from app.routes.api import screenshot_response
+from app.utils.serving import run_blocking
+from app.utils.event_bus import event_bus
+from app.utils.socket_rooms import socket_rooms
+from app.ocr.profiles import PROFILE_PRESETS, VARIANTS, ALLOWED_PSMS, default_preset, resolve_profile, profile_error
+from app.utils.lazy_import import lazy_import
 from app.utils.logger import get_logger
 
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+
 # Create a logger for this module
 logger = get_logger(__name__, os.path.join(log_dir, "routes.log"))
 
 @flask_app.route("/ocr_settings", methods=["GET", "POST"])
 def manage_ocr_settings():
-    global ocr_settings
-    
     if request.method == "GET":
         logger.debug("OCR settings requested")
-        return jsonify(ocr_settings)
+        return jsonify(settings_store.snapshot().to_dict())
     
     elif request.method == "POST":
         data = request.json
-        ocr_settings["enabled"] = data.get("enabled", False)
-        ocr_settings["regions"] = data.get("regions", [])
         
-        # Save settings to file with proper indentation
         try:
-            with open(settings_file, 'w') as f:
-                json.dump(ocr_settings, f, indent=4)
-            logger.info("OCR settings saved successfully")
-        except Exception as e:
-            logger.error("Failed to save OCR settings: {}", str(e))
-            return jsonify({"error": f"Failed to save settings: {str(e)}"}), 500
+            workers = max(0, int(data["ocr_workers"])) if "ocr_workers" in data else None
+            watchdog = {key: max(0.0, float(value)) for key, value in (data.get("watchdog") or {}).items()}
+            if not all(math.isfinite(value) for value in watchdog.values()):
+                raise ValueError
+        except (TypeError, ValueError, AttributeError, OverflowError):
+            logger.warning("Invalid OCR settings: ocr_workers={}, watchdog={}", data.get("ocr_workers"), data.get("watchdog"))
+            return jsonify({"message": "ocr_workers must be an integer and watchdog values numbers",
+                            "settings": settings_store.snapshot().to_dict()}), 400
+        
+        def apply(settings):
+            settings["enabled"] = data.get("enabled", False)
+            settings["regions"] = data.get("regions", [])
+            if workers is not None:
+                settings["ocr_workers"] = workers
+            for key, value in watchdog.items():
+                if key in settings["watchdog"]:
+                    settings["watchdog"][key] = value
+        
+        # Publish a new settings version; it is saved to file in the background
+        snapshot, _ = settings_store.update(apply)
+        logger.info("OCR settings saved successfully")
         
         # Broadcast settings update via WebSocket
-        socketio.emit('settings_update', {'settings': ocr_settings})
+        settings = snapshot.to_dict()
+        socketio.emit('settings_update', {'settings': settings})
         
-        return jsonify({"message": "OCR settings saved successfully", "settings": ocr_settings})
+        return jsonify({"message": "OCR settings saved successfully", "settings": settings})
 
 @flask_app.route("/add_ocr_region", methods=["POST"])
 def add_ocr_region():
-    global ocr_settings
-    
     data = request.json
-    new_region = {
-        "x1": data.get("x1"),
-        "y1": data.get("y1"),
-        "x2": data.get("x2"),
-        "y2": data.get("y2"),
-        "name": data.get("name", f"Region {len(ocr_settings['regions']) + 1}")
-    }
+    profile = data.get("profile")
     
-    ocr_settings["regions"].append(new_region)
+    error = profile_error(profile) if profile else None
+    if error:
+        return jsonify({"message": error, "settings": settings_store.snapshot().to_dict()}), 400
     
-    # Save settings to file with proper indentation
-    try:
-        with open(settings_file, 'w') as f:
-            json.dump(ocr_settings, f, indent=4)
-        logger.info("Added new OCR region: {}", new_region['name'])
-    except Exception as e:
-        logger.error("Failed to save OCR region: {}", str(e))
-        return jsonify({"error": f"Failed to save region: {str(e)}"}), 500
+    def apply(settings):
+        name = data.get("name", f"Region {len(settings['regions']) + 1}")
+        new_region = {
+            "x1": data.get("x1"),
+            "y1": data.get("y1"),
+            "x2": data.get("x2"),
+            "y2": data.get("y2"),
+            "name": name,
+            "profile": profile or {"preset": default_preset(name)}
+        }
+        settings["regions"].append(new_region)
+        return new_region
+    
+    snapshot, new_region = settings_store.update(apply)
+    logger.info("Added new OCR region: {}", new_region['name'])
     
     # Broadcast settings update via WebSocket
-    socketio.emit('settings_update', {'settings': ocr_settings})
+    settings = snapshot.to_dict()
+    socketio.emit('settings_update', {'settings': settings})
     
-    return jsonify({"message": "OCR region added", "region": new_region, "settings": ocr_settings})
+    return jsonify({"message": "OCR region added", "region": new_region, "settings": settings})
 
 @flask_app.route("/delete_ocr_region", methods=["POST"])
 def delete_ocr_region():
-    global ocr_settings
+    data = request.json
+    index = data.get("index")
+    
+    def apply(settings):
+        if not isinstance(index, int) or not 0 <= index < len(settings["regions"]):
+            raise IndexError(index)
+        return settings["regions"].pop(index)
+    
+    try:
+        snapshot, removed = settings_store.update(apply)
+    except IndexError:
+        logger.warning("Invalid region index: {}", index)
+        return jsonify({"message": "Invalid region index", "settings": settings_store.snapshot().to_dict()}), 400
     
+    logger.info("Deleted OCR region: {}", removed['name'])
+    
+    # Broadcast settings update via WebSocket
+    settings = snapshot.to_dict()
+    socketio.emit('settings_update', {'settings': settings})
+    
+    return jsonify({"message": f"OCR region '{removed['name']}' deleted", "settings": settings})
+
+@flask_app.route("/update_ocr_region", methods=["POST"])
+def update_ocr_region():
+    """Replace the OCR profile of a region"""
     data = request.json
     index = data.get("index")
+    profile = data.get("profile")
     
-    if 0 <= index < len(ocr_settings["regions"]):
-        removed = ocr_settings["regions"].pop(index)
-        
-        # Save settings to file with proper indentation
-        try:
-            with open(settings_file, 'w') as f:
-                json.dump(ocr_settings, f, indent=4)
-            logger.info("Deleted OCR region: {}", removed['name'])
-        except Exception as e:
-            logger.error("Failed to save after deleting region: {}", str(e))
-            return jsonify({"error": f"Failed to save changes: {str(e)}"}), 500
-        
-        # Broadcast settings update via WebSocket
-        socketio.emit('settings_update', {'settings': ocr_settings})
-        
-        return jsonify({"message": f"OCR region '{removed['name']}' deleted", "settings": ocr_settings})
+    error = profile_error(profile)
+    if error:
+        return jsonify({"message": error, "settings": settings_store.snapshot().to_dict()}), 400
     
-    logger.warning("Invalid region index: {}", index)
-    return jsonify({"message": "Invalid region index", "settings": ocr_settings}), 400
+    def apply(settings):
+        if not isinstance(index, int) or not 0 <= index < len(settings["regions"]):
+            raise IndexError(index)
+        region = settings["regions"][index]
+        region["profile"] = profile
+        return region
+    
+    try:
+        snapshot, region = settings_store.update(apply)
+    except IndexError:
+        logger.warning("Invalid region index: {}", index)
+        return jsonify({"message": "Invalid region index", "settings": settings_store.snapshot().to_dict()}), 400
+    
+    logger.info("Updated OCR profile for region: {}", region['name'])
+    
+    # Broadcast settings update via WebSocket
+    settings = snapshot.to_dict()
+    socketio.emit('settings_update', {'settings': settings})
+    
+    return jsonify({"message": f"OCR profile for '{region['name']}' updated",
+                    "profile": resolve_profile(region, region['name']),
+                    "settings": settings})
+
+@flask_app.route("/ocr_profiles", methods=["GET"])
+def get_ocr_profiles():
+    """API endpoint to get the profile presets and the options profiles can use"""
+    return jsonify({"presets": PROFILE_PRESETS, "variants": list(VARIANTS), "psms": list(ALLOWED_PSMS)})
 
 @flask_app.route("/ocr_results", methods=["GET"])
 def get_ocr_results():
@@ -101,6 +166,30 @@ def get_ocr_results():
     logger.debug("OCR results requested")
     return jsonify(ocr_results)
 
+@flask_app.route("/ocr_stats", methods=["GET"])
+def get_ocr_stats():
+    """API endpoint to get per-region cascade statistics (budget exhaustion, attempt costs), mosaic, consensus, text detector, frame cache, throughput, watchdog counters, event subscriber lag and dashboard socket rooms"""
+    return jsonify({"regions": cascade_stats.summary(), "mosaic": mosaic_stats.summary(),
+                    "consensus": temporal_voters.summary(), "text_detect": text_detect_stats.summary(),
+                    "frame_cache": frame_cache.status(), "throughput": scan_throughput.snapshot(),
+                    "watchdog": scan_supervisor.status(), "events": event_bus.status(),
+                    "sockets": socket_rooms.status()})
+
+@flask_app.route("/record_corpus", methods=["GET", "POST"])
+def record_corpus():
+    """API endpoint to start or stop recording region crops into a replay corpus"""
+    if request.method == "POST":
+        data = request.json or {}
+        if data.get("enabled"):
+            try:
+                interval = max(0.0, float(data.get("interval", 1.0)))
+            except (TypeError, ValueError):
+                return jsonify({"message": "Invalid interval", **corpus_recorder.status()}), 400
+            corpus_recorder.start(min_interval=interval)
+        else:
+            corpus_recorder.stop()
+    return jsonify(corpus_recorder.status())
+
 @flask_app.route("/verify_tesseract", methods=["GET"])
 def verify_tesseract():
     """Endpoint to verify Tesseract installation and configuration"""
@@ -118,14 +207,15 @@ def verify_tesseract():
         tesseract_path = pytesseract.pytesseract.tesseract_cmd
         result["path"] = tesseract_path
         
-        if not os.path.exists(tesseract_path):
+        # A bare command name (the default outside Windows) is looked up on the PATH
+        if not os.path.exists(tesseract_path) and shutil.which(tesseract_path) is None:
             error_msg = f"Tesseract executable not found at: {tesseract_path}"
             logger.error(error_msg)
             result["error"] = error_msg
             return jsonify(result)
         
         # Try to get tesseract version
-        version_info = pytesseract.get_tesseract_version()
+        version_info = run_blocking(pytesseract.get_tesseract_version)
         result["version"] = str(version_info)
         result["installed"] = True
         logger.info("Tesseract verified - version: {}", version_info)
@@ -135,7 +225,7 @@ def verify_tesseract():
         
         # Test OCR functionality
         try:
-            pytesseract.image_to_string(test_img)
+            run_blocking(pytesseract.image_to_string, test_img)
             result["test_passed"] = True
             logger.info("OCR test passed")
         except Exception as e:
@@ -152,60 +242,14 @@ def verify_tesseract():
 
 @flask_app.route("/highlighted_screenshot", methods=["GET"])
 def get_highlighted_screenshot():
-    """Generate and return a screenshot with OCR regions highlighted"""
-    logger.debug("Generating highlighted screenshot")
+    """Return the latest frame of the screen (or of ?session=) with OCR regions highlighted"""
+    logger.debug("Highlighted screenshot requested")
     
     try:
-        # Take a screenshot
-        screenshot = ImageGrab.grab()
-        
-        # Create a copy for drawing
-        highlight_img = screenshot.copy()
-        draw = ImageDraw.Draw(highlight_img)
-        
-        # Draw rectangles for each region with labels
-        for i, region in enumerate(ocr_settings["regions"]):
-            region_name = region.get("name", f"Region {i+1}")
-            x1 = max(0, min(region["x1"], screenshot.width - 1))
-            y1 = max(0, min(region["y1"], screenshot.height - 1))
-            x2 = max(x1 + 1, min(region["x2"], screenshot.width))
-            y2 = max(y1 + 1, min(region["y2"], screenshot.height))
-            
-            # Draw rectangle with semi-transparent fill
-            draw.rectangle([x1, y1, x2, y2], 
-                          outline=(255, 0, 0), 
-                          fill=(255, 0, 0, 64), 
-                          width=2)
-            
-            # Draw region name
-            text_bg_width = len(region_name) * 7 + 4
-            draw.rectangle([x1, y1-20, x1+text_bg_width, y1], 
-                          fill=(0, 0, 0, 200))
-            draw.text((x1+2, y1-18), region_name, fill=(255, 255, 255))
-            
-            # Draw OCR result if available
-            if region_name in ocr_results:
-                result_text = ocr_results[region_name]
-                if not result_text.startswith("Error") and not result_text.startswith("Region too small"):
-                    # Truncate if too long
-                    if len(result_text) > 30:
-                        result_text = result_text[:27] + "..."
-                    
-                    # Draw result near the bottom of region
-                    text_bg_width = len(result_text) * 7 + 4
-                    draw.rectangle([x1, y2+2, x1+text_bg_width, y2+22], 
-                                  fill=(0, 0, 128, 200))
-                    draw.text((x1+2, y2+4), result_text, fill=(255, 255, 255))
-        
-        # Convert the image to bytes
-        img_byte_arr = io.BytesIO()
-        highlight_img.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-        
-        # Convert to base64 for displaying in browser
-        img_base64 = base64.b64encode(img_byte_arr).decode('utf-8')
-        
-        return jsonify({"screenshot": img_base64})
+        frame = run_blocking(latest_frame, request.args.get("session") or None)
+        if frame is None:
+            return jsonify({"error": "No frame captured yet"}), 404
+        return screenshot_response(*run_blocking(highlighted_rendition, frame))
     
     except Exception as e:
         error_msg = f"Error generating highlighted screenshot: {str(e)}"
@@ -0,0 +1,65 @@
+import os
+from flask import Response, request, jsonify, send_file
+
+from app.web import flask_app
+from app.config import log_dir
+from app.ocr.profiler import sampling_profiler, cycle_profiler, CycleProfiler, SCAN_THREADS, DEFAULT_INTERVAL
+from app.utils.serving import run_blocking
+from app.utils.logger import get_logger
+
+# Create a logger for this module
+logger = get_logger(__name__, os.path.join(log_dir, "routes.log"))
+
+@flask_app.route("/admin/profile", methods=["GET", "POST", "DELETE"])
+def manage_profiler():
+    """API endpoint to start (POST {"seconds", "interval_ms", "threads"}), stop (DELETE) or check the sampling profiler"""
+    if request.method == "POST":
+        data = request.json or {}
+        try:
+            seconds = float(data.get("seconds", 10))
+            interval = float(data.get("interval_ms", DEFAULT_INTERVAL * 1000)) / 1000
+            threads = data.get("threads") or SCAN_THREADS
+            if isinstance(threads, str):
+                threads = [threads]
+            if seconds <= 0 or interval <= 0 or not all(isinstance(name, str) and name for name in threads):
+                raise ValueError
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid profiler options", **sampling_profiler.status()}), 400
+        if not sampling_profiler.start(seconds, interval, threads):
+            return jsonify({"message": "The profiler is already running", **sampling_profiler.status()}), 409
+        logger.info("Sampling profiler started: {}", data)
+    elif request.method == "DELETE":
+        sampling_profiler.stop()
+    return jsonify(sampling_profiler.status())
+
+@flask_app.route("/admin/profile/stacks", methods=["GET"])
+def get_profile_stacks():
+    """Collapsed stacks of the current or last sampling run, for flamegraph.pl or speedscope"""
+    return Response(sampling_profiler.collapsed(), mimetype="text/plain")
+
+@flask_app.route("/admin/profile/cycles", methods=["GET", "POST"])
+def manage_cycle_profiles():
+    """API endpoint to profile the next scan cycles with cProfile (POST {"cycles": n}) and list the dumps"""
+    if request.method == "POST":
+        data = request.json or {}
+        try:
+            cycles = int(data.get("cycles", 1))
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid cycle count", **cycle_profiler.status()}), 400
+        cycle_profiler.arm(cycles)
+    return jsonify(cycle_profiler.status())
+
+@flask_app.route("/admin/profile/cycles/<name>", methods=["GET"])
+def get_cycle_profile(name):
+    """A cycle's cProfile dump, or its top functions as text with ?format=text (&sort=tottime)"""
+    path = cycle_profiler.path(name)
+    if path is None:
+        return jsonify({"message": f"No cycle profile named {name}"}), 404
+    if request.args.get("format") == "text":
+        sort = request.args.get("sort", "cumulative")
+        try:
+            report = run_blocking(CycleProfiler.report, path, sort)
+        except KeyError:
+            return jsonify({"message": f"Invalid sort key {sort}"}), 400
+        return Response(report, mimetype="text/plain")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=name)
@@ -0,0 +1,127 @@
+import os
+from flask import request, jsonify
+
+from app.web import flask_app, socketio
+from app.config import settings_store, ocr_results, log_dir
+from app.capture.sources import SOURCE_TYPES, list_monitors
+from app.capture.frame_cache import frame_cache
+from app.ocr.sessions import session_manager, find_session, validate_session, SESSION_STATES, MAIN_SESSION
+from app.utils.serving import run_blocking
+from app.utils.logger import get_logger
+
+# Create a logger for this module
+logger = get_logger(__name__, os.path.join(log_dir, "routes.log"))
+
+# Control actions and the session state they set
+SESSION_ACTIONS = {"start": "running", "pause": "paused", "stop": "stopped"}
+
+def session_results(name):
+    """Latest results of a session's regions, keyed by region name"""
+    prefix = f"{name}/"
+    return {key[len(prefix):]: text for key, text in list(ocr_results.items()) if key.startswith(prefix)}
+
+def describe_sessions(settings):
+    sessions = []
+    for session in settings.to_dict()["sessions"]:
+        session["status"] = session_manager.status(session["name"])
+        session["results"] = session_results(session["name"])
+        sessions.append(session)
+    return {
+        "sessions": sessions,
+        "main": session_manager.status(MAIN_SESSION),
+        "session_workers": settings["session_workers"],
+    }
+
+def broadcast(snapshot):
+    socketio.emit('settings_update', {'settings': snapshot.to_dict()})
+
+@flask_app.route("/sessions", methods=["GET", "POST"])
+def manage_sessions():
+    """API endpoint to list capture sessions, or to add or replace one"""
+    if request.method == "POST":
+        data = request.json or {}
+
+        if "session_workers" in data:
+            try:
+                workers = max(1, int(data["session_workers"]))
+            except (TypeError, ValueError):
+                return jsonify({"message": "Invalid session_workers"}), 400
+            settings_store.update(lambda settings: settings.update(session_workers=workers))
+            if "name" not in data:
+                return jsonify(describe_sessions(settings_store.snapshot()))
+
+        try:
+            session = validate_session(data, SOURCE_TYPES)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        def apply(settings):
+            sessions = [s for s in settings["sessions"] if s["name"] != session["name"]]
+            sessions.append(session)
+            settings["sessions"] = sessions
+
+        snapshot, _ = settings_store.update(apply)
+        logger.info("Capture session saved: {} ({})", session["name"], session["source"]["type"])
+        broadcast(snapshot)
+
+    return jsonify(describe_sessions(settings_store.snapshot()))
+
+@flask_app.route("/sessions/<name>", methods=["DELETE"])
+def delete_session(name):
+    """API endpoint to remove a capture session and its results"""
+    def apply(settings):
+        if find_session(settings, name) is None:
+            raise KeyError(name)
+        settings["sessions"] = [s for s in settings["sessions"] if s["name"] != name]
+
+    try:
+        snapshot, _ = settings_store.update(apply)
+    except KeyError:
+        return jsonify({"message": f"Unknown session '{name}'"}), 404
+
+    for key in list(session_results(name)):
+        ocr_results.pop(f"{name}/{key}", None)
+    frame_cache.drop(name)
+    logger.info("Capture session deleted: {}", name)
+    broadcast(snapshot)
+    return jsonify(describe_sessions(snapshot))
+
+@flask_app.route("/sessions/<name>/control", methods=["POST"])
+def control_session(name):
+    """API endpoint to start, pause or stop one capture session"""
+    action = (request.json or {}).get("action")
+    state = SESSION_ACTIONS.get(action)
+    if state is None:
+        return jsonify({"message": f"action must be one of {tuple(SESSION_ACTIONS)}"}), 400
+
+    def apply(settings):
+        for session in settings["sessions"]:
+            if session["name"] == name:
+                session["state"] = state
+                return
+        raise KeyError(name)
+
+    try:
+        snapshot, _ = settings_store.update(apply)
+    except KeyError:
+        return jsonify({"message": f"Unknown session '{name}'"}), 404
+
+    logger.info("Capture session {} is now {}", name, state)
+    broadcast(snapshot)
+    return jsonify({"name": name, "state": state, "states": list(SESSION_STATES)})
+
+@flask_app.route("/sessions/<name>/results", methods=["GET"])
+def get_session_results(name):
+    """API endpoint to get the latest OCR results of one capture session"""
+    if find_session(settings_store.snapshot(), name) is None:
+        return jsonify({"message": f"Unknown session '{name}'"}), 404
+    return jsonify(session_results(name))
+
+@flask_app.route("/monitors", methods=["GET"])
+def get_monitors():
+    """API endpoint to list the monitors a session can capture"""
+    try:
+        return jsonify({"monitors": [list(box) for box in run_blocking(list_monitors)]})
+    except Exception as e:
+        logger.error("Error listing monitors: {}", str(e))
+        return jsonify({"message": str(e)}), 500
@@ -1,12 +1,60 @@
-from PIL import ImageGrab
 import os
-from app.config import socketio, ocr_results, status_file
-from app.ocr.ocr_processor import generate_highlighted_screenshot
-from flask_socketio import emit
+from flask import request
+from app.web import socketio
+from app.config import ocr_results, status_file
+from app.ocr.ocr_processor import latest_frame, highlighted_rendition
+from app.utils.serving import run_blocking
+from app.utils.socket_rooms import socket_rooms, STREAMS, DEFAULT_STREAMS
+from flask_socketio import emit, join_room, leave_room
+
+def subscribe_client(data):
+    """
+    Move the client into the rooms of a subscription
+    
+    Args:
+        data (dict): {"streams": [...], "regions": [...], "session": name}, all optional
+        
+    Returns:
+        str: An error message, or None once subscribed
+    """
+    if not isinstance(data, dict):
+        return "a subscription is an object"
+    streams = data.get("streams", list(DEFAULT_STREAMS))
+    regions = data.get("regions") or []
+    session = data.get("session") or None
+    if not isinstance(streams, list) or any(stream not in STREAMS for stream in streams):
+        return f"streams must be a list of {', '.join(STREAMS)}"
+    if not isinstance(regions, list) or not all(isinstance(region, str) for region in regions):
+        return "regions must be a list of region names"
+    if session is not None and not isinstance(session, str):
+        return "session must be a session name"
+    
+    join, leave = socket_rooms.set(request.sid, streams, regions, session)
+    for room in join:
+        join_room(room)
+    for room in leave:
+        leave_room(room)
+    return None
+
+def send_current_state():
+    """Send the client what it subscribed to, without waiting for the next cycle"""
+    subscription = socket_rooms.subscription(request.sid)
+    if "results" in subscription["streams"]:
+        emit('ocr_update', {'results': socket_rooms.filter_results(ocr_results, subscription["regions"])})
+    
+    # Send the latest highlighted frame (shared with every other client)
+    if "preview" in subscription["streams"]:
+        try:
+            frame = run_blocking(latest_frame, subscription["session"])
+            if frame is not None:
+                _, highlighted_screenshot = run_blocking(highlighted_rendition, frame)
+                emit('screenshot_update', {'screenshot': highlighted_screenshot, 'session': subscription["session"]})
+        except Exception as e:
+            print(f"Error sending initial screenshot: {str(e)}")
 
 @socketio.on('connect')
-def handle_connect():
-    """Handle WebSocket client connection"""
+def handle_connect(auth=None):
+    """Handle WebSocket client connection (auth may carry {"subscribe": {...}}, see handle_subscribe)"""
     print('Client connected')
     
     # Get the current status from the status file if it exists
@@ -21,21 +69,30 @@ def handle_connect():
         except Exception as e:
             print(f"Error reading status file: {str(e)}")
     
+    # Clients that do not say what they watch get the results and the main screen's preview
+    error = subscribe_client((auth.get("subscribe") if isinstance(auth, dict) else None) or {})
+    if error:
+        emit('error', {'message': f"Invalid subscription: {error}"})
+        subscribe_client({})
+    
     # Send current status and data to the newly connected client
     emit('status_update', {'status': current_status})
-    emit('ocr_update', {'results': ocr_results})
-    
-    # If we have regions defined, send a screenshot
-    try:
-        screenshot = ImageGrab.grab()
-        highlighted_screenshot = generate_highlighted_screenshot(screenshot)
-        emit('screenshot_update', {'screenshot': highlighted_screenshot})
-    except Exception as e:
-        print(f"Error sending initial screenshot: {str(e)}")
+    send_current_state()
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Replace the client's streams ("results", "preview", "perf"), regions and preview session"""
+    error = subscribe_client(data or {})
+    if error:
+        emit('error', {'message': f"Invalid subscription: {error}"})
+        return
+    emit('subscribed', socket_rooms.subscription(request.sid))
+    send_current_state()
 
 @socketio.on('disconnect')
-def handle_disconnect():
+def handle_disconnect(reason=None):
     """Handle WebSocket client disconnection"""
+    socket_rooms.drop(request.sid)
     print('Client disconnected')
 
 @socketio.on('request_status')
@@ -55,16 +112,21 @@ def handle_request_status():
     emit('status_update', {'status': current_status})
 
 @socketio.on('request_screenshot')
-def handle_request_screenshot():
-    """Generate and send a new screenshot to client"""
+def handle_request_screenshot(data=None):
+    """Send the latest highlighted frame of the screen (or of data["session"]) to client"""
+    session = (data or {}).get("session") or None
     try:
-        screenshot = ImageGrab.grab()
-        highlighted_screenshot = generate_highlighted_screenshot(screenshot)
-        emit('screenshot_update', {'screenshot': highlighted_screenshot})
+        frame = run_blocking(latest_frame, session)
+        if frame is None:
+            emit('error', {'message': f"No frame captured yet for session {session}"})
+            return
+        _, highlighted_screenshot = run_blocking(highlighted_rendition, frame)
+        emit('screenshot_update', {'screenshot': highlighted_screenshot, 'session': session})
     except Exception as e:
         emit('error', {'message': f"Error generating screenshot: {str(e)}"})
 
 @socketio.on('request_ocr_results')
 def handle_request_ocr_results():
-    """Send current OCR results to client"""
-    emit('ocr_update', {'results': ocr_results})
\ No newline at end of file
+    """Send current OCR results to client (only its regions when it subscribed to some)"""
+    subscription = socket_rooms.subscription(request.sid)
+    emit('ocr_update', {'results': socket_rooms.filter_results(ocr_results, subscription and subscription["regions"])})
\ No newline at end of file
@@ -1,37 +1,38 @@
-import os
-import json
 import datetime
-import requests
 from flask import request, jsonify
 
-from app.config import flask_app, socketio, ocr_settings, settings_file
+from app.web import flask_app, socketio
+from app.config import settings_store
+from app.utils.lazy_import import lazy_import
+
+requests = lazy_import("requests")
 
 @flask_app.route("/webhook_settings", methods=["GET", "POST"])
 def manage_webhook_settings():
-    global ocr_settings
-    
     if request.method == "GET":
-        return jsonify(ocr_settings["webhook"])
+        return jsonify(settings_store.snapshot().to_dict()["webhook"])
     
     elif request.method == "POST":
         data = request.json
-        ocr_settings["webhook"]["enabled"] = data.get("enabled", False)
-        ocr_settings["webhook"]["url"] = data.get("url", "")
-        ocr_settings["webhook"]["biome_notifications"] = data.get("biome_notifications", True)
-        ocr_settings["webhook"]["user_id"] = data.get("user_id", "")
         
-        # Handle keywords
-        if "keywords" in data:
-            ocr_settings["webhook"]["keywords"] = data["keywords"]
+        def apply(settings):
+            settings["webhook"]["enabled"] = data.get("enabled", False)
+            settings["webhook"]["url"] = data.get("url", "")
+            settings["webhook"]["biome_notifications"] = data.get("biome_notifications", True)
+            settings["webhook"]["user_id"] = data.get("user_id", "")
+            
+            # Handle keywords
+            if "keywords" in data:
+                settings["webhook"]["keywords"] = data["keywords"]
         
-        # Save settings to file with proper indentation
-        with open(settings_file, 'w') as f:
-            json.dump(ocr_settings, f, indent=4)
+        # Publish a new settings version; it is saved to file in the background
+        snapshot, _ = settings_store.update(apply)
+        webhook = snapshot.to_dict()["webhook"]
         
         # Broadcast settings update via WebSocket
-        socketio.emit('webhook_update', {'webhook': ocr_settings["webhook"]})
+        socketio.emit('webhook_update', {'webhook': webhook})
         
-        return jsonify({"message": "Webhook settings saved successfully", "webhook": ocr_settings["webhook"]})
+        return jsonify({"message": "Webhook settings saved successfully", "webhook": webhook})
 
 @flask_app.route("/test_webhook", methods=["POST"])
 def test_webhook():
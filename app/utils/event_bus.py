@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from collections import deque
+
+from app.config import log_dir
+from app.utils.logger import get_logger
+
+# Create a logger for the event bus
+logger = get_logger(__name__, os.path.join(log_dir, "app.log"))
+
+# What a full subscriber queue does with a new event
+DROP_OLDEST = "drop_oldest"  # Discard the oldest queued event (consumers that only care about the latest state)
+DROP_NEWEST = "drop_newest"  # Discard the new event (consumers that must see events in a gapless prefix)
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+class Subscription:
+    """
+    One consumer of the bus: a bounded queue and the thread that drains it.
+
+    offer() never blocks the publisher: when the queue is full the overflow
+    policy drops an event and counts it; events dropped by DROP_NEWEST are
+    also logged, since their consumers lose a transition. The lag of an event is the time it
+    waited in the queue before the handler got it.
+    """
+
+    def __init__(self, name, event_types, handler, maxsize, overflow):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.name = name
+        self.event_types = tuple(event_types)
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.overflow = overflow
+        self.queue = deque()  # (queued at, event)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.handler_seconds = 0.0
+        self.thread = threading.Thread(target=self._run, name=f"events-{name}", daemon=True)
+        self.thread.start()
+
+    def offer(self, event):
+        with self.condition:
+            if len(self.queue) < self.maxsize or self.overflow == DROP_OLDEST:
+                if len(self.queue) >= self.maxsize:
+                    self.dropped += 1
+                    self.queue.popleft()
+                self.queue.append((time.monotonic(), event))
+                self.condition.notify()
+                return
+            self.dropped += 1
+            dropped = self.dropped
+        logger.warning("Event subscriber {} is full, dropped {} ({} dropped so far)",
+                       self.name, type(event).__name__, dropped)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                queued, event = self.queue.popleft()
+            started = time.monotonic()
+            try:
+                self.handler(event)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Event subscriber {} failed on {}: {}", self.name, type(event).__name__, str(e))
+            finished = time.monotonic()
+            with self.condition:
+                self.delivered += 1
+                self.last_lag = started - queued
+                self.max_lag = max(self.max_lag, self.last_lag)
+                self.handler_seconds += finished - started
+
+    def status(self):
+        now = time.monotonic()
+        with self.condition:
+            return {
+                "events": [event_type.__name__ for event_type in self.event_types],
+                "overflow": self.overflow,
+                "maxsize": self.maxsize,
+                "queued": len(self.queue),
+                "lag_ms": round((now - self.queue[0][0]) * 1000, 1) if self.queue else 0.0,
+                "last_lag_ms": round(self.last_lag * 1000, 1),
+                "max_lag_ms": round(self.max_lag * 1000, 1),
+                "handler_ms": round(self.handler_seconds * 1000 / self.delivered, 2) if self.delivered else 0.0,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+class EventBus:
+    """
+    In-process publish/subscribe with typed events.
+
+    The scan loop publishes events (app/ocr/events.py) and returns at once;
+    webhooks, history, Socket.IO emits and screenshot rendering consume them
+    on their own subscriber threads, so a slow consumer only delays itself.
+    Events are delivered by exact type, in publishing order per subscriber.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}  # name -> Subscription
+        self.routes = {}  # event type -> tuple of subscriptions, replaced whole on change
+
+    def subscribe(self, name, event_types, handler, maxsize=100, overflow=DROP_OLDEST):
+        """Start a subscriber thread calling handler(event) for every published event of event_types"""
+        with self.lock:
+            if name in self.subscriptions:
+                raise ValueError(f"Event subscriber {name} already exists")
+            subscription = Subscription(name, event_types, handler, maxsize, overflow)
+            self.subscriptions[name] = subscription
+            self._route()
+        return subscription
+
+    def unsubscribe(self, name):
+        with self.lock:
+            subscription = self.subscriptions.pop(name, None)
+            self._route()
+        if subscription is not None:
+            subscription.close()
+
+    def _route(self):
+        routes = {}
+        for subscription in self.subscriptions.values():
+            for event_type in subscription.event_types:
+                routes[event_type] = routes.get(event_type, ()) + (subscription,)
+        self.routes = routes
+
+    def subscribed(self, event_type):
+        """True if anyone consumes event_type; lets publishers skip building events nobody reads"""
+        return event_type in self.routes
+
+    def publish(self, event):
+        """Queue event for its subscribers; never blocks"""
+        for subscription in self.routes.get(type(event), ()):
+            subscription.offer(event)
+
+    def status(self):
+        with self.lock:
+            subscriptions = list(self.subscriptions.values())
+        return {subscription.name: subscription.status() for subscription in subscriptions}
+
+# Shared bus published to by the scan loop and consumed by the subscribers in app/ocr/consumers.py
+event_bus = EventBus()
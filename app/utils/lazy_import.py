@@ -0,0 +1,45 @@
+import importlib
+import threading
+
+_hooks = {}  # module name -> callbacks run once, when a lazy module first loads it
+_lock = threading.Lock()
+
+def when_imported(name, hook):
+    """Call hook(module) when `name` is first loaded through a LazyModule"""
+    with _lock:
+        _hooks.setdefault(name, []).append(hook)
+
+def load(name):
+    """Import a module now and run its when_imported hooks (at most once)"""
+    module = importlib.import_module(name)
+    if _hooks:
+        with _lock:
+            for hook in _hooks.pop(name, ()):
+                hook(module)
+    return module
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    `np = lazy_import("numpy")` keeps the usual `np.asarray(...)` call sites
+    but moves the import from startup to the first call that needs it, so
+    the web server answers before numpy, OpenCV, PIL or pytesseract are loaded.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = load(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -1,7 +1,13 @@
 import os
 import sys
+import glob
+import gzip
+import shutil
+import time
+import queue
+import atexit
 import datetime
-import inspect
+import threading
 import traceback
 from enum import Enum
 from typing import Optional
@@ -12,12 +18,276 @@ class LogLevel(Enum):
     ERROR = 3
     DEBUG = 4
 
+# ANSI colors used for console output, keyed by level
+_CONSOLE_COLORS = {
+    LogLevel.WARNING: "\033[93m",  # Yellow
+    LogLevel.ERROR: "\033[91m",    # Red
+    LogLevel.DEBUG: "\033[90m",    # Gray
+}
+
+# Writer thread tuning
+QUEUE_SIZE = 10000       # Records buffered before new records are dropped
+FLUSH_INTERVAL = 0.5     # Seconds between file flushes
+MAX_BATCH = 500          # Maximum records written per batch
+
+# Log rotation settings, read on every write so they can be changed at runtime
+ROTATE_MAX_BYTES = 10 * 1024 * 1024  # Roll over once a file reaches this size (0 disables)
+ROTATE_DAILY = True                  # Roll over when the local date changes
+ROTATE_BACKUP_COUNT = 14             # Archived segments kept per log file
+
+class _Compressor:
+    """Background thread that gzips rotated log segments and enforces retention"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, rotated_path, base_path):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="log-compressor")
+                self.thread.daemon = True
+                self.thread.start()
+        self.queue.put((rotated_path, base_path))
+
+    def _run(self):
+        while True:
+            rotated_path, base_path = self.queue.get()
+            try:
+                with open(rotated_path, 'rb') as src, gzip.open(rotated_path + ".gz", 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(rotated_path)
+            except Exception as e:
+                print(f"Failed to compress log segment {rotated_path}: {str(e)}")
+            self._enforce_retention(base_path)
+
+    @staticmethod
+    def _enforce_retention(base_path):
+        archives = sorted(glob.glob(glob.escape(base_path) + ".*.gz"), key=_segment_key)
+        for path in archives[:max(0, len(archives) - ROTATE_BACKUP_COUNT)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _segment_key(path):
+    """Sort key (date, sequence) for a rotated segment named <name>.<date>.<n>[.gz]"""
+    name = os.path.basename(path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    parts = name.rsplit(".", 2)
+    try:
+        return parts[-2], int(parts[-1])
+    except (IndexError, ValueError):
+        return "", 0
+
+_compressor = _Compressor()
+
+class _RotatingFile:
+    """
+    Append-mode log file that rolls over by size and/or day.
+
+    Rotated segments are renamed to ``<name>.<date>.<n>`` and compressed by the
+    compressor thread, so the writer thread only pays for a rename.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, 'a', encoding='utf-8')
+        self.size = self.handle.tell()
+        if self.size:
+            self.day = datetime.date.fromtimestamp(os.path.getmtime(path))
+        else:
+            self.day = datetime.date.today()
+
+    def write(self, text):
+        data_size = len(text.encode('utf-8'))
+        today = datetime.date.today()
+        if self.size and ((ROTATE_DAILY and today != self.day) or
+                          (ROTATE_MAX_BYTES and self.size + data_size > ROTATE_MAX_BYTES)):
+            self._rollover()
+        self.day = today
+        self.handle.write(text)
+        self.size += data_size
+
+    def _rollover(self):
+        self.handle.close()
+        # Continue the day's sequence so segment names always sort chronologically
+        prefix = f"{self.path}.{self.day.isoformat()}."
+        existing = [_segment_key(path)[1] for path in glob.glob(glob.escape(prefix) + "*")]
+        rotated_path = f"{prefix}{max(existing, default=0) + 1}"
+        try:
+            os.replace(self.path, rotated_path)
+            _compressor.submit(rotated_path, self.path)
+        except OSError as e:
+            print(f"Failed to rotate log file {self.path}: {str(e)}")
+        self.handle = open(self.path, 'a', encoding='utf-8')
+        self.size = self.handle.tell()
+
+    def flush(self):
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+# Open log files by absolute path: loggers writing to the same file share one
+# _RotatingFile, so a rollover is never hidden from another logger's handle
+_files = {}  # absolute path -> [_RotatingFile, number of loggers using it]
+_files_lock = threading.Lock()
+
+def _open_log_file(path):
+    """Return the shared _RotatingFile for path, opening it on first use"""
+    key = os.path.abspath(path)
+    with _files_lock:
+        entry = _files.get(key)
+        if entry is None:
+            entry = _files[key] = [_RotatingFile(key), 0]
+        entry[1] += 1
+        return entry[0]
+
+def _release_log_file(file_handle):
+    """Close a shared _RotatingFile once the last logger using it is gone"""
+    with _files_lock:
+        entry = _files.get(file_handle.path)
+        if entry is None or entry[0] is not file_handle:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del _files[file_handle.path]
+            file_handle.close()
+
+class _LogWriter:
+    """
+    Background thread that formats queued log records and writes them in batches.
+
+    Loggers only enqueue raw records, so the calling thread never waits on
+    message formatting, console output or disk I/O.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # Serializes the writer thread and wait()
+        self.dirty = set()  # File handles written since the last flush
+
+    def start(self):
+        """Start the writer thread if it is not already running"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="log-writer")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def submit(self, record):
+        """Queue a record without blocking; drop it if the queue is full"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, FLUSH_INTERVAL - (time.monotonic() - last_flush))
+            try:
+                batch = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+
+            # Drain whatever else is already waiting
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # A None record is the shutdown sentinel
+            records = [record for record in batch if record is not None]
+            stopping = len(records) != len(batch)
+
+            with self.write_lock:
+                if records:
+                    self._write_batch(records)
+
+                if stopping or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                    self._flush()
+                    last_flush = time.monotonic()
+
+            for _ in batch:
+                self.queue.task_done()
+
+    def _write_batch(self, batch):
+        console_lines = []
+        file_lines = {}
+
+        with self.lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            console_lines.append(f"{_CONSOLE_COLORS[LogLevel.WARNING]}[logger] {dropped} log record(s) dropped, queue full\033[0m")
+
+        for logger, level, created, caller, message, args, kwargs in batch:
+            log_message = logger._format(level, created, caller, message, args, kwargs)
+
+            if logger.console_output:
+                color = _CONSOLE_COLORS.get(level)
+                console_lines.append(f"{color}{log_message}\033[0m" if color else log_message)
+
+            if logger.file_handle:
+                file_lines.setdefault(logger.file_handle, []).append(log_message)
+
+        if console_lines:
+            try:
+                sys.stdout.write("\n".join(console_lines) + "\n")
+                sys.stdout.flush()
+            except Exception:
+                pass
+
+        for handle, lines in file_lines.items():
+            try:
+                handle.write("\n".join(lines) + "\n")
+                self.dirty.add(handle)
+            except Exception as e:
+                print(f"Failed to write to log file: {str(e)}")
+
+    def _flush(self):
+        for handle in self.dirty:
+            try:
+                handle.flush()
+            except Exception:
+                pass
+        self.dirty.clear()
+
+    def wait(self):
+        """Block until every queued record has been written and flushed"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+        with self.write_lock:
+            self._flush()
+
+    def shutdown(self):
+        """Stop the writer thread after it has written everything still queued"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+_writer = _LogWriter()
+atexit.register(_writer.shutdown)
+
 class Logger:
     """
     Custom logger implementation with support for different log levels and output destinations.
+
+    Records are handed to a shared background writer thread. Message formatting
+    happens on that thread, so arguments should not be mutated after logging.
     """
     
-    def __init__(self, name: str, log_file: Optional[str] = None, level: LogLevel = LogLevel.INFO, console_output: bool = True):
+    def __init__(self, name: str, log_file: Optional[str] = None, level: LogLevel = LogLevel.INFO,
+                 console_output: bool = True, include_caller: bool = False):
         """
         Initialize a new Logger instance.
         
@@ -26,33 +296,51 @@ class Logger:
             log_file: Optional path to a log file
             level: Minimum log level to record
             console_output: Whether to output logs to console
+            include_caller: Whether to resolve and log the caller's file and line number
         """
         self.name = name
         self.level = level
         self.console_output = console_output
+        self.include_caller = include_caller
         self.log_file = log_file
         self.file_handle = None
         
         if log_file:
             os.makedirs(os.path.dirname(log_file), exist_ok=True)
             try:
-                self.file_handle = open(log_file, 'a', encoding='utf-8')
+                self.file_handle = _open_log_file(log_file)
             except Exception as e:
                 print(f"Failed to open log file {log_file}: {str(e)}")
+        
+        _writer.start()
     
     def __del__(self):
         """Close file handle when logger is destroyed"""
         if self.file_handle:
             try:
-                self.file_handle.close()
+                _release_log_file(self.file_handle)
             except:
                 pass
     
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        """Check whether a message at the given level would be recorded"""
+        return level.value >= self.level.value
+    
     def _log(self, level: LogLevel, message: str, *args, **kwargs):
         """Internal logging method"""
         if level.value < self.level.value:
             return
         
+        # Caller lookup is the only frame access and is opt-in
+        caller = None
+        if self.include_caller:
+            frame = sys._getframe(2)
+            caller = (os.path.basename(frame.f_code.co_filename), frame.f_lineno)
+        
+        _writer.submit((self, level, time.time(), caller, message, args, kwargs))
+    
+    def _format(self, level, created, caller, message, args, kwargs):
+        """Build the final log line; runs on the writer thread"""
         # Format the message with args and kwargs if provided
         if args or kwargs:
             try:
@@ -60,35 +348,12 @@ class Logger:
             except Exception as e:
                 message = f"{message} (Format Error: {str(e)})"
         
-        # Get caller information
-        frame = inspect.currentframe().f_back.f_back
-        filename = os.path.basename(frame.f_code.co_filename)
-        lineno = frame.f_lineno
-        
-        # Create the log entry
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        level_name = level.name
-        log_message = f"[{timestamp}] [{level_name}] [{self.name}:{filename}:{lineno}] {message}"
-        
-        # Output to console if enabled
-        if self.console_output:
-            # Use different colors for different log levels
-            if level == LogLevel.INFO:
-                print(log_message)
-            elif level == LogLevel.WARNING:
-                print(f"\033[93m{log_message}\033[0m")  # Yellow
-            elif level == LogLevel.ERROR:
-                print(f"\033[91m{log_message}\033[0m")  # Red
-            elif level == LogLevel.DEBUG:
-                print(f"\033[90m{log_message}\033[0m")  # Gray
-        
-        # Write to log file if available
-        if self.file_handle:
-            try:
-                self.file_handle.write(log_message + "\n")
-                self.file_handle.flush()
-            except Exception as e:
-                print(f"Failed to write to log file: {str(e)}")
+        timestamp = datetime.datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        if caller:
+            source = f"{self.name}:{caller[0]}:{caller[1]}"
+        else:
+            source = self.name
+        return f"[{timestamp}] [{level.name}] [{source}] {message}"
     
     def info(self, message: str, *args, **kwargs):
         """Log an INFO level message"""
@@ -108,14 +373,22 @@ class Logger:
     
     def exception(self, message: str, *args, exc_info=True, **kwargs):
         """Log an exception with traceback"""
+        if LogLevel.ERROR.value < self.level.value:
+            return
+        # The traceback must be captured on the calling thread
         exc_text = traceback.format_exc() if exc_info else ""
         self._log(LogLevel.ERROR, f"{message}\n{exc_text}", *args, **kwargs)
+    
+    def flush(self):
+        """Block until all queued records have been written"""
+        _writer.wait()
 
 
 # Create a module-level function to get or create loggers
 _loggers = {}
 
-def get_logger(name: str = None, log_file: Optional[str] = None, level: LogLevel = LogLevel.INFO):
+def get_logger(name: str = None, log_file: Optional[str] = None, level: LogLevel = LogLevel.INFO,
+               include_caller: bool = False):
     """
     Get or create a logger instance
     
@@ -123,13 +396,14 @@ def get_logger(name: str = None, log_file: Optional[str] = None, level: LogLevel
         name: The name of the logger (defaults to the module name if not provided)
         log_file: Optional path to log file
         level: Minimum log level to record
+        include_caller: Whether to resolve and log the caller's file and line number
         
     Returns:
         Logger: A logger instance
     """
     if name is None:
         # Get the caller's module name if name not provided
-        frame = inspect.currentframe().f_back
+        frame = sys._getframe(1)
         name = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
     
     # Return existing logger if it exists
@@ -137,7 +411,7 @@ def get_logger(name: str = None, log_file: Optional[str] = None, level: LogLevel
         return _loggers[name]
     
     # Create new logger
-    logger = Logger(name, log_file, level)
+    logger = Logger(name, log_file, level, include_caller=include_caller)
     _loggers[name] = logger
     return logger
 
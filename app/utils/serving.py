@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import deque
+
+# "debug": Werkzeug with the reloader, one thread per request.
+# "production": gevent's event loop with WebSocket transport (app.py --production).
+SERVER_MODES = ("debug", "production")
+SERVER_MODE = os.environ.get("KEMAC_SERVER_MODE", "debug")
+
+def cooperative():
+    """True when requests run as greenlets on an event loop and must not block"""
+    return SERVER_MODE == "production"
+
+def async_mode():
+    """Flask-SocketIO async_mode for the server mode"""
+    return "gevent" if cooperative() else "threading"
+
+def run_blocking(function, *args):
+    """
+    Call function(*args) from a request without blocking the event loop
+
+    In production mode the call runs on one of gevent's native worker threads
+    while the calling greenlet waits; in debug mode it is a plain call. Use it
+    for captures and image encoding; the function must not touch gevent objects.
+    """
+    if cooperative():
+        import gevent
+        return gevent.get_hub().threadpool.apply(function, args)
+    return function(*args)
+
+class EmitBridge:
+    """
+    socketio.emit for the scan threads.
+
+    The web app attaches its SocketIO server (app/web.py); until then (and in
+    the headless runner, which never imports the web app) emits are dropped
+    and the scan loop skips the work that only feeds them.
+
+    The scan loop runs on real OS threads so CPU-bound OCR never stalls the
+    server. In production mode the server's queues belong to gevent's loop
+    in the main thread and must not be touched from other threads, so events
+    from those threads are queued and handed over through an async watcher,
+    the one gevent object that may be signalled from any thread.
+    """
+
+    def __init__(self):
+        self.socketio = None
+        self.pending = deque()
+        self.watcher = None
+        self.loop_thread = None
+
+    def attach(self, socketio):
+        self.socketio = socketio
+
+    @property
+    def attached(self):
+        return self.socketio is not None
+
+    def start(self):
+        """Attach to the event loop; call from the thread that will run the server"""
+        if not cooperative():
+            return
+        import gevent
+        self.loop_thread = threading.get_ident()
+        self.watcher = gevent.get_hub().loop.async_()
+        self.watcher.start(lambda: gevent.spawn(self._drain))
+
+    def emit(self, event, data, **kwargs):
+        if self.socketio is None:
+            return
+        if self.watcher is None or threading.get_ident() == self.loop_thread:
+            self.socketio.emit(event, data, **kwargs)
+            return
+        self.pending.append((event, data, kwargs))
+        self.watcher.send()
+
+    def _drain(self):
+        while self.pending:
+            event, data, kwargs = self.pending.popleft()
+            try:
+                self.socketio.emit(event, data, **kwargs)
+            except Exception as e:
+                print(f"Failed to emit {event}: {str(e)}")
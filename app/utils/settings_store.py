@@ -0,0 +1,164 @@
+import os
+import json
+import copy
+import atexit
+import threading
+from types import MappingProxyType
+
+# Seconds to wait after the last change before writing settings to disk
+SAVE_DEBOUNCE = 0.5
+
+def freeze(value):
+    """Return a deeply read-only copy of a JSON-like value"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Return a plain, mutable dict/list copy of a frozen value"""
+    if isinstance(value, MappingProxyType) or isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+def merge_settings(defaults, loaded):
+    """Overlay loaded settings onto defaults, merging nested dicts key by key"""
+    merged = copy.deepcopy(defaults)
+    for key, value in loaded.items():
+        if isinstance(merged.get(key), dict) and isinstance(value, dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+class SettingsSnapshot:
+    """
+    Immutable view of the settings at one version.
+
+    Readers grab a snapshot once and use it for a whole unit of work, so they
+    never see a half-applied update. Data derived from the settings can be
+    memoized on the snapshot with `derived` and is rebuilt only for new versions.
+    """
+
+    __slots__ = ("version", "data", "_derived")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = freeze(data)
+        self._derived = {}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def to_dict(self):
+        """Return a mutable copy suitable for JSON responses"""
+        return thaw(self.data)
+
+    def derived(self, key, builder):
+        """Return builder(snapshot), computed at most once per settings version"""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = builder(self)
+            self._derived[key] = value
+            return value
+
+class SettingsStore:
+    """
+    Versioned copy-on-write settings holder with debounced, atomic persistence.
+
+    `snapshot()` is a single attribute read and never blocks. Writers serialize
+    on a lock, apply their change to a private copy and publish it as a new
+    snapshot; the JSON file is rewritten in the background after changes settle.
+    """
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = copy.deepcopy(defaults)
+        self._snapshot = SettingsSnapshot(0, self.defaults)
+        self._write_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._save_condition = threading.Condition()
+        self._dirty = False
+        self._saver = None
+        atexit.register(self.flush)
+
+    def snapshot(self):
+        """Return the current immutable settings snapshot"""
+        return self._snapshot
+
+    def load(self):
+        """Load settings from disk, keeping defaults for missing keys"""
+        with open(self.path, 'r') as f:
+            loaded = json.load(f)
+        with self._write_lock:
+            self._publish(merge_settings(self.defaults, loaded))
+        return self._snapshot
+
+    def update(self, mutator):
+        """
+        Apply mutator(data) to a copy of the settings and publish the result.
+
+        The mutator receives plain dicts/lists and may raise to abort the update.
+        Returns (new_snapshot, mutator_return_value).
+        """
+        with self._write_lock:
+            data = self._snapshot.to_dict()
+            result = mutator(data)
+            self._publish(data)
+            snapshot = self._snapshot
+        self._schedule_save()
+        return snapshot, result
+
+    def _publish(self, data):
+        self._snapshot = SettingsSnapshot(self._snapshot.version + 1, data)
+
+    def _schedule_save(self):
+        with self._save_condition:
+            self._dirty = True
+            self._save_condition.notify()
+            if self._saver is None or not self._saver.is_alive():
+                self._saver = threading.Thread(target=self._save_loop, name="settings-saver")
+                self._saver.daemon = True
+                self._saver.start()
+
+    def _save_loop(self):
+        while True:
+            with self._save_condition:
+                while not self._dirty:
+                    self._save_condition.wait()
+                # Debounce: keep waiting while changes keep arriving
+                self._dirty = False
+                while self._save_condition.wait(SAVE_DEBOUNCE):
+                    self._dirty = False
+            self._save(self._snapshot)
+
+    def _save(self, snapshot):
+        """Atomically write a snapshot to the settings file"""
+        tmp_path = f"{self.path}.tmp"
+        with self._file_lock:
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot.to_dict(), f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Failed to save settings to {self.path}: {str(e)}")
+
+    def flush(self):
+        """Write pending changes immediately"""
+        with self._save_condition:
+            if not self._dirty and (self._saver is None or not self._saver.is_alive()):
+                return
+            self._dirty = False
+        self._save(self._snapshot)
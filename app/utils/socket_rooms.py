@@ -0,0 +1,98 @@
+import json
+import threading
+
+# Streams a dashboard client can subscribe to
+STREAMS = ("results", "preview", "perf")  # ocr_update, screenshot_update, perf_update
+DEFAULT_STREAMS = ("results", "preview")  # Clients that never subscribe get what every client used to get
+
+PERF_ROOM = "perf"
+
+def results_room(regions):
+    """Room of the clients that watch exactly these regions (None or empty for all of them)"""
+    return "results" if not regions else "results:" + json.dumps(sorted(regions))
+
+def preview_room(session):
+    """Room of the clients that watch the highlighted screenshot of a session (None for the main screen)"""
+    return "preview:" + (session or "")
+
+class SocketRooms:
+    """
+    Which Socket.IO rooms each dashboard client is in, and how many clients each room has.
+
+    A client subscribes to streams, optionally narrowed to some regions and to
+    the session whose screenshot it shows; each combination is a room. Clients
+    that watch the same regions share a room, so a cycle's results are
+    filtered and emitted once per distinct region set. The scan event
+    consumers check the rooms before rendering anything: a stream without
+    members costs nothing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}  # sid -> {"streams", "regions", "session", "rooms"}
+        self.members = {}  # room -> number of clients in it
+        self.views = {}  # results room -> frozenset of regions (None for all)
+
+    def set(self, sid, streams, regions=None, session=None):
+        """
+        Replace the subscription of a client
+
+        Returns:
+            tuple: (rooms to join, rooms to leave)
+        """
+        regions = frozenset(regions) if regions else None
+        rooms = set()
+        if "results" in streams:
+            rooms.add(results_room(regions))
+        if "preview" in streams:
+            rooms.add(preview_room(session))
+        if "perf" in streams:
+            rooms.add(PERF_ROOM)
+        with self.lock:
+            previous = self.clients.get(sid, {}).get("rooms", set())
+            self.clients[sid] = {"streams": sorted(set(streams)), "regions": sorted(regions) if regions else None,
+                                 "session": session, "rooms": rooms}
+            for room in rooms - previous:
+                self.members[room] = self.members.get(room, 0) + 1
+                if room.startswith("results"):
+                    self.views[room] = regions
+            self._leave(previous - rooms)
+        return sorted(rooms - previous), sorted(previous - rooms)
+
+    def drop(self, sid):
+        """Forget a disconnected client"""
+        with self.lock:
+            client = self.clients.pop(sid, None)
+            if client is not None:
+                self._leave(client["rooms"])
+
+    def _leave(self, rooms):
+        for room in rooms:
+            self.members[room] -= 1
+            if not self.members[room]:
+                del self.members[room]
+                self.views.pop(room, None)
+
+    def subscription(self, sid):
+        with self.lock:
+            client = self.clients.get(sid)
+            return None if client is None else {key: value for key, value in client.items() if key != "rooms"}
+
+    def has_members(self, room):
+        return room in self.members
+
+    def results_views(self):
+        """(room, regions) of every results room with members; regions is None for all regions"""
+        with self.lock:
+            return list(self.views.items())
+
+    @staticmethod
+    def filter_results(results, regions):
+        return dict(results) if regions is None else {name: results[name] for name in regions if name in results}
+
+    def status(self):
+        with self.lock:
+            return {"clients": len(self.clients), "rooms": dict(self.members)}
+
+# Shared registry kept by the socket handlers and read by the scan event consumers
+socket_rooms = SocketRooms()
@@ -0,0 +1,73 @@
+import os
+import time
+import socket
+import threading
+
+from app.config import log_dir
+from app.utils.lazy_import import load
+from app.utils.logger import get_logger
+
+# Create a logger for the warm-up
+logger = get_logger(__name__, os.path.join(log_dir, "app.log"))
+
+# Modules the scan loop and the screenshot routes import on first use
+HEAVY_MODULES = ("numpy", "cv2", "PIL.Image", "PIL.ImageGrab", "PIL.ImageDraw", "pytesseract", "requests")
+
+# Seconds to wait for the server to accept connections before warming up anyway
+LISTEN_TIMEOUT = 30.0
+
+def wait_until_listening(port, timeout=LISTEN_TIMEOUT):
+    """Wait until something accepts connections on localhost:port; False on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def warm_up(flask_app):
+    """
+    Import the heavy modules, start Tesseract once and compile the templates
+
+    Returns:
+        dict: Seconds spent per step
+    """
+    timings = {}
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        try:
+            load(name)
+        except Exception as e:
+            logger.warning("Warm-up could not import {}: {}", name, str(e))
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        # The first Tesseract run pays for loading the executable and its language data
+        load("pytesseract").get_tesseract_version()
+    except Exception as e:
+        logger.warning("Warm-up could not run Tesseract: {}", str(e))
+    timings["tesseract"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for template in flask_app.jinja_env.list_templates():
+        try:
+            flask_app.jinja_env.get_template(template)
+        except Exception as e:
+            logger.warning("Warm-up could not compile template {}: {}", template, str(e))
+    timings["templates"] = time.perf_counter() - started
+    return timings
+
+def start_warm_up(flask_app, port):
+    """Warm up in a background thread once the server is listening on port"""
+    def run():
+        wait_until_listening(port)
+        timings = warm_up(flask_app)
+        logger.info("Warm-up finished in {:.2f}s ({})", sum(timings.values()),
+                    ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,15 @@
+from flask import Flask
+from flask_socketio import SocketIO
+
+from app.config import emit_bridge
+from app.utils.serving import async_mode
+
+# Flask app configuration - renaming to flask_app to avoid namespace conflict
+flask_app = Flask(__name__, template_folder='../templates', static_folder='../static')
+flask_app.config['SECRET_KEY'] = 'macro_control_secret_key'
+flask_app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True  # Enable pretty-printed JSON
+flask_app.config['JSONIFY_INDENT'] = 4  # Set JSON indentation to 4 spaces
+socketio = SocketIO(flask_app, cors_allowed_origins="*", async_mode=async_mode())
+
+# Scan results go to the web clients from now on
+emit_bridge.attach(socketio)
@@ -2,11 +2,13 @@ import os
 import json
 import datetime
 import time
-import requests
 
-from app.config import ocr_settings, log_dir, settings_dir
+from app.config import settings_store, log_dir, settings_dir
+from app.utils.lazy_import import lazy_import
 from app.utils.logger import get_logger
 
+requests = lazy_import("requests")
+
 # Create a logger for the webhook handler
 logger = get_logger(__name__, os.path.join(log_dir, "webhook.log"))
 
@@ -138,28 +140,39 @@ def save_last_detection(region_name, text, matched_keyword_text=None):
     except Exception as e:
         logger.error("Error saving last detection: {}", str(e))
 
-def send_webhook(region_name, text):
-    """Send webhook notification for biome regions when text matches keywords"""
+def compile_keywords(settings):
+    """Build the lowercased (text, ping, keyword) match list for enabled keywords"""
+    compiled = []
+    for keyword in settings["webhook"].get("keywords", []):
+        # Skip disabled keywords
+        if not keyword.get("enabled", True):
+            continue
+        keyword_text = keyword.get("text", "").lower()
+        if keyword_text:
+            compiled.append((keyword_text, keyword.get("ping", False), keyword))
+    return tuple(compiled)
+
+def send_webhook(region_name, text, settings=None):
+    """Send webhook notification when text matches keywords (callers only pass regions whose profile notifies)"""
     global last_webhook_time
     
-    if not ocr_settings["webhook"]["enabled"] or not ocr_settings["webhook"]["url"]:
+    if settings is None:
+        settings = settings_store.snapshot()
+    webhook_settings = settings["webhook"]
+    
+    if not webhook_settings["enabled"] or not webhook_settings["url"]:
         logger.debug("Webhook not enabled or URL not set. Skipping.")
         return False
     
-    if not ocr_settings["webhook"]["biome_notifications"]:
+    if not webhook_settings["biome_notifications"]:
         logger.debug("Biome notifications not enabled. Skipping.")
         return False
     
-    # Check if region name contains "biome" (case-insensitive)
-    if "biome" not in region_name.lower():
-        logger.debug("Region '{}' is not a biome region. Skipping webhook.", region_name)
-        return False
-    
     # Load previous detections from file for persistence
     last_detections = load_last_detections()
     
     # Check if there are keywords defined
-    keywords = ocr_settings["webhook"].get("keywords", [])
+    keywords = webhook_settings.get("keywords", [])
     logger.debug("Keywords for webhook: {}", keywords)
     
     # Normalize detected text for comparison
@@ -177,22 +190,14 @@ def send_webhook(region_name, text):
         matched_keyword_text = "AllText"
         logger.info("No keywords defined, allowing all text")
     else:
-        # Check if any keyword matches the detected text
-        for keyword in keywords:
-            # Skip disabled keywords
-            if not keyword.get("enabled", True):
-                continue
-                
-            keyword_text = keyword.get("text", "").lower()
-            if not keyword_text:
-                continue
-                
+        # Check if any keyword matches the detected text (match list is rebuilt only when settings change)
+        for keyword_text, ping, keyword in settings.derived("webhook_keywords", compile_keywords):
             # Check if the keyword is in the detected text
             if keyword_text in detected_text:
                 text_matched = True
                 matching_keyword = keyword
                 matched_keyword_text = keyword_text
-                should_ping = keyword.get("ping", False)
+                should_ping = ping
                 logger.info("OCR text in '{}' matched keyword: '{}'", region_name, keyword_text)
                 break
     
@@ -236,9 +241,9 @@ def send_webhook(region_name, text):
     logger.info("Processing webhook for '{}' with text: '{}', matched keyword: '{}'", 
                region_name, text, matched_keyword_text)
     
-    webhook_url = ocr_settings["webhook"]["url"]
+    webhook_url = webhook_settings["url"]
     is_discord = "discord" in webhook_url.lower()
-    user_id = ocr_settings["webhook"]["user_id"]
+    user_id = webhook_settings["user_id"]
     
     # Get the cropped region image path
     debug_dir = os.path.join(settings_dir, "debug")
@@ -0,0 +1,79 @@
+"""
+Compare screen capture latency of ImageGrab and the X11 backend.
+
+Usage (Linux, e.g. under Xvfb):
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmarks/capture_bench.py [--box 660,440,1260,640] [--repeat 200] [--output report.json]
+
+Measures, per grab: ImageGrab.grab() of the whole screen, X11 MIT-SHM of the
+whole screen and of --box (the area covering the OCR regions), and plain
+XGetImage of --box. Prints a JSON report with mean, p50 and p95 in milliseconds.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Run from the repository root without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageGrab
+
+from app.capture.x11_capture import X11Capture, X11CaptureError
+
+def measure(grab, repeat):
+    """Time `repeat` calls of grab() after a warm-up call"""
+    grab()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        grab()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--box", help="x1,y1,x2,y2 of the regions' area (defaults to 600x200 in the middle of the screen)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        shm = X11Capture()
+        plain = X11Capture(use_shm=False)
+    except X11CaptureError as e:
+        sys.exit(f"X11 capture unavailable: {e}")
+
+    width, height = shm.screen_size
+    if args.box:
+        box = tuple(int(v) for v in args.box.split(","))
+    else:
+        box = (width // 2 - 300, height // 2 - 100, width // 2 + 300, height // 2 + 100)
+
+    report = {
+        "screen": [width, height],
+        "box": list(box),
+        "repeat": args.repeat,
+        "shm_available": shm.uses_shm,
+        "shm_error": shm.shm_error,
+        "imagegrab_screen": measure(ImageGrab.grab, args.repeat),
+        "x11_screen": measure(shm.grab, args.repeat),
+        "x11_box": measure(lambda: shm.grab(box), args.repeat),
+        "xgetimage_box": measure(lambda: plain.grab(box), args.repeat),
+    }
+    shm.close()
+    plain.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
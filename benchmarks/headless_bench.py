@@ -0,0 +1,91 @@
+"""
+Compare startup time and steady-state CPU of the headless scanner and the full app.
+
+Usage (with regions configured and OCR enabled in settings/ocr_settings.json):
+    python benchmarks/headless_bench.py [--duration 30] [--warmup 5] [--output report.json]
+
+Each mode runs in a fresh interpreter: "headless" imports what
+`python -m app.ocr` imports, "full" loads app.py (web app, SocketIO and every
+route) without starting the server. Both then scan for --warmup seconds,
+followed by --duration measured seconds. The report gives the import time,
+whether Flask got imported, cycles and regions per second and the process
+CPU time per second and per cycle. The full app is measured without
+connected clients, so the difference is the cost of the web stages
+themselves (highlighted screenshots, frame cache, emits); every connected
+client adds to it.
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("headless", "full")
+
+def child(mode, duration, warmup):
+    sys.path.insert(0, ROOT)
+    started = time.perf_counter()
+    if mode == "full":
+        runpy.run_path(os.path.join(ROOT, "app.py"), run_name="bench")
+    from app.config import settings_store, settings_file
+    from app.ocr import ocr_processor
+    from app.ocr.throughput import scan_throughput, ScanThroughput
+    from app.ocr.watchdog import scan_supervisor
+    from app.ocr.consumers import subscribe_scan_consumers
+    if mode == "headless":
+        # app.py loads the settings and subscribes the consumers itself
+        if os.path.exists(settings_file):
+            settings_store.load()
+        subscribe_scan_consumers()
+    import_seconds = time.perf_counter() - started
+
+    ocr_processor.forced_status = "running"
+    scan_supervisor.start(ocr_processor.perform_ocr)
+    time.sleep(warmup)
+    before, cpu_before = scan_throughput.snapshot(), time.process_time()
+    time.sleep(duration)
+    after, cpu_after = scan_throughput.snapshot(), time.process_time()
+    scan_supervisor.stop()
+    scan_supervisor.join(timeout=10)
+
+    cycles = after["cycles"] - before["cycles"]
+    cpu = cpu_after - cpu_before
+    report = {"mode": mode, "import_seconds": round(import_seconds, 3), "flask_imported": "flask" in sys.modules,
+              "cycles": cycles, "cpu_percent": round(100 * cpu / duration, 1),
+              "cpu_ms_per_cycle": round(1000 * cpu / cycles, 1) if cycles else None}
+    report.update({key: round(value, 2) for key, value in ScanThroughput.rates(before, after).items()})
+    print(json.dumps(report))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.duration, args.warmup)
+        return
+
+    report = {}
+    for mode in MODES:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                                 "--duration", str(args.duration), "--warmup", str(args.warmup)],
+                                cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            report[mode] = {"error": result.stderr.strip().splitlines()[-1:]}
+            continue
+        report[mode] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Run a hub and several agents locally and check that the hub sees every transition once.
+
+Usage (from the repository root, with Tesseract installed):
+    python benchmarks/hub_bench.py [--agents 3] [--duration 60] [--outage 10] [--output report.json]
+
+Each process gets its own settings directory (KEMAC_SETTINGS_DIR) in a
+temporary directory. Every agent replays a synthetic frame log whose region
+text changes every --change-every frames, so it produces transitions without
+a screen. The hub (python app.py --hub) is stopped after a third of
+--duration and restarted --outage seconds later; the agents keep scanning and
+must backfill what the hub missed. At the end the agents are stopped, then
+the hub, and every agent's history is compared with the hub's copy
+("<agent>/<region>") up to a cutoff a few seconds before the agents stopped.
+
+The report gives, per agent, the transitions it recorded, those missing on
+the hub, duplicates and extra rows on the hub, and the hub's applied,
+duplicate, gap and lag counters from GET /agents.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCREEN_SIZE = (640, 160)
+REGION = {"name": "Biome", "x1": 20, "y1": 20, "x2": 620, "y2": 140}
+WORDS = ("NORMAL", "WINDY", "RAINY", "SNOWY", "SANDSTORM", "HELL", "STARFALL", "CORRUPTION")
+
+# Seconds kept out of the comparison before the agents stop (their last transitions may be in flight)
+CUTOFF_MARGIN = 3.0
+
+def write_frame_log(settings_dir, frames, change_every):
+    """Synthesize a frame log of the region showing a new word every change_every frames"""
+    from PIL import Image, ImageDraw, ImageFont
+    from app.capture.frame_log import FrameLog
+    try:
+        font = ImageFont.load_default(size=48)
+    except TypeError:
+        font = ImageFont.load_default()
+    box = (REGION["x1"], REGION["y1"], REGION["x2"], REGION["y2"])
+    log = FrameLog.create(os.path.join(settings_dir, "frame_log"), SCREEN_SIZE, [box], frames)
+    for index in range(frames):
+        image = Image.new("RGB", SCREEN_SIZE, "white")
+        ImageDraw.Draw(image).text((40, 50), WORDS[(index // change_every) % len(WORDS)], fill="black", font=font)
+        log.write(image)
+    log.flush()
+
+def make_settings_dir(base, name, replay):
+    settings_dir = os.path.join(base, name)
+    os.makedirs(settings_dir, exist_ok=True)
+    settings = {"enabled": replay, "regions": [REGION] if replay else [],
+                "frame_log": {"record": False, "replay": replay, "capacity": 600, "union": False}}
+    with open(os.path.join(settings_dir, "ocr_settings.json"), 'w') as f:
+        json.dump(settings, f)
+    return settings_dir
+
+def start_hub(settings_dir, http_port, hub_port):
+    env = dict(os.environ, KEMAC_SETTINGS_DIR=settings_dir, KEMAC_PORT=str(http_port))
+    # A session of its own, so the debug server's reloader child stops with it
+    return subprocess.Popen([sys.executable, "app.py", "--hub", str(hub_port)], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+def stop(process, sig=signal.SIGINT, timeout=20):
+    try:
+        os.killpg(process.pid, sig)
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+def wait_for(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return get_json(url)
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"{url} did not answer within {timeout} s")
+
+def transitions(db_file, prefix="", cutoff=None):
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT region, ts, text FROM transitions WHERE region LIKE ? AND ts <= ?",
+                            (prefix + "%", cutoff)).fetchall()
+    finally:
+        conn.close()
+    return [(region[len(prefix):], round(ts, 6), text) for region, ts, text in rows]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds the agents scan")
+    parser.add_argument("--outage", type=float, default=10.0, help="Seconds the hub is down (0 keeps it up)")
+    parser.add_argument("--frames", type=int, default=200, help="Frames in each agent's frame log")
+    parser.add_argument("--change-every", type=int, default=20, help="Frames between two texts")
+    parser.add_argument("--http-port", type=int, default=5098)
+    parser.add_argument("--hub-port", type=int, default=5101)
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary settings directories")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="kemac-hub-bench-")
+    hub_dir = make_settings_dir(base, "hub", replay=False)
+    names = [f"agent{index + 1}" for index in range(args.agents)]
+    agent_dirs = {}
+    for name in names:
+        agent_dirs[name] = make_settings_dir(base, name, replay=True)
+        write_frame_log(agent_dirs[name], args.frames, args.change_every)
+
+    agents_url = f"http://127.0.0.1:{args.http_port}/agents"
+    hub = start_hub(hub_dir, args.http_port, args.hub_port)
+    agents = {}
+    try:
+        wait_for(agents_url)
+        for name in names:
+            env = dict(os.environ, KEMAC_SETTINGS_DIR=agent_dirs[name])
+            agents[name] = subprocess.Popen([sys.executable, "-m", "app.ocr", "--agent", f"127.0.0.1:{args.hub_port}",
+                                             "--name", name, "--stats-interval", "5"], cwd=ROOT, env=env,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                            start_new_session=True)
+
+        started = time.monotonic()
+        if args.outage > 0:
+            time.sleep(args.duration / 3)
+            stop(hub)
+            time.sleep(args.outage)
+            hub = start_hub(hub_dir, args.http_port, args.hub_port)
+            wait_for(agents_url)
+        time.sleep(max(0.0, args.duration - (time.monotonic() - started)))
+
+        cutoff = time.time() - CUTOFF_MARGIN
+        for process in agents.values():
+            stop(process)
+        time.sleep(2)
+        status = get_json(agents_url)
+    finally:
+        for process in agents.values():
+            stop(process)
+        stop(hub)
+
+    report = {"agents": args.agents, "duration": args.duration, "outage": args.outage, "per_agent": {}}
+    hub_db = os.path.join(hub_dir, "history.db")
+    for name in names:
+        expected = transitions(os.path.join(agent_dirs[name], "history.db"), cutoff=cutoff)
+        received = transitions(hub_db, prefix=name + "/", cutoff=cutoff)
+        state = status["agents"].get(name, {})
+        report["per_agent"][name] = {
+            "transitions": len(expected),
+            "missing": len(set(expected) - set(received)),
+            "duplicates": len(received) - len(set(received)),
+            "extra": len(set(received) - set(expected)),
+            "hub": {key: state.get(key) for key in ("applied", "duplicates", "gaps", "late", "lag_ms", "max_lag_ms")},
+        }
+    report["missing"] = sum(agent["missing"] for agent in report["per_agent"].values())
+    report["duplicates"] = sum(agent["duplicates"] for agent in report["per_agent"].values())
+
+    if args.keep:
+        report["settings_dirs"] = base
+    else:
+        shutil.rmtree(base, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare per-region OCR against mosaic batching on a directory of region crops.
+
+Usage:
+    python benchmarks/mosaic_bench.py CROP_DIR [--labels labels.json] [--preset fast] [--repeat 3] [--output report.json]
+
+CROP_DIR holds one PNG per region (for example the *_original.png files from
+settings/debug). The optional labels file maps file names to the expected text.
+Prints a JSON report with wall time, Tesseract calls and accuracy for each path.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Run from the repository root without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract
+from PIL import Image
+
+from app.ocr import ocr_processor
+from app.ocr.region_plan import RegionPlan
+
+def load_crops(crop_dir, preset):
+    """Build (plan, upscaled image) pairs for every PNG in the directory"""
+    prepared = []
+    for index, filename in enumerate(sorted(os.listdir(crop_dir))):
+        if not filename.lower().endswith(".png"):
+            continue
+        img = Image.open(os.path.join(crop_dir, filename)).convert('RGB')
+        region = {"x1": 0, "y1": 0, "x2": img.width, "y2": img.height, "name": filename,
+                  "profile": {"preset": preset, "mosaic": True, "debug": False, "notify": False}}
+        plan = RegionPlan(index, region, img.width, img.height)
+        prepared.append((plan, img.resize(plan.resize, Image.LANCZOS)))
+    return prepared
+
+def count_calls():
+    """Wrap pytesseract.image_to_data with a call counter"""
+    original = pytesseract.image_to_data
+    counter = {"calls": 0}
+
+    def counted(*args, **kwargs):
+        counter["calls"] += 1
+        return original(*args, **kwargs)
+
+    pytesseract.image_to_data = counted
+    return counter
+
+def accuracy(results, labels):
+    """Fraction of labelled regions whose text matches the label (case-insensitive)"""
+    labelled = [name for name in results if name in labels]
+    if not labelled:
+        return None
+    correct = sum(results[name].strip().lower() == labels[name].strip().lower() for name in labelled)
+    return correct / len(labelled)
+
+def run_per_region(prepared):
+    return {plan.name: ocr_processor.run_ocr_cascade(plan, img)[0] for plan, img in prepared}
+
+def run_mosaic(prepared):
+    results = {name: result[0] for name, result in ocr_processor.run_mosaic_batches(prepared).items()}
+    for plan, img in prepared:
+        if plan.name not in results:
+            results[plan.name] = ocr_processor.run_ocr_cascade(plan, img)[0]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("crop_dir")
+    parser.add_argument("--labels", help="JSON file mapping crop file names to expected text")
+    parser.add_argument("--preset", default="fast", help="Profile preset used for every crop")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, 'r') as f:
+            labels = json.load(f)
+
+    prepared = load_crops(args.crop_dir, args.preset)
+    if not prepared:
+        sys.exit(f"No PNG crops found in {args.crop_dir}")
+
+    counter = count_calls()
+    report = {"regions": len(prepared), "preset": args.preset, "repeat": args.repeat}
+    for mode, runner in (("per_region", run_per_region), ("mosaic", run_mosaic)):
+        counter["calls"] = 0
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            results = runner(prepared)
+        elapsed = time.perf_counter() - started
+        report[mode] = {
+            "seconds_per_cycle": elapsed / args.repeat,
+            "tesseract_calls_per_cycle": counter["calls"] / args.repeat,
+            "accuracy": accuracy(results, labels),
+            "results": results,
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Replay a recorded OCR corpus through the region logic of perform_ocr, headlessly.
+
+Usage:
+    python benchmarks/replay_bench.py CORPUS_DIR [--labels labels.json] [--preset fast] [--output report.json]
+
+CORPUS_DIR is a recording made with POST /record_corpus (see app/ocr/corpus.py).
+Every recorded cycle goes through prepare_region, run_mosaic_batches,
+run_ocr_cascade and finish_region in recording order, so frame voting behaves
+as it does live. Nothing subscribes to the scan events, so no webhook is sent
+and no history is recorded.
+
+Prints a JSON report with per-stage latency, Tesseract calls, cycles per second
+and accuracy against the labels (CORPUS_DIR/labels.json by default).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Run from the repository root without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from app.config import ocr_results
+from app.ocr import ocr_processor
+from app.ocr.corpus import load_corpus, load_labels, LABELS_FILE
+from app.ocr.region_plan import RegionPlan
+from mosaic_bench import count_calls
+
+STAGES = ("prepare", "mosaic", "cascade", "finish")
+
+def build_plans(entries, preset):
+    """Build a plan per recorded crop; the crop itself is the 'screenshot'"""
+    plans = []
+    for index, entry in enumerate(entries):
+        profile = {"preset": preset} if preset else dict(entry["profile"])
+        profile.update({"notify": False, "debug": False})
+        region = {"x1": 0, "y1": 0, "x2": entry["width"], "y2": entry["height"],
+                  "name": entry["region"], "profile": profile}
+        plans.append(RegionPlan(index, region, entry["width"], entry["height"]))
+    return plans
+
+def percentiles(samples):
+    """Mean, p50 and p95 of a list of seconds, in milliseconds"""
+    if not samples:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+
+def replay(cycles, preset, label):
+    """Run every cycle and collect timings and accuracy"""
+    settings = {"webhook": {"enabled": False, "url": ""}}
+    timings = {stage: [] for stage in STAGES}
+    accuracy = {}  # region -> [correct, labelled]
+
+    started = time.perf_counter()
+    for ts, entries in cycles:
+        plans = build_plans(entries, preset)
+
+        stage_started = time.perf_counter()
+        prepared = []
+        for plan, entry in zip(plans, entries):
+            region_img = ocr_processor.prepare_region(plan, Image.open(entry["path"]).convert('RGB'))
+            if region_img is not None:
+                prepared.append((plan, region_img))
+        timings["prepare"].append(time.perf_counter() - stage_started)
+
+        stage_started = time.perf_counter()
+        mosaic_results = ocr_processor.run_mosaic_batches([(plan, img) for plan, img in prepared
+                                                           if plan.profile["mosaic"]])
+        timings["mosaic"].append(time.perf_counter() - stage_started)
+
+        cascade_seconds = finish_seconds = 0.0
+        for plan, region_img in prepared:
+            stage_started = time.perf_counter()
+            result = mosaic_results.get(plan.name)
+            if result is None:
+                result = ocr_processor.run_ocr_cascade(plan, region_img)
+            cascade_seconds += time.perf_counter() - stage_started
+
+            stage_started = time.perf_counter()
+            ocr_processor.finish_region(plan, result, settings)
+            finish_seconds += time.perf_counter() - stage_started
+        timings["cascade"].append(cascade_seconds)
+        timings["finish"].append(finish_seconds)
+
+        for plan in plans:
+            expected = label(plan.name, ts) if label else None
+            if expected is None:
+                continue
+            published = ocr_results.get(plan.name, "")
+            if published == "(No text detected)":
+                published = ""
+            counts = accuracy.setdefault(plan.name, [0, 0])
+            counts[0] += published.strip().lower() == expected.strip().lower()
+            counts[1] += 1
+    elapsed = time.perf_counter() - started
+
+    return elapsed, timings, accuracy
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir")
+    parser.add_argument("--labels", help="Labels file (defaults to labels.json in the corpus)")
+    parser.add_argument("--preset", help="Replay every region with this preset instead of its recorded profile")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    cycles = load_corpus(args.corpus_dir)
+    if not cycles:
+        sys.exit(f"No recorded cycles in {args.corpus_dir}")
+
+    labels_path = args.labels or os.path.join(args.corpus_dir, LABELS_FILE)
+    label = load_labels(labels_path) if os.path.exists(labels_path) else None
+
+    counter = count_calls()
+    elapsed, timings, accuracy = replay(cycles, args.preset, label)
+
+    correct = sum(c for c, _ in accuracy.values())
+    labelled = sum(n for _, n in accuracy.values())
+    report = {
+        "corpus": os.path.abspath(args.corpus_dir),
+        "preset": args.preset,
+        "cycles": len(cycles),
+        "seconds": round(elapsed, 3),
+        "cycles_per_second": round(len(cycles) / elapsed, 3) if elapsed else None,
+        "tesseract_calls": counter["calls"],
+        "tesseract_calls_per_cycle": round(counter["calls"] / len(cycles), 3),
+        "stages": {stage: percentiles(samples) for stage, samples in timings.items()},
+        "accuracy": correct / labelled if labelled else None,
+        "accuracy_by_region": {region: c / n for region, (c, n) in accuracy.items()},
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compare request latency and Socket.IO fan-out between the server modes.
+
+Usage (with the app running, once per mode):
+    python app.py                  # debug mode (Werkzeug)
+    python app.py --production     # gevent
+    python benchmarks/serve_bench.py [--url http://127.0.0.1:5000] [--label production] [--clients 50] [--requests 200] [--sockets 50] [--output report.json]
+
+HTTP: --clients threads share --requests GETs of each endpoint and the report
+gives latency percentiles per endpoint (/screenshot is requested with the
+ETag of the previous response, like a browser polling it).
+
+Socket.IO fan-out: connects --sockets clients, posts the current OCR settings
+back to /ocr_settings and measures how long each client takes to receive the
+resulting settings_update broadcast. Clients use the WebSocket transport when
+the websocket-client package is installed, long-polling otherwise; the report
+records which one was used.
+"""
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+ENDPOINTS = ("/status", "/ocr_results", "/screenshot")
+
+def percentiles(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {"count": len(samples), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(samples[-1] * 1000, 2)}
+
+def http_latency(url, endpoint, clients, count):
+    local = threading.local()
+    errors = []
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+            local.etag = None
+        headers = {"If-None-Match": local.etag} if local.etag else {}
+        started = time.perf_counter()
+        try:
+            response = session.get(url + endpoint, headers=headers, timeout=30)
+            response.content
+        except Exception as e:
+            errors.append(str(e))
+            return None
+        local.etag = response.headers.get("ETag") or local.etag
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(clients) as pool:
+        samples = [sample for sample in pool.map(one, range(count)) if sample is not None]
+    report = percentiles(samples) or {}
+    report["errors"] = len(errors)
+    return report
+
+def socket_fanout(url, count, timeout):
+    received = {}
+    sent_at = [None]
+    done = threading.Event()
+    clients = []
+
+    def listen(index):
+        client = socketio.Client(reconnection=False)
+
+        @client.on("settings_update")
+        def on_update(data):
+            if sent_at[0] is not None and index not in received:
+                received[index] = time.perf_counter() - sent_at[0]
+                if len(received) == count:
+                    done.set()
+
+        client.connect(url, wait_timeout=timeout)
+        return client
+
+    with ThreadPoolExecutor(min(count, 32)) as pool:
+        for client in pool.map(listen, range(count)):
+            clients.append(client)
+    transport = clients[0].transport() if clients else None
+
+    settings = requests.get(url + "/ocr_settings", timeout=timeout).json()
+    sent_at[0] = time.perf_counter()
+    requests.post(url + "/ocr_settings", json=settings, timeout=timeout)
+    done.wait(timeout)
+
+    for client in clients:
+        client.disconnect()
+    report = percentiles(list(received.values())) or {}
+    report.update({"sockets": count, "missed": count - len(received), "transport": transport})
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--label", default="", help="Name of the server mode under test, copied into the report")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent HTTP clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--sockets", type=int, default=50, help="Socket.IO clients for the fan-out test")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {"label": args.label, "clients": args.clients, "http": {}}
+    for endpoint in ENDPOINTS:
+        report["http"][endpoint] = http_latency(args.url, endpoint, args.clients, args.requests)
+    report["fanout"] = socket_fanout(args.url, args.sockets, args.timeout)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
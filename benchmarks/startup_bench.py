@@ -0,0 +1,132 @@
+"""
+Measure the cold start of the web app and profile its imports.
+
+Usage (with nothing else listening on --port):
+    python benchmarks/startup_bench.py [--mode debug|production] [--runs 3] [--port 5099] [--target 1.5] [--top 15] [--output report.json]
+
+Each run starts `python app.py` in a fresh process and polls it: the report
+gives the time until the first response of the page (`/`) and of the first
+/screenshot (which pays for the lazily imported capture and image modules),
+as the median over --runs. The import profile comes from
+`python -X importtime` loading app.py without serving: total import time,
+the slowest top-level imports (cumulative, children included) and the
+modules with the most time of their own. `target_met` compares the median
+time to first response with --target seconds.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def wait_for(url, process, timeout):
+    """Seconds until url answers 200, or None if the process exits or the timeout expires"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read()
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.02)
+    return None
+
+def start_app(mode, port):
+    env = dict(os.environ, KEMAC_PORT=str(port), KEMAC_SERVER_MODE=mode)
+    kwargs = {"start_new_session": True} if os.name != "nt" else \
+             {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+
+def stop_app(process):
+    """Stop the app and the processes it started (the debug reloader's server)"""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    process.wait(timeout=10)
+
+def cold_start(mode, port, timeout):
+    started = time.perf_counter()
+    process = start_app(mode, port)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        first = wait_for(base + "/", process, timeout)
+        if first is None:
+            return None
+        screenshot = wait_for(base + "/screenshot", process, timeout)
+        elapsed = time.perf_counter() - started
+        return {"first_response": first, "first_screenshot": elapsed if screenshot is not None else None}
+    finally:
+        stop_app(process)
+
+def import_profile(mode, top):
+    """Parse `python -X importtime` while app.py is loaded (not served)"""
+    env = dict(os.environ, KEMAC_SERVER_MODE=mode)
+    code = "import runpy; runpy.run_path('app.py', run_name='startup_bench')"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(own), int(cumulative), depth))
+    top_level = [entry for entry in entries if entry[3] == 0]
+    ms = lambda us: round(us / 1000, 1)
+    return {
+        "total_ms": ms(sum(entry[2] for entry in top_level)),
+        "slowest_top_level": [{"module": name, "cumulative_ms": ms(cumulative)}
+                              for name, _, cumulative, _ in sorted(top_level, key=lambda e: -e[2])[:top]],
+        "slowest_self": [{"module": name, "self_ms": ms(own)}
+                         for name, own, _, _ in sorted(entries, key=lambda e: -e[1])[:top]],
+        "heavy_modules_loaded": sorted({name.split(".")[0] for name, _, _, _ in entries}
+                                       & {"numpy", "cv2", "PIL", "pytesseract", "requests"}),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("debug", "production"), default="debug")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--target", type=float, default=1.5, help="Target time to first response, in seconds")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed in the import profile")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    runs = [cold_start(args.mode, args.port, args.timeout) for _ in range(args.runs)]
+    ok = [run for run in runs if run is not None]
+    median = lambda key: round(statistics.median(run[key] for run in ok), 3) if ok and all(run[key] for run in ok) else None
+    report = {
+        "mode": args.mode,
+        "runs": len(runs),
+        "failed_runs": len(runs) - len(ok),
+        "first_response_seconds": median("first_response"),
+        "first_screenshot_seconds": median("first_screenshot"),
+        "target_seconds": args.target,
+        "imports": import_profile(args.mode, args.top),
+    }
+    report["target_met"] = report["first_response_seconds"] is not None and report["first_response_seconds"] <= args.target
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
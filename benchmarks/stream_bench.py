@@ -0,0 +1,109 @@
+"""
+Measure /stream.mjpg with many concurrent viewers.
+
+Usage (with the app running and scanning):
+    python benchmarks/stream_bench.py [--url http://127.0.0.1:5000] [--clients 20] [--slow 5] [--seconds 15] [--output report.json]
+
+Opens --clients streaming connections, of which --slow read at most one frame
+per second (to check that slow viewers skip frames instead of holding the
+others back). Prints a JSON report with the frames per second each group
+received and the server's stream counters over the run (from
+/stream_settings): JPEG encodes should follow the stream FPS, not the number
+of viewers.
+"""
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+def read_part(response):
+    """Read one multipart JPEG part and return its size"""
+    length = None
+    while True:
+        line = response.fp.readline()
+        if not line:
+            raise EOFError("stream closed")
+        line = line.strip()
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+        elif not line and length is not None:
+            break
+    response.fp.read(length + 2)  # JPEG and the trailing CRLF
+    return length
+
+def viewer(url, seconds, slow, results):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    frames = 0
+    received = 0
+    try:
+        conn.request("GET", "/stream.mjpg")
+        response = conn.getresponse()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            received += read_part(response)
+            frames += 1
+            if slow:
+                time.sleep(1.0)
+    except Exception as e:
+        results.append({"slow": slow, "frames": frames, "error": str(e)})
+        return
+    finally:
+        conn.close()
+    results.append({"slow": slow, "frames": frames, "bytes": received})
+
+def stream_counters(url):
+    """(encoded, sent, skipped) summed over the server's stream channels"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    conn.request("GET", "/stream_settings")
+    channels = json.loads(conn.getresponse().read())["status"]["channels"]
+    conn.close()
+    return tuple(sum(channel[key] for channel in channels) for key in ("encoded", "sent", "skipped"))
+
+def summarize(group, seconds):
+    if not group:
+        return None
+    rates = sorted(result["frames"] / seconds for result in group)
+    return {"clients": len(group), "errors": sum("error" in result for result in group),
+            "fps_min": round(rates[0], 2), "fps_p50": round(rates[len(rates) // 2], 2), "fps_max": round(rates[-1], 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=5, help="How many of the clients read slowly")
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    before = stream_counters(args.url)
+    results = []
+    threads = [threading.Thread(target=viewer, args=(args.url, args.seconds, i < args.slow, results))
+               for i in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = stream_counters(args.url)
+
+    report = {
+        "seconds": round(elapsed, 2),
+        "fast": summarize([r for r in results if not r["slow"]], args.seconds),
+        "slow": summarize([r for r in results if r["slow"]], args.seconds),
+        "jpeg_encoded": after[0] - before[0],
+        "frames_sent": after[1] - before[1],
+        "frames_skipped": after[2] - before[2],
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 // Main initialization and utility functions
 let socket;
+let liveSession = '';  // Capture session shown in the live screenshot ('' for the main screen)
+let activeTab = 'control';  // Only the control tab shows live results and screenshots
+
+// What this page watches: /?regions=Biome,Aura&streams=results narrows it (e.g. for a phone)
+const pageParams = new URLSearchParams(window.location.search);
+const watchedRegions = (pageParams.get('regions') || '').split(',').map(name => name.trim()).filter(name => name);
+const watchedStreams = (pageParams.get('streams') || 'results,preview').split(',').map(name => name.trim()).filter(name => name);
 
 // Initialize when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
@@ -16,8 +23,8 @@ window.onload = function() {
 
 // Function to connect to WebSocket
 function connectWebSocket() {
-    // Connect to the same host that served this page
-    socket = io();
+    // Connect to the same host that served this page, subscribed to what the page shows
+    socket = io({auth: cb => cb({subscribe: currentSubscription()})});
     
     // Socket connection events
     socket.on('connect', function() {
@@ -42,6 +49,7 @@ function connectWebSocket() {
     
     // Listen for OCR results updates
     socket.on('ocr_update', function(data) {
+        addLiveSession(data.session || '');
         updateOcrResults(data.results);
         if (data.timestamp) {
             document.getElementById('timestamp-display').innerText = 'Last updated: ' + data.timestamp;
@@ -50,7 +58,11 @@ function connectWebSocket() {
     
     // Listen for screenshot updates
     socket.on('screenshot_update', function(data) {
-        updateScreenshot(data.screenshot);
+        const session = data.session || '';
+        addLiveSession(session);
+        if (session === liveSession) {
+            updateScreenshot(data.screenshot);
+        }
     });
     
     // Listen for settings updates
@@ -167,6 +179,28 @@ function updateConnectionStatus(connected) {
     }
 }
 
+// Streams, regions and session this page currently needs from the server
+function currentSubscription() {
+    return {
+        streams: activeTab === 'control' ? watchedStreams : [],
+        regions: watchedRegions,
+        session: liveSession
+    };
+}
+
+// Tell the server what to send; it answers with the current results and screenshot
+function updateSubscription() {
+    if (socket && socket.connected) {
+        socket.emit('subscribe', currentSubscription());
+    }
+}
+
+// Show another capture session in the live screenshot
+function setLiveSession(session) {
+    liveSession = session;
+    updateSubscription();
+}
+
 // Function to request a fresh screenshot
 function requestScreenshot() {
     if (!socket || !socket.connected) {
@@ -178,7 +212,7 @@ function requestScreenshot() {
     document.getElementById('screenshot-loading').style.display = 'flex';
     
     // Request screenshot via WebSocket
-    socket.emit('request_screenshot');
+    socket.emit('request_screenshot', {session: liveSession});
 }
 
 // Function to request current OCR results
@@ -202,17 +236,30 @@ function updateScreenshot(base64Image) {
     };
 }
 
+// Add a capture session to the live screenshot picker the first time it reports
+function addLiveSession(session) {
+    const select = document.getElementById('live-session');
+    if (!session || Array.from(select.options).some(option => option.value === session)) {
+        return;
+    }
+    const option = document.createElement('option');
+    option.value = session;
+    option.textContent = session;
+    select.appendChild(option);
+}
+
 // Function to switch tabs
 function switchTab(tabId) {
     document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
     document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
     
+    // Live results and screenshots are only sent while the control tab is open
+    activeTab = tabId;
+    updateSubscription();
+    
     if (tabId === 'control') {
         document.querySelector('.tab:nth-child(1)').classList.add('active');
         document.getElementById('control-tab').classList.add('active');
-        // Refresh data when switching to control tab
-        requestScreenshot();
-        requestOcrResults();
     } else if (tabId === 'ocr-settings') {
         document.querySelector('.tab:nth-child(2)').classList.add('active');
         document.getElementById('ocr-settings-tab').classList.add('active');
@@ -4,6 +4,13 @@ let ocrSettings = {
     regions: []
 };
 
+// OCR profile presets and options, loaded from the server
+let ocrProfiles = {
+    presets: {},
+    variants: [],
+    psms: []
+};
+
 // Handle toggle OCR setting
 document.addEventListener('DOMContentLoaded', function() {
     const ocrEnabledToggle = document.getElementById('ocr-enabled');
@@ -26,9 +33,19 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Function to load OCR profile presets
+function loadOcrProfiles() {
+    return fetch('/ocr_profiles')
+        .then(response => response.json())
+        .then(data => {
+            ocrProfiles = data;
+        });
+}
+
 // Function to load OCR settings
 function loadOcrSettings() {
-    fetch('/ocr_settings')
+    loadOcrProfiles()
+        .then(() => fetch('/ocr_settings'))
         .then(response => response.json())
         .then(data => {
             ocrSettings = data;
@@ -245,6 +262,112 @@ function deleteRegion(index) {
     });
 }
 
+// Function to get the effective profile of a region (preset with overrides applied)
+function getRegionProfile(region) {
+    const profile = region.profile || {};
+    let presetName = profile.preset;
+    if (!ocrProfiles.presets[presetName]) {
+        presetName = region.name.toLowerCase().includes('biome') ? 'biome' : 'fast';
+    }
+    const defaults = { variants: [], psm: [], whitelist: '', scale: 0, time_budget_ms: 0, target_confidence: 0, mosaic: false, text_detect: false, notify: false, debug: false, consensus: false, frame_attempts: 0, consensus_window: 5, consensus_quorum: 3, consensus_confidence: 300 };
+    return Object.assign(defaults, ocrProfiles.presets[presetName] || {}, profile, { preset: presetName });
+}
+
+// Function to save a region's OCR profile
+function saveRegionProfile(index, profile) {
+    fetch('/update_ocr_region', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ index: index, profile: profile })
+    })
+    .then(response => response.json())
+    .then(data => {
+        console.log('Region profile updated:', data);
+        ocrSettings = data.settings;
+        renderRegionsList();
+    });
+}
+
+// Function to build the profile editor for a region
+function createProfileEditor(region, index) {
+    const profile = getRegionProfile(region);
+    const editor = document.createElement('div');
+    editor.className = 'profile-editor';
+    editor.style.display = 'none';
+    
+    const variantBoxes = ocrProfiles.variants.map(variant => `
+        <label class="profile-option">
+            <input type="checkbox" name="variant" value="${variant}" ${profile.variants.includes(variant) ? 'checked' : ''}>
+            ${variant}
+        </label>
+    `).join('');
+    
+    editor.innerHTML = `
+        <div class="profile-field"><strong>Preprocessing variants</strong>${variantBoxes}</div>
+        <div class="profile-field">
+            <label>Page segmentation modes (in order, allowed: ${ocrProfiles.psms.join(', ')})</label>
+            <input type="text" name="psm" value="${profile.psm.join(', ')}">
+        </div>
+        <div class="profile-field">
+            <label>Character whitelist (empty for no restriction, no spaces or quotes)</label>
+            <input type="text" name="whitelist" value="${profile.whitelist}">
+        </div>
+        <div class="profile-field">
+            <label>Scale factor (0 for automatic)</label>
+            <input type="number" name="scale" min="0" step="0.5" value="${profile.scale}">
+        </div>
+        <div class="profile-field">
+            <label>Time budget per cycle (ms)</label>
+            <input type="number" name="time_budget_ms" min="0" step="50" value="${profile.time_budget_ms}">
+        </div>
+        <div class="profile-field">
+            <label>Target confidence (stop early once reached)</label>
+            <input type="number" name="target_confidence" min="0" step="5" value="${profile.target_confidence}">
+        </div>
+        <label class="profile-option"><input type="checkbox" name="consensus" ${profile.consensus ? 'checked' : ''}> Vote across frames (publish a text only once several frames agree)</label>
+        <div class="profile-field">
+            <label>Attempts per frame when voting (0 for no limit)</label>
+            <input type="number" name="frame_attempts" min="0" step="1" value="${profile.frame_attempts}">
+        </div>
+        <div class="profile-field">
+            <label>Voting window (frames) / quorum (votes) / confidence sum</label>
+            <input type="number" name="consensus_window" min="1" step="1" value="${profile.consensus_window}">
+            <input type="number" name="consensus_quorum" min="1" step="1" value="${profile.consensus_quorum}">
+            <input type="number" name="consensus_confidence" min="0" step="10" value="${profile.consensus_confidence}">
+        </div>
+        <label class="profile-option"><input type="checkbox" name="mosaic" ${profile.mosaic ? 'checked' : ''}> Batch with compatible regions (one Tesseract call)</label>
+        <label class="profile-option"><input type="checkbox" name="text_detect" ${profile.text_detect ? 'checked' : ''}> Skip regions without text and crop to the text before OCR</label>
+        <label class="profile-option"><input type="checkbox" name="notify" ${profile.notify ? 'checked' : ''}> Send webhook notifications</label>
+        <label class="profile-option"><input type="checkbox" name="debug" ${profile.debug ? 'checked' : ''}> Save debug images and verbose logs</label>
+        <button class="button-green">Save Profile</button>
+    `;
+    
+    editor.querySelector('button').onclick = function() {
+        saveRegionProfile(index, {
+            preset: profile.preset,
+            variants: Array.from(editor.querySelectorAll('input[name="variant"]:checked')).map(box => box.value),
+            psm: editor.querySelector('input[name="psm"]').value.split(',').map(value => parseInt(value)).filter(value => !isNaN(value)),
+            whitelist: editor.querySelector('input[name="whitelist"]').value,
+            scale: parseFloat(editor.querySelector('input[name="scale"]').value) || 0,
+            time_budget_ms: parseFloat(editor.querySelector('input[name="time_budget_ms"]').value) || 0,
+            target_confidence: parseFloat(editor.querySelector('input[name="target_confidence"]').value) || 0,
+            consensus: editor.querySelector('input[name="consensus"]').checked,
+            frame_attempts: parseInt(editor.querySelector('input[name="frame_attempts"]').value) || 0,
+            consensus_window: parseInt(editor.querySelector('input[name="consensus_window"]').value) || 1,
+            consensus_quorum: parseInt(editor.querySelector('input[name="consensus_quorum"]').value) || 1,
+            consensus_confidence: parseFloat(editor.querySelector('input[name="consensus_confidence"]').value) || 0,
+            mosaic: editor.querySelector('input[name="mosaic"]').checked,
+            text_detect: editor.querySelector('input[name="text_detect"]').checked,
+            notify: editor.querySelector('input[name="notify"]').checked,
+            debug: editor.querySelector('input[name="debug"]').checked
+        });
+    };
+    
+    return editor;
+}
+
 // Function to render the list of regions
 function renderRegionsList() {
     const list = document.getElementById('regions-list');
@@ -260,6 +383,7 @@ function renderRegionsList() {
         item.className = 'region-item';
         
         const info = document.createElement('div');
+        info.className = 'region-info';
         info.innerHTML = `
             <strong>${region.name}</strong>
             <div class="coordinates">
@@ -267,6 +391,37 @@ function renderRegionsList() {
             </div>
         `;
         
+        // Profile preset selector; choosing a preset resets overrides to its defaults
+        const profile = getRegionProfile(region);
+        const presetSelect = document.createElement('select');
+        presetSelect.className = 'profile-select';
+        Object.keys(ocrProfiles.presets).forEach(name => {
+            const option = document.createElement('option');
+            option.value = name;
+            option.innerText = name;
+            option.selected = name === profile.preset;
+            presetSelect.appendChild(option);
+        });
+        presetSelect.onchange = function() {
+            saveRegionProfile(index, { preset: this.value });
+        };
+        
+        const editor = createProfileEditor(region, index);
+        const editLink = document.createElement('span');
+        editLink.className = 'profile-edit';
+        editLink.innerText = 'Edit profile';
+        editLink.onclick = function() {
+            editor.style.display = editor.style.display === 'none' ? 'block' : 'none';
+        };
+        
+        const profileRow = document.createElement('div');
+        profileRow.className = 'coordinates';
+        profileRow.innerText = 'Profile: ';
+        profileRow.appendChild(presetSelect);
+        profileRow.appendChild(editLink);
+        info.appendChild(profileRow);
+        info.appendChild(editor);
+        
         const deleteBtn = document.createElement('span');
         deleteBtn.className = 'region-delete';
         deleteBtn.innerText = 'Delete';
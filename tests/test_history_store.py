@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from app.history.history_store import HistoryStore, DAY_SECONDS
+
+DAY = 20000  # A UTC day number
+MIDNIGHT = DAY * DAY_SECONDS
+
+
+def wait_written(store, count, region="biome"):
+    """Wait until the writer thread committed `count` transitions of region"""
+    deadline = time.monotonic() + 10
+    while len(store.transitions(region)) < count:
+        assert time.monotonic() < deadline, "history writer did not commit in time"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def test_durations_combine_rollups_open_segment_and_edges(store):
+    store.record("biome", "Forest", MIDNIGHT - 3600)          # Day before, 23:00
+    store.record("biome", "Desert", MIDNIGHT + 1800)          # Day 0, 00:30
+    store.record("biome", "Snow", MIDNIGHT + DAY_SECONDS + 7200)  # Day 1, 02:00, still open
+    wait_written(store, 3)
+
+    start = MIDNIGHT - 1800
+    now = MIDNIGHT + 2 * DAY_SECONDS + 3600  # Day 2, 01:00
+    durations = store.durations("biome", start, now + 60, now=now)
+
+    # Edge before day 0 and day 0 rollup for Forest, days 0 and 1 for Desert,
+    # the open segment up to day 2 and the edge after it for Snow
+    assert durations == pytest.approx({"Forest": 3600, "Desert": 91800, "Snow": 82800})
+    assert sum(durations.values()) == pytest.approx(now - start)
+
+
+def test_durations_within_one_day_use_raw_transitions(store):
+    store.record("biome", "Forest", MIDNIGHT + 100)
+    store.record("biome", "Desert", MIDNIGHT + 400)
+    store.record("biome", None, MIDNIGHT + 1000)
+    wait_written(store, 3)
+
+    durations = store.durations("biome", MIDNIGHT, MIDNIGHT + 3600, now=MIDNIGHT + 7200)
+    assert durations == pytest.approx({"Forest": 300, "Desert": 600})
+
+
+def test_segments_left_open_by_a_crash_are_closed_at_startup(tmp_path):
+    path = str(tmp_path / "history.db")
+    crashed = HistoryStore(path)
+    since = time.time() - 100
+    crashed.record("biome", "Forest", since)
+    wait_written(crashed, 1)
+    alive = time.time()
+
+    # The process died without ScanStopped; the next one opens the same database
+    restarted = HistoryStore(path)
+    state = restarted.regions()
+    assert state[0]["text"] is None
+    assert since < state[0]["since"] <= alive
+
+    later = time.time() + 1000
+    durations = restarted.durations("biome", since - 10, later, now=later)
+    assert durations["Forest"] == pytest.approx(100, abs=5)
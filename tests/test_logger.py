@@ -0,0 +1,55 @@
+import glob
+import gzip
+import os
+import time
+
+from app.utils import logger as log_module
+
+
+def read_log_lines(path):
+    """Lines of the current file and its archives, once the compressor has caught up"""
+    deadline = time.monotonic() + 10
+    while glob.glob(glob.escape(path) + ".*[0-9]") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    lines = []
+    for archive in glob.glob(glob.escape(path) + ".*.gz"):
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            lines.extend(f.read().splitlines())
+    with open(path, encoding="utf-8") as f:
+        lines.extend(f.read().splitlines())
+    return lines
+
+
+def test_loggers_sharing_a_file_keep_every_line_through_rollovers(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_module, "ROTATE_MAX_BYTES", 2000)
+    monkeypatch.setattr(log_module, "ROTATE_BACKUP_COUNT", 1000)
+    path = str(tmp_path / "shared.log")
+    first = log_module.Logger("first", path, console_output=False)
+    second = log_module.Logger("second", os.path.join(str(tmp_path), ".", "shared.log"), console_output=False)
+    assert first.file_handle is second.file_handle
+
+    for i in range(200):
+        first.info("first line {}", i)
+        second.info("second line {}", i)
+        if i % 20 == 0:
+            first.flush()
+    first.flush()
+
+    lines = read_log_lines(path)
+    assert len(glob.glob(glob.escape(path) + ".*.gz")) >= 5
+    for name in ("first", "second"):
+        messages = {line.split("] ", 3)[-1] for line in lines if f"[{name}]" in line}
+        assert messages == {f"{name} line {i}" for i in range(200)}
+
+
+def test_shared_file_is_closed_with_its_last_logger(tmp_path):
+    path = str(tmp_path / "closing.log")
+    first = log_module.Logger("first", path, console_output=False)
+    second = log_module.Logger("second", path, console_output=False)
+    handle = first.file_handle
+
+    del first
+    assert not handle.handle.closed
+    del second
+    assert handle.handle.closed
+    assert os.path.abspath(path) not in log_module._files
@@ -0,0 +1,53 @@
+from app.ocr.temporal import TemporalVoter
+
+
+def feed(voter, frames, confidence=50):
+    """Add one result per frame and return what each add() committed"""
+    return [voter.add(text, confidence) for text in frames]
+
+
+def test_stable_text_is_adopted_at_the_quorum():
+    voter = TemporalVoter(window=5, quorum=3, confidence_sum=300)
+    assert feed(voter, ["Forest", "Forest", "Forest"]) == [None, None, "Forest"]
+    assert feed(voter, ["Forest", "Forest"]) == [None, None]
+    assert voter.commits == 1
+
+
+def test_confident_text_is_adopted_before_the_quorum():
+    voter = TemporalVoter(window=5, quorum=3, confidence_sum=300)
+    assert feed(voter, ["Desert", "Desert"], confidence=160) == [None, "Desert"]
+
+
+def test_single_frame_flip_is_resisted():
+    voter = TemporalVoter()
+    feed(voter, ["Forest"] * 3)
+    assert feed(voter, ["F0rest", "Forest", "Snow", "Forest"], confidence=95) == [None] * 4
+    assert voter.committed == "forest"
+
+
+def test_hysteresis_needs_a_margin_over_the_committed_text():
+    voter = TemporalVoter(window=5, quorum=3, confidence_sum=1000, margin=2)
+    feed(voter, ["Forest"] * 3)
+    # Window [F, F, D, D, D]: Desert leads by one vote only
+    assert feed(voter, ["Desert", "Desert", "Desert"]) == [None, None, None]
+    # Window [F, D, D, D, D]: it leads by three
+    assert feed(voter, ["Desert"]) == ["Desert"]
+
+
+def test_a_lead_of_exactly_the_margin_commits():
+    voter = TemporalVoter(window=5, quorum=3, confidence_sum=1000, margin=2)
+    feed(voter, ["Forest"] * 3)
+    # Window [F, X, D, D, D]: three votes against the committed text's one
+    assert feed(voter, ["Noise", "Desert", "Desert", "Desert"]) == [None, None, None, "Desert"]
+
+
+def test_texts_vote_together_regardless_of_case_and_spacing():
+    voter = TemporalVoter()
+    assert feed(voter, ["Forest", "forest ", "FOREST"]) == [None, None, "FOREST"]
+    assert voter.committed == "forest"
+
+
+def test_no_text_can_be_committed():
+    voter = TemporalVoter()
+    feed(voter, ["Forest"] * 3)
+    assert feed(voter, ["", "", "", "", ""]) == [None, None, None, "", None]
@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.ocr.text_detect import find_text_box
+
+
+def label(text, height, width, foreground=230, background=30):
+    """A crop with one centered line of text, like a game label"""
+    gray = np.full((height, width), background, np.uint8)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    scale = cv2.getFontScaleFromHeight(font, int(height * 0.55), 2)
+    (text_width, text_height), _ = cv2.getTextSize(text, font, scale, 2)
+    cv2.putText(gray, text, ((width - text_width) // 2, (height + text_height) // 2), font, scale,
+                foreground, 2, cv2.LINE_AA)
+    return gray
+
+
+@pytest.mark.parametrize("text, height, width", [
+    ("Forest", 30, 150),
+    ("Void", 20, 80),
+    ("Snow", 24, 100),
+    ("Sky", 18, 60),
+])
+def test_short_single_words_are_detected(text, height, width):
+    for gray in (label(text, height, width), label(text, height, width, foreground=30, background=230)):
+        box = find_text_box(gray)
+        assert box is not None
+        x1, y1, x2, y2 = box
+        assert 0 <= x1 < width // 2 < x2 <= width
+        assert 0 <= y1 < height // 2 < y2 <= height
+
+
+@pytest.mark.parametrize("draw", [
+    lambda gray: None,
+    lambda gray: cv2.circle(gray, (75, 15), 10, 200, -1),
+    lambda gray: cv2.rectangle(gray, (40, 8), (110, 22), 200, -1),
+    lambda gray: cv2.rectangle(gray, (20, 12), (60, 15), 200, -1),
+    lambda gray: cv2.line(gray, (5, 15), (145, 15), 200, 2),
+], ids=["flat", "disc", "bar", "thin bar", "line"])
+def test_lone_shapes_are_not_text(draw):
+    gray = np.full((30, 150), 40, np.uint8)
+    draw(gray)
+    assert find_text_box(gray) is None